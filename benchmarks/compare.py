@@ -0,0 +1,86 @@
+"""Compare two benchmark reports and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 0.1]
+
+Exits with status 1 if any tracked metric got worse by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# (path into a level, higher_is_better)
+LEVEL_METRICS = [
+    (("e2e_ms", "p50"), False),
+    (("e2e_ms", "p95"), False),
+    (("e2e_ms", "p99"), False),
+    (("round_ms", "p95"), False),
+    (("throughput_per_s",), True),
+]
+RSS_METRICS = ["bot_peak", "chromium_peak"]
+
+
+def _get(data: dict, path: tuple[str, ...]):
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def _change(old: float, new: float, higher_is_better: bool) -> float:
+    """Relative change, positive when the candidate is worse."""
+    if not old:
+        return 0.0
+    delta = (new - old) / old
+    return -delta if higher_is_better else delta
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list[str]:
+    regressions = []
+    print(f"{'metric':<28} {'baseline':>10} -> {'candidate':<10} {'change':>7}  (positive = worse)")
+    old_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in candidate.get("levels", []):
+        old = old_levels.get(level["concurrency"])
+        if old is None:
+            continue
+        for path, higher_is_better in LEVEL_METRICS:
+            before, after = _get(old, path), _get(level, path)
+            if before is None or after is None:
+                continue
+            change = _change(before, after, higher_is_better)
+            name = f"c={level['concurrency']} {'.'.join(path)}"
+            flag = "REGRESSION" if change > threshold else ""
+            print(f"{name:<28} {before:>10} -> {after:<10} {change:+7.1%}  {flag}")
+            if flag:
+                regressions.append(name)
+    for metric in RSS_METRICS:
+        before, after = _get(baseline, ("rss_mb", metric)), _get(candidate, ("rss_mb", metric))
+        if before is None or after is None:
+            continue
+        change = _change(before, after, False)
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{'rss ' + metric:<28} {before:>10} -> {after:<10} {change:+7.1%}  {flag}")
+        if flag:
+            regressions.append(f"rss {metric}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative slowdown (default 0.1)")
+    args = parser.parse_args()
+    regressions = compare(
+        json.loads(args.baseline.read_text()), json.loads(args.candidate.read_text()), args.threshold,
+    )
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import json
+from urllib.parse import quote
+
+from aiohttp import web
+
+PARAGRAPH = (
+    "<p>Benchmark paragraph {i} of article {slug}: the bot reads this text, strips the "
+    "navigation around it, converts it to Markdown and pages through it, which is "
+    "exactly the work a real article costs, sentence by sentence.</p>"
+)
+BOILERPLATE = """
+<header class="site-header"><a href="/">Home</a> <a href="/blog">Blog</a> <a href="/about">About</a></header>
+<nav><ul>{links}</ul></nav>
+<div class="cookie-banner">We use cookies to improve your experience. Accept all?</div>
+"""
+FOOTER = '<aside class="sidebar"><h3>Related</h3><ul>{links}</ul></aside><footer>Copyright fixture site</footer>'
+
+
+class FixtureSite:
+    """Deterministic pages for the browser tools.
+
+    /article/<slug>  server-rendered article with boilerplate (HTTP tier, ETag)
+    /spa/<slug>      text injected by JavaScript (forces the Chromium tier)
+    /html/           DuckDuckGo no-JS result page pointing back at /article
+    """
+
+    def __init__(self, base: str, latency_ms: float, paragraphs: int) -> None:
+        self._base = base
+        self._latency = latency_ms / 1000
+        self._paragraphs = paragraphs
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/article/{slug}", self._article)
+        app.router.add_get("/spa/{slug}", self._spa)
+        app.router.add_post("/html/", self._search)
+        return app
+
+    def _links(self, count: int) -> str:
+        return "".join(f'<li><a href="/article/link-{i}">Link {i}</a></li>' for i in range(count))
+
+    async def _article(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self._latency)
+        slug = request.match_info["slug"]
+        body = "".join(PARAGRAPH.format(i=i, slug=slug) for i in range(self._paragraphs))
+        html = (
+            f"<html><head><title>Article {slug}</title></head><body>"
+            f"{BOILERPLATE.format(links=self._links(30))}"
+            f"<article><h1>Article {slug}</h1>{body}</article>"
+            f"{FOOTER.format(links=self._links(15))}</body></html>"
+        )
+        etag = f'"{hashlib.sha1(html.encode()).hexdigest()[:16]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=html, content_type="text/html", headers={"ETag": etag})
+
+    async def _spa(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self._latency)
+        slug = request.match_info["slug"]
+        paragraphs = [PARAGRAPH.format(i=i, slug=slug) for i in range(self._paragraphs)]
+        html = (
+            f"<html><head><title>App {slug}</title></head><body><div id=app>Loading...</div>"
+            f"<script>document.addEventListener('DOMContentLoaded', () => {{"
+            f"document.getElementById('app').innerHTML = {json.dumps(''.join(paragraphs))};"
+            f"}});</script></body></html>"
+        )
+        return web.Response(text=html, content_type="text/html")
+
+    async def _search(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self._latency)
+        form = await request.post()
+        query = str(form.get("q", ""))
+        n = next((word for word in query.split() if word.isdigit()), "0")
+        results = []
+        for i in range(5):
+            target = quote(f"{self._base}/article/{n}-{i}", safe="")
+            results.append(
+                f'<div class="result results_links"><h2 class="result__title">'
+                f'<a class="result__a" href="//duckduckgo.com/l/?uddg={target}&rut=x">Result {i} for {query}</a></h2>'
+                f'<a class="result__snippet">Snippet {i}: everything about {query}.</a></div>'
+            )
+        ad = '<div class="result result--ad"><a class="result__a" href="https://ads.example/">Ad</a></div>'
+        return web.Response(text=f"<html><body>{ad}{''.join(results)}</body></html>", content_type="text/html")
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import uuid
+
+from aiohttp import web
+
+from benchmarks.scenarios import SCENARIOS, render, script_for
+
+VISION_ANSWER = "The screenshot shows a simple article layout with a heading and several paragraphs."
+
+
+def _tokens(value) -> int:
+    return max(1, len(json.dumps(value)) // 4)
+
+
+class LLMStub:
+    """Minimal Messages API (create and SSE stream) that replays scripted transcripts.
+
+    The round is the number of assistant turns already in the request, so the
+    stub keeps no per-conversation state. Latency is `latency_ms` to the first
+    token plus output tokens at `tokens_per_s`.
+    """
+
+    def __init__(self, site: str, latency_ms: float, tokens_per_s: float) -> None:
+        self._site = site
+        self._latency = latency_ms / 1000
+        self._tokens_per_s = tokens_per_s
+        self.requests = 0
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/v1/messages", self._messages)
+        return app
+
+    def _reply(self, messages: list[dict]) -> tuple[list[dict], str]:
+        found = script_for(messages)
+        if found is None or found[0] not in SCENARIOS:
+            return [{"type": "text", "text": VISION_ANSWER}], "end_turn"
+        scenario, n = found
+        script = SCENARIOS[scenario]
+        round_num = min(sum(1 for m in messages if m["role"] == "assistant"), len(script) - 1)
+        blocks = []
+        for i, block in enumerate(script[round_num]):
+            block = render(block, n, self._site)
+            if block["type"] == "tool_use":
+                block["id"] = f"toolu_{round_num}_{i}_{uuid.uuid4().hex[:8]}"
+            blocks.append(block)
+        stop = "tool_use" if any(b["type"] == "tool_use" for b in blocks) else "end_turn"
+        return blocks, stop
+
+    def _message(self, body: dict, content: list[dict], stop: str, input_tokens: int) -> dict:
+        return {
+            "id": f"msg_{uuid.uuid4().hex}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "stub"),
+            "content": content,
+            "stop_reason": stop,
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": _tokens(content)},
+        }
+
+    async def _messages(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        body = await request.json()
+        blocks, stop = self._reply(body["messages"])
+        input_tokens = _tokens(body["messages"])
+        if body.get("stream"):
+            return await self._stream(request, body, blocks, stop, input_tokens)
+        await asyncio.sleep(self._latency + _tokens(blocks) / self._tokens_per_s)
+        return web.json_response(self._message(body, blocks, stop, input_tokens))
+
+    async def _stream(self, request, body, blocks, stop, input_tokens) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        async def send(event: str, data: dict) -> None:
+            await response.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+
+        await asyncio.sleep(self._latency)
+        start = self._message(body, [], None, input_tokens)
+        start["usage"]["output_tokens"] = 0
+        await send("message_start", {"type": "message_start", "message": start})
+        for index, block in enumerate(blocks):
+            if block["type"] == "text":
+                await send("content_block_start", {
+                    "type": "content_block_start", "index": index, "content_block": {"type": "text", "text": ""},
+                })
+                words = block["text"].split(" ")
+                for i in range(0, len(words), 8):
+                    chunk = " ".join(words[i : i + 8]) + (" " if i + 8 < len(words) else "")
+                    await asyncio.sleep(_tokens(chunk) / self._tokens_per_s)
+                    await send("content_block_delta", {
+                        "type": "content_block_delta", "index": index, "delta": {"type": "text_delta", "text": chunk},
+                    })
+            else:
+                await send("content_block_start", {
+                    "type": "content_block_start",
+                    "index": index,
+                    "content_block": {"type": "tool_use", "id": block["id"], "name": block["name"], "input": {}},
+                })
+                await asyncio.sleep(_tokens(block["input"]) / self._tokens_per_s)
+                await send("content_block_delta", {
+                    "type": "content_block_delta",
+                    "index": index,
+                    "delta": {"type": "input_json_delta", "partial_json": json.dumps(block["input"])},
+                })
+            await send("content_block_stop", {"type": "content_block_stop", "index": index})
+        await send("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": stop, "stop_sequence": None},
+            "usage": {"output_tokens": _tokens(blocks)},
+        })
+        await send("message_stop", {"type": "message_stop"})
+        await response.write_eof()
+        return response
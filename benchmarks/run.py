@@ -0,0 +1,351 @@
+"""Offline end-to-end benchmark: Brain + tools against a local LLM stub and fixture site.
+
+    python -m benchmarks.run --concurrency 1,4,16 --conversations 32
+    python -m benchmarks.run --scenarios browser --concurrency 1,4   # needs Chromium
+    python -m benchmarks.run --tool-workers 2      # tools in worker processes
+    python -m benchmarks.compare old.json new.json
+
+Writes a JSON report (benchmarks/results/ by default) with p50/p95/p99 round and
+end-to-end latency per concurrency level, throughput, and peak RSS of the bot
+process and of its Chromium children.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.scenarios import SCENARIOS, prompt
+
+RESULTS_DIR = Path(__file__).parent / "results"
+RSS_INTERVAL = 0.2
+
+# Which benchmark run a gateway call belongs to (set per conversation task).
+_run_id: ContextVar[int | None] = ContextVar("bench_run_id", default=None)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentiles(values: list[float]) -> dict:
+    """Nearest-rank p50/p95/p99 plus mean and max, in milliseconds."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, round(p * len(ordered) + 0.5) - 1))]
+
+    return {
+        "count": len(ordered),
+        "p50": round(1000 * rank(0.50), 1),
+        "p95": round(1000 * rank(0.95), 1),
+        "p99": round(1000 * rank(0.99), 1),
+        "mean": round(1000 * sum(ordered) / len(ordered), 1),
+        "max": round(1000 * ordered[-1], 1),
+    }
+
+
+def _rss_kb(pid: int | str) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _descendants(root: int) -> set[int]:
+    children: dict[int, list[int]] = defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # comm may contain spaces; the ppid is the second field after ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children[ppid].append(int(entry))
+    found, stack = set(), [root]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            if child not in found:
+                found.add(child)
+                stack.append(child)
+    return found
+
+
+class RssSampler:
+    """Peak RSS of this process and, separately, of its other children (Chromium, shells).
+
+    Child RSS is a sum of VmRSS, so pages shared between Chromium processes are
+    counted more than once; treat it as an upper bound.
+    """
+
+    def __init__(self, exclude: int) -> None:
+        self._exclude = exclude
+        self.bot_peak_kb = 0
+        self.children_peak_kb = 0
+        self._task: asyncio.Task | None = None
+
+    def sample(self) -> None:
+        self.bot_peak_kb = max(self.bot_peak_kb, _rss_kb("self"))
+        excluded = {self._exclude} | _descendants(self._exclude)
+        children = _descendants(os.getpid()) - excluded
+        self.children_peak_kb = max(self.children_peak_kb, sum(_rss_kb(pid) for pid in children))
+
+    async def _run(self) -> None:
+        while True:
+            self.sample()
+            await asyncio.sleep(RSS_INTERVAL)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self.sample()
+
+
+class TimedGateway:
+    """Wraps the LLM gateway to timestamp the start of every round of a run."""
+
+    def __init__(self, inner) -> None:
+        self._inner = inner
+        self.round_starts: dict[int, list[float]] = defaultdict(list)
+
+    def _mark(self) -> None:
+        run = _run_id.get()
+        if run is not None:
+            self.round_starts[run].append(time.perf_counter())
+
+    async def create(self, **kwargs):
+        self._mark()
+        return await self._inner.create(**kwargs)
+
+    def stream(self, **kwargs):
+        self._mark()
+        return self._inner.stream(**kwargs)
+
+
+def _start_servers(args: argparse.Namespace, llm_port: int, site_port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.servers",
+            "--llm-port", str(llm_port),
+            "--site-port", str(site_port),
+            "--llm-latency-ms", str(args.llm_latency_ms),
+            "--llm-tokens-per-s", str(args.llm_tokens_per_s),
+            "--site-latency-ms", str(args.site_latency_ms),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    if proc.stdout.readline().strip() != "ready":
+        proc.kill()
+        raise SystemExit("benchmark servers failed to start")
+    return proc
+
+
+def _configure_env(llm_port: int, site_port: int, workspace: str, tool_workers: int) -> None:
+    """Point the bot at the local servers. Must run before anything under src/ is imported."""
+    os.environ.update({
+        "LLM_BASE_URL": f"http://127.0.0.1:{llm_port}",
+        "LLM_API_KEY": "bench",
+        "WORKSPACE_DIR": workspace,
+        "TOOL_WORKERS": str(tool_workers),
+        "SEARCH_NO_JS": "true",
+        "SEARCH_HTML_URL": f"http://127.0.0.1:{site_port}/html/",
+        "PAGE_CACHE_DISK": "false",
+        "OUTBOUND_PROXY": "",
+        "NO_PROXY": "127.0.0.1,localhost",
+        "no_proxy": "127.0.0.1,localhost",
+    })
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _conversation(brain, gateway: TimedGateway, run: int, scenario: str, stream: bool) -> dict:
+    _run_id.set(run)
+    started = time.perf_counter()
+    error = None
+    try:
+        if stream:
+            async for _ in brain.stream(prompt(scenario, run)):
+                pass
+        else:
+            await brain.think(prompt(scenario, run))
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    ended = time.perf_counter()
+    starts = gateway.round_starts.pop(run, [])
+    rounds = [b - a for a, b in zip(starts, [*starts[1:], ended])]
+    return {"scenario": scenario, "e2e": ended - started, "rounds": rounds, "error": error}
+
+
+async def _level(brain, gateway, concurrency: int, conversations: int, scenarios: list[str], first_run: int, stream: bool) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> dict:
+        async with semaphore:
+            return await _conversation(brain, gateway, first_run + i, scenarios[i % len(scenarios)], stream)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(conversations)))
+    wall = time.perf_counter() - started
+
+    errors = [r["error"] for r in results if r["error"]]
+    by_scenario = {}
+    for name in scenarios:
+        mine = [r for r in results if r["scenario"] == name and not r["error"]]
+        by_scenario[name] = {
+            "e2e_ms": percentiles([r["e2e"] for r in mine]),
+            "round_ms": percentiles([d for r in mine for d in r["rounds"]]),
+        }
+    ok = [r for r in results if not r["error"]]
+    return {
+        "concurrency": concurrency,
+        "conversations": conversations,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(ok) / wall, 3) if wall else 0.0,
+        "e2e_ms": percentiles([r["e2e"] for r in ok]),
+        "round_ms": percentiles([d for r in ok for d in r["rounds"]]),
+        "scenarios": by_scenario,
+    }
+
+
+async def _bench(args: argparse.Namespace, servers: subprocess.Popen) -> dict:
+    from loguru import logger
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    from src.core.gateway import llm_gateway
+    from src.core.llm import Brain
+    from src.tools.browser import browser_manager
+    from src.tools.workers import tool_workers
+
+    await tool_workers.start()
+    brain = Brain()
+    gateway = TimedGateway(llm_gateway)
+    brain.gateway = gateway
+    sampler = RssSampler(exclude=servers.pid)
+    sampler.start()
+
+    levels, next_run = [], 0
+    try:
+        # One untimed conversation per scenario so imports and pools are warm
+        await _level(brain, gateway, len(args.scenarios), len(args.scenarios), args.scenarios, 10**6, args.stream)
+        for concurrency in args.concurrency:
+            level = await _level(brain, gateway, concurrency, args.conversations, args.scenarios, next_run, args.stream)
+            next_run += args.conversations
+            levels.append(level)
+            print(
+                f"c={concurrency:<3} {level['throughput_per_s']:>7.2f} conv/s  "
+                f"e2e p50={level['e2e_ms'].get('p50')}ms p95={level['e2e_ms'].get('p95')}ms "
+                f"p99={level['e2e_ms'].get('p99')}ms  round p95={level['round_ms'].get('p95')}ms  "
+                f"errors={level['errors']}",
+                flush=True,
+            )
+    finally:
+        sampler.stop()
+        stats = {
+            "gateway": llm_gateway.stats(),
+            "page_cache": browser_manager.cache_stats(),
+            "tiers": browser_manager.tier_stats(),
+            "search": browser_manager.search_stats(),
+            "prefetch": browser_manager.prefetch_stats(),
+            "pool": browser_manager.pool_stats(),
+            "tool_workers": tool_workers.stats(),
+        }
+        await tool_workers.stop()
+        await browser_manager.close()
+
+    return {
+        "levels": levels,
+        "rss_mb": {
+            "bot_peak": round(sampler.bot_peak_kb / 1024, 1),
+            "chromium_peak": round(sampler.children_peak_kb / 1024, 1),
+        },
+        "stats": stats,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="chat,research,workspace",
+                        help=f"comma-separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrent conversation counts")
+    parser.add_argument("--conversations", type=int, default=24, help="conversations per concurrency level")
+    parser.add_argument("--stream", action="store_true", help="drive Brain.stream instead of Brain.think")
+    parser.add_argument("--llm-latency-ms", type=float, default=200, help="stub time to first token")
+    parser.add_argument("--llm-tokens-per-s", type=float, default=400, help="stub output speed")
+    parser.add_argument("--site-latency-ms", type=float, default=20, help="fixture site response delay")
+    parser.add_argument("--tool-workers", type=int, default=0, help="run tools in this many worker processes")
+    parser.add_argument("--output", type=Path, help="report path (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+    args.scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c]
+
+    args.llm_port, args.site_port = _free_port(), _free_port()
+    servers = _start_servers(args, args.llm_port, args.site_port)
+    workspace = tempfile.mkdtemp(prefix="clawdius-bench-")
+    _configure_env(args.llm_port, args.site_port, workspace, args.tool_workers)
+    try:
+        report = asyncio.run(_bench(args, servers))
+    finally:
+        servers.terminate()
+        servers.wait()
+
+    report["meta"] = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "scenarios": args.scenarios,
+        "stream": args.stream,
+        "llm_latency_ms": args.llm_latency_ms,
+        "llm_tokens_per_s": args.llm_tokens_per_s,
+        "site_latency_ms": args.site_latency_ms,
+        "conversations": args.conversations,
+        "tool_workers": args.tool_workers,
+    }
+    output = args.output or RESULTS_DIR / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"rss: bot {report['rss_mb']['bot_peak']} MB, children {report['rss_mb']['chromium_peak']} MB")
+    print(f"report: {output}")
+
+
+if __name__ == "__main__":
+    main()
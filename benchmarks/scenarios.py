@@ -0,0 +1,71 @@
+import json
+import re
+
+# The prompt carries this tag so the stateless LLM stub knows which script to replay.
+MARKER = re.compile(r"bench:(\w+):(\d+)")
+
+NOTES = "\n".join(
+    f"- run {i}: throughput and latency notes for the benchmark workspace, line {i}" for i in range(60)
+)
+
+
+def text(value: str) -> dict:
+    return {"type": "text", "text": value}
+
+
+def tool(name: str, args: dict) -> dict:
+    return {"type": "tool_use", "name": name, "input": args}
+
+
+# Scripted transcripts: one list of content blocks per LLM round. A round with
+# tool_use blocks is answered by the bot's tools; the last round is the answer.
+# "{n}" is the conversation number and "{site}" the fixture site's base URL.
+SCENARIOS: dict[str, list[list[dict]]] = {
+    "chat": [
+        [text("Hello! I'm ready to work. " * 20)],
+    ],
+    "research": [
+        [text("Let me look that up."), tool("web_search", {"query": "clawdius benchmark {n}"})],
+        [
+            tool("read_webpage", {"url": "{site}/article/{n}-0"}),
+            tool("read_webpage", {"url": "{site}/article/{n}-1"}),
+        ],
+        [tool("read_webpage", {"url": "{site}/article/{n}-0", "page": 2})],
+        [text("Both articles agree on the main points. " * 30)],
+    ],
+    "workspace": [
+        [tool("write_file", {"path": "bench/{n}/notes.md", "content": NOTES})],
+        [
+            tool("search_workspace", {"query": "throughput", "glob": "bench/{n}/*"}),
+            tool("read_file", {"path": "bench/{n}/notes.md", "start_line": 20, "end_line": 40}),
+        ],
+        [tool("execute_shell", {"command": "wc -l bench/{n}/notes.md && ls bench/{n}"})],
+        [text("The notes file has 60 lines. " * 10)],
+    ],
+    # Needs Chromium: the fixture page only renders its text with JavaScript.
+    "browser": [
+        [tool("read_webpage", {"url": "{site}/spa/{n}"})],
+        [text("The page is rendered client-side and says what it should. " * 10)],
+    ],
+}
+
+
+def prompt(scenario: str, n: int) -> str:
+    return f"bench:{scenario}:{n} Please run the {scenario} benchmark task."
+
+
+def script_for(messages: list[dict]) -> tuple[str, int] | None:
+    """Find the scenario tag in the first user turn of a request."""
+    if not messages:
+        return None
+    content = messages[0].get("content")
+    if isinstance(content, list):
+        content = " ".join(b.get("text", "") for b in content if isinstance(b, dict))
+    match = MARKER.search(content or "")
+    return (match.group(1), int(match.group(2))) if match else None
+
+
+def render(block: dict, n: int, site: str) -> dict:
+    """Fill the {n}/{site} placeholders of a scripted block."""
+    raw = json.dumps(block).replace("{n}", str(n)).replace("{site}", site)
+    return json.loads(raw)
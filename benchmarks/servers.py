@@ -0,0 +1,44 @@
+"""Run the LLM stub and the fixture site (started by benchmarks.run in a child process)."""
+
+import argparse
+import asyncio
+
+from aiohttp import web
+
+from benchmarks.fixture_site import FixtureSite
+from benchmarks.llm_stub import LLMStub
+
+HOST = "127.0.0.1"
+
+
+async def serve(args: argparse.Namespace) -> None:
+    site_base = f"http://{HOST}:{args.site_port}"
+    stub = LLMStub(site_base, args.llm_latency_ms, args.llm_tokens_per_s)
+    site = FixtureSite(site_base, args.site_latency_ms, args.paragraphs)
+    runners = []
+    for app, port in ((stub.app(), args.llm_port), (site.app(), args.site_port)):
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, HOST, port).start()
+        runners.append(runner)
+    print("ready", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-port", type=int, required=True)
+    parser.add_argument("--site-port", type=int, required=True)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=400)
+    parser.add_argument("--site-latency-ms", type=float, default=20)
+    parser.add_argument("--paragraphs", type=int, default=120)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
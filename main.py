@@ -3,7 +3,7 @@ import logging
 from loguru import logger
 
 from src.core.config import settings
-from src.interfaces.discord_bot import ClawdiusBot
+from src.core.startup import startup
 
 
 def main() -> None:
@@ -13,7 +13,7 @@ def main() -> None:
 
     logging.basicConfig(level=logging.WARNING)
 
-    bot = ClawdiusBot()
+    bot = startup.import_module("src.interfaces.discord_bot").ClawdiusBot()
     logger.info("Starting Clawdius...")
     bot.run(settings.DISCORD_TOKEN)
 
@@ -0,0 +1,109 @@
+import json
+
+from loguru import logger
+
+CHARS_PER_TOKEN = 4
+# Compact down to this fraction of the budget, so the cached prefix stays
+# stable for several rounds instead of shifting on every request.
+LOW_WATER = 0.7
+MIN_COMPACT_CHARS = 1200
+PREVIEW_CHARS = 300
+
+EXPAND_TOOL = "expand_tool_result"
+EXPAND_TOOL_SCHEMA = {
+    "name": EXPAND_TOOL,
+    "description": "Show the full text of an earlier tool result that was compacted to save context.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "tool_use_id": {"type": "string", "description": "The tool_use_id named in the compacted stub."},
+        },
+        "required": ["tool_use_id"],
+    },
+}
+
+
+def _block_chars(block) -> int:
+    if isinstance(block, dict):
+        content = block.get("content", block.get("text", ""))
+        if isinstance(content, list):
+            return sum(_block_chars(b) for b in content)
+        return len(str(content))
+    if getattr(block, "type", None) == "tool_use":
+        return len(block.name) + len(json.dumps(block.input))
+    return len(getattr(block, "text", "") or "")
+
+
+def estimate_tokens(messages: list) -> int:
+    """Rough prompt size: ~4 chars per token over message text and tool payloads."""
+    chars = 0
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, str):
+            chars += len(content)
+        else:
+            chars += sum(_block_chars(b) for b in content)
+    return chars // CHARS_PER_TOKEN
+
+
+class TranscriptCompactor:
+    """Keeps one conversation's transcript under a token budget.
+
+    When the estimate exceeds `budget_tokens`, the oldest tool results (never the
+    newest `keep_recent`) are swapped for short stubs. Originals are kept so the
+    model can get one back with the expand_tool_result tool.
+    """
+
+    def __init__(self, budget_tokens: int, keep_recent: int) -> None:
+        self._budget = budget_tokens
+        self._keep_recent = keep_recent
+        self._originals: dict[str, str] = {}
+
+    def compact(self, messages: list) -> None:
+        total = estimate_tokens(messages)
+        if total <= self._budget:
+            return
+
+        names = {
+            b.id: b.name
+            for m in messages if m["role"] == "assistant" and not isinstance(m["content"], str)
+            for b in m["content"] if getattr(b, "type", None) == "tool_use"
+        }
+        results = [
+            block
+            for m in messages if m["role"] == "user" and isinstance(m["content"], list)
+            for block in m["content"] if isinstance(block, dict) and block.get("type") == "tool_result"
+        ]
+        candidates = results[: max(len(results) - self._keep_recent, 0)]
+
+        target = int(self._budget * LOW_WATER)
+        before, compacted = total, 0
+        for block in candidates:
+            if total <= target:
+                break
+            content = block["content"]
+            if not isinstance(content, str) or len(content) < MIN_COMPACT_CHARS:
+                continue
+            tool_use_id = block["tool_use_id"]
+            self._originals[tool_use_id] = content
+            block["content"] = self._stub(tool_use_id, names.get(tool_use_id, "tool"), content)
+            total -= (len(content) - len(block["content"])) // CHARS_PER_TOKEN
+            compacted += 1
+
+        if compacted:
+            logger.info(f"Compacted {compacted} tool results: ~{before} → ~{total} tokens (budget {self._budget})")
+
+    @staticmethod
+    def _stub(tool_use_id: str, name: str, content: str) -> str:
+        preview = " ".join(content[:PREVIEW_CHARS].split())
+        return (
+            f"[Compacted {name} result ({len(content)} chars) to save context. "
+            f"Starts with: {preview}… "
+            f'Call {EXPAND_TOOL} with tool_use_id="{tool_use_id}" for the full text.]'
+        )
+
+    def expand(self, tool_use_id: str) -> str:
+        original = self._originals.get(tool_use_id)
+        if original is None:
+            return f"No compacted result with tool_use_id={tool_use_id}."
+        return original
@@ -6,9 +6,52 @@ class Settings(BaseSettings):
     LLM_BASE_URL: str = "http://host.docker.internal:8080"
     LLM_API_KEY: str = "test"
     LLM_MODEL: str = "claude-opus-4-6-thinking"
+    LLM_CONCURRENCY: int = 8
+    LLM_MODEL_CONCURRENCY: int = 4
+    LLM_MAX_RETRIES: int = 4
+    PROMPT_CACHING: bool = True
+    CONTEXT_TOKEN_BUDGET: int = 60_000
+    CONTEXT_KEEP_RECENT: int = 4
+
+    TOOL_CONCURRENCY: int = 4
+    TOOL_WORKERS: int = 0
+    TOOL_WORKER_TIMEOUT: int = 300
+    CPU_EXECUTOR: str = "thread"
+    CPU_WORKERS: int = 4
+    BROWSER_POOL_SIZE: int = 4
+    BROWSER_RECYCLE_PAGES: int = 500
+    BROWSER_RECYCLE_RSS_MB: int = 1536
+    PAGE_CACHE_ENTRIES: int = 128
+    PAGE_CACHE_TTL: int = 900
+    PAGE_CACHE_DISK: bool = False
+    HTTP_FAST_PATH: bool = True
+    READ_PAGE_CHARS: int = 16_000
+    SEARCH_NO_JS: bool = False
+    SEARCH_HTML_URL: str = "https://html.duckduckgo.com/html/"
+    PREFETCH_TOP_K: int = 3
+    PREFETCH_CONCURRENCY: int = 2
+    PREFETCH_BUDGET_BYTES: int = 4_000_000
+    SCREENSHOT_MAX_WIDTH: int = 1024
+    SCREENSHOT_FORMAT: str = "jpeg"
+    SCREENSHOT_QUALITY: int = 75
+    VISUAL_CACHE_ENTRIES: int = 64
+    READ_FILE_CAP: int = 100_000
+    SEARCH_MAX_RESULTS: int = 200
+    SHELL_OUTPUT_CAP: int = 32_000
+    SHELL_SESSIONS: bool = False
+    SHELL_MAX_SESSIONS: int = 8
+    SHELL_SESSION_IDLE: int = 600
+
+    TRACE_FILE: str = ""
+    METRICS_PORT: int = 0
+    METRICS_HOST: str = "127.0.0.1"
 
     DISCORD_TOKEN: str = ""
     DISCORD_PROXY: str = ""
+    STREAM_RESPONSES: bool = True
+    SCHEDULER_WORKERS: int = 4
+    SCHEDULER_MAX_QUEUE: int = 32
+    SCHEDULER_MAX_PER_USER: int = 3
     OUTBOUND_PROXY: str = ""
     ALLOWED_CHANNEL_ID: int | None = None
     ALLOWED_USER_ID: int | None = None
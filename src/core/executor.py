@@ -0,0 +1,106 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import TypeVar
+
+from loguru import logger
+
+from src.core.config import settings
+from src.core.tracing import tracer
+
+T = TypeVar("T")
+
+LAG_INTERVAL = 0.25
+LAG_WARN = 0.2
+LAG_SAMPLES = 1200  # five minutes at LAG_INTERVAL
+
+_executor: Executor | None = None
+
+
+def get_executor() -> Executor:
+    """Pool for CPU-heavy post-processing (CPU_EXECUTOR=thread|process)."""
+    global _executor
+    if _executor is None:
+        if settings.CPU_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.CPU_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=settings.CPU_WORKERS, thread_name_prefix="cpu")
+        logger.info(f"CPU executor: {settings.CPU_EXECUTOR} x{settings.CPU_WORKERS}")
+    return _executor
+
+
+async def run_cpu(fn: Callable[..., T], *args) -> T:
+    """Run fn(*args) off the event loop. With a process pool, fn and args must pickle."""
+    with tracer.span("cpu", fn=fn.__name__):
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), partial(fn, *args))
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a short sleep.
+
+    Lag is the time a ready callback waits because something is blocking the
+    loop; if it grows, Discord heartbeats and every other request stall with it.
+    """
+
+    def __init__(self) -> None:
+        self._samples: deque[float] = deque(maxlen=LAG_SAMPLES)
+        self._max = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(LAG_INTERVAL)
+            lag = max(time.monotonic() - started - LAG_INTERVAL, 0.0)
+            self._samples.append(lag)
+            self._max = max(self._max, lag)
+            if lag > LAG_WARN:
+                logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+    def stats(self) -> dict:
+        if not self._samples:
+            return {"samples": 0}
+        ordered = sorted(self._samples)
+        return {
+            "samples": len(ordered),
+            "avg_ms": round(1000 * sum(ordered) / len(ordered), 2),
+            "p99_ms": round(1000 * ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)], 2),
+            "recent_max_ms": round(1000 * ordered[-1], 2),
+            "max_ms": round(1000 * self._max, 2),
+        }
+
+    def metrics(self) -> list[str]:
+        stats = self.stats()
+        if not stats["samples"]:
+            return []
+        return [
+            "# HELP clawdius_loop_lag_seconds Event loop wake-up lag over recent samples (max: since start).",
+            "# TYPE clawdius_loop_lag_seconds gauge",
+            *(
+                f'clawdius_loop_lag_seconds{{stat="{stat}"}} {stats[f"{stat}_ms"] / 1000:.4f}'
+                for stat in ("avg", "p99", "recent_max", "max")
+            ),
+        ]
+
+
+# Shared singleton instance
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,182 @@
+import asyncio
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from email.utils import parsedate_to_datetime
+
+from anthropic import APIConnectionError, APIStatusError, AsyncAnthropic
+from anthropic.types import Message
+from loguru import logger
+
+from src.core.config import settings
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+WARM_TIMEOUT = 10.0
+
+
+@dataclass(slots=True)
+class GatewayStats:
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    throttled: int = 0
+    in_flight: int = 0
+    queued: int = 0
+    total_queue_s: float = 0.0
+    max_queue_s: float = 0.0
+    total_latency_s: float = 0.0
+    max_latency_s: float = 0.0
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Server-requested delay in seconds, from retry-after-ms or retry-after."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retryable(error: Exception) -> bool:
+    if isinstance(error, APIConnectionError):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in RETRY_STATUSES
+
+
+class LLMGateway:
+    """Single entry point for every Messages API call in the process.
+
+    Owns the one AsyncAnthropic client (and so one keep-alive connection pool),
+    bounds concurrency globally and per model, and retries 429/5xx/529 and
+    connection errors with jittered exponential backoff that honours retry-after.
+    """
+
+    def __init__(self) -> None:
+        self.client = AsyncAnthropic(
+            base_url=settings.LLM_BASE_URL,
+            api_key=settings.LLM_API_KEY,
+            max_retries=0,  # retries are handled here, under the concurrency limits
+        )
+        self._global = asyncio.Semaphore(settings.LLM_CONCURRENCY)
+        self._per_model: dict[str, asyncio.Semaphore] = {}
+        self._stats = GatewayStats()
+        self._delegate: Callable[[dict], Awaitable[dict]] | None = None
+
+    def delegate_to(self, send: Callable[[dict], Awaitable[dict]]) -> None:
+        """Hand create() calls to another process's gateway instead of calling the API.
+
+        Tool workers forward to the bot this way, so LLM_CONCURRENCY stays a
+        limit on the whole bot rather than on each process. send gets the
+        create() kwargs and returns the response as a dict.
+        """
+        self._delegate = send
+
+    async def warm(self) -> None:
+        """Open a keep-alive connection to the API before the first real request needs it."""
+        started = time.monotonic()
+        try:
+            await self.client.with_options(timeout=WARM_TIMEOUT).models.list(limit=1)
+        except APIStatusError:
+            pass  # any HTTP response means the connection is up
+        except Exception as e:
+            logger.warning(f"LLM connection warm-up failed: {e}")
+            return
+        logger.info(f"LLM connection warmed in {(time.monotonic() - started) * 1000:.0f}ms")
+
+    @asynccontextmanager
+    async def _slot(self, model: str) -> AsyncIterator[None]:
+        per_model = self._per_model.setdefault(model, asyncio.Semaphore(settings.LLM_MODEL_CONCURRENCY))
+        queued_at = time.monotonic()
+        self._stats.queued += 1
+        admitted = False
+        try:
+            # Per model first: callers queued behind a busy model mustn't hold global slots
+            async with per_model, self._global:
+                admitted = True
+                waited = time.monotonic() - queued_at
+                self._stats.queued -= 1
+                self._stats.total_queue_s += waited
+                self._stats.max_queue_s = max(self._stats.max_queue_s, waited)
+                self._stats.in_flight += 1
+                started = time.monotonic()
+                try:
+                    yield
+                finally:
+                    self._stats.in_flight -= 1
+                    latency = time.monotonic() - started
+                    self._stats.total_latency_s += latency
+                    self._stats.max_latency_s = max(self._stats.max_latency_s, latency)
+        finally:
+            if not admitted:
+                self._stats.queued -= 1
+
+    @asynccontextmanager
+    async def _attempts(self, model: str, call: Callable[[], Awaitable]) -> AsyncIterator:
+        """Yield call()'s result, retrying it; each attempt takes its own slot, none is held while backing off."""
+        self._stats.requests += 1
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            async with self._slot(model):
+                try:
+                    result = await call()
+                except (APIConnectionError, APIStatusError) as e:
+                    if not _retryable(e) or attempt == settings.LLM_MAX_RETRIES:
+                        self._stats.failures += 1
+                        raise
+                    if isinstance(e, APIStatusError) and e.status_code in (429, 529):
+                        self._stats.throttled += 1
+                    backoff = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt))
+                    delay = max(backoff, _retry_after(e) or 0.0)
+                    self._stats.retries += 1
+                    logger.warning(f"[llm] {type(e).__name__}, retry {attempt + 1} in {delay:.1f}s")
+                else:
+                    yield result
+                    return
+            await asyncio.sleep(delay)
+
+    async def create(self, **kwargs):
+        """messages.create with concurrency limits and retries."""
+        if self._delegate is not None:
+            return Message.model_validate(await self._delegate(kwargs))
+        async with self._attempts(kwargs["model"], lambda: self.client.messages.create(**kwargs)) as response:
+            return response
+
+    @asynccontextmanager
+    async def stream(self, **kwargs) -> AsyncIterator:
+        """messages.stream with concurrency limits; retries cover opening the stream."""
+        async def _open():
+            manager = self.client.messages.stream(**kwargs)
+            return manager, await manager.__aenter__()
+
+        async with self._attempts(kwargs["model"], _open) as (manager, stream):
+            try:
+                yield stream
+            finally:
+                await manager.__aexit__(None, None, None)
+
+    def stats(self) -> dict:
+        s = self._stats
+        done = max(s.requests + s.retries - s.in_flight, 1)  # latency is per attempt
+        return {
+            **asdict(s),
+            "avg_queue_ms": round(1000 * s.total_queue_s / max(s.requests, 1), 1),
+            "avg_latency_ms": round(1000 * s.total_latency_s / done, 1),
+        }
+
+
+# Shared singleton instance
+llm_gateway = LLMGateway()
@@ -1,36 +1,130 @@
-from anthropic import AsyncAnthropic
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+
 from loguru import logger
 
+from src.core.compaction import EXPAND_TOOL, EXPAND_TOOL_SCHEMA, TranscriptCompactor
 from src.core.config import settings
-from src.tools.registry import TOOLS, run_tool
+from src.core.gateway import llm_gateway
+from src.core.tracing import Span, tracer
+from src.tools.conversation import current_conversation
+from src.tools.registry import TOOLS, end_conversation, run_tools
 
 MAX_TOOL_ROUNDS = 15
+MAX_TOKENS = 4096
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Registry tools plus the brain-local tool for un-compacting old results
+BRAIN_TOOLS = [*TOOLS, EXPAND_TOOL_SCHEMA]
+# Tool schemas never change, so one breakpoint after the last tool caches them all.
+CACHED_TOOLS = [*BRAIN_TOOLS[:-1], {**BRAIN_TOOLS[-1], "cache_control": CACHE_CONTROL}]
+
+
+@dataclass(frozen=True, slots=True)
+class BrainEvent:
+    """One step of a streamed ReAct loop.
+
+    kind: "text" (a text delta), "tool_call" (a tool is about to run) or "done".
+    """
+
+    kind: str
+    text: str = ""
+    name: str = ""
+    args: dict = field(default_factory=dict)
 
 
 class Brain:
     def __init__(self) -> None:
-        self.client = AsyncAnthropic(
-            base_url=settings.LLM_BASE_URL,
-            api_key=settings.LLM_API_KEY,
-        )
+        self.gateway = llm_gateway
         self.model = settings.LLM_MODEL
         logger.info(f"Brain initialized → model={self.model} base_url={settings.LLM_BASE_URL}")
 
+    def _request(self, messages: list) -> dict:
+        if not settings.PROMPT_CACHING:
+            return {
+                "model": self.model,
+                "max_tokens": MAX_TOKENS,
+                "tools": BRAIN_TOOLS,
+                "messages": messages,
+            }
+        return {
+            "model": self.model,
+            "max_tokens": MAX_TOKENS,
+            "tools": CACHED_TOOLS,
+            "messages": _with_cache_breakpoints(messages),
+        }
+
+    @staticmethod
+    def _log_usage(round_num: int, response, span: Span) -> None:
+        span.set(stop_reason=response.stop_reason)
+        usage = response.usage
+        if usage is None:
+            return
+        span.set(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cache_read_tokens=getattr(usage, "cache_read_input_tokens", None) or 0,
+            cache_write_tokens=getattr(usage, "cache_creation_input_tokens", None) or 0,
+        )
+        logger.info(
+            f"Round {round_num + 1} usage: input={usage.input_tokens} "
+            f"cache_read={getattr(usage, 'cache_read_input_tokens', None) or 0} "
+            f"cache_write={getattr(usage, 'cache_creation_input_tokens', None) or 0} "
+            f"output={usage.output_tokens}"
+        )
+
+    @staticmethod
+    def _begin_conversation() -> str:
+        """Tag tool calls made from here on with a fresh conversation id."""
+        conversation_id = uuid.uuid4().hex[:12]
+        current_conversation.set(conversation_id)
+        return conversation_id
+
+    def _new_compactor(self) -> TranscriptCompactor:
+        return TranscriptCompactor(settings.CONTEXT_TOKEN_BUDGET, settings.CONTEXT_KEEP_RECENT)
+
+    async def _run_tool_blocks(
+        self, tool_blocks: list, compactor: TranscriptCompactor, on_tool_call=None
+    ) -> dict:
+        """Execute a turn's tool_use blocks and build the tool_result user message."""
+        # expand_tool_result is answered from this conversation's compactor
+        registry_blocks = [b for b in tool_blocks if b.name != EXPAND_TOOL]
+        # Execute the batch (concurrently where safe) and collect results in order
+        registry_results = iter(await run_tools(
+            [(b.name, b.input) for b in registry_blocks],
+            on_tool_call=on_tool_call,
+        ))
+        results = [
+            compactor.expand(b.input.get("tool_use_id", "")) if b.name == EXPAND_TOOL else next(registry_results)
+            for b in tool_blocks
+        ]
+        tool_results = [
+            {"type": "tool_result", "tool_use_id": b.id, "content": result}
+            for b, result in zip(tool_blocks, results)
+        ]
+        return {"role": "user", "content": tool_results}
+
     async def think(self, prompt: str, on_tool_call=None) -> str:
         """ReAct loop: reason, act with tools, repeat until final answer.
 
         on_tool_call: optional async callback(tool_name, tool_args) for status updates.
         """
+        conversation_id = self._begin_conversation()
+        try:
+            return await self._think(prompt, on_tool_call)
+        finally:
+            await end_conversation(conversation_id)
+
+    async def _think(self, prompt: str, on_tool_call=None) -> str:
         messages = [{"role": "user", "content": prompt}]
+        compactor = self._new_compactor()
 
         for round_num in range(MAX_TOOL_ROUNDS):
             logger.debug(f"Round {round_num + 1}")
-            response = await self.client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                tools=TOOLS,
-                messages=messages,
-            )
+            with tracer.span("llm.round", round=round_num + 1, model=self.model) as span:
+                response = await self.gateway.create(**self._request(messages))
+                self._log_usage(round_num, response, span)
 
             logger.debug(f"stop_reason={response.stop_reason} blocks={[b.type for b in response.content]}")
 
@@ -44,21 +138,68 @@ class Brain:
 
             # Append the assistant's full response (text + tool_use blocks)
             messages.append({"role": "assistant", "content": response.content})
+            messages.append(await self._run_tool_blocks(tool_blocks, compactor, on_tool_call))
+            compactor.compact(messages)
+
+        return "(max tool rounds reached)"
+
+    async def stream(self, prompt: str) -> AsyncIterator[BrainEvent]:
+        """Streaming variant of think(): yields text deltas and tool calls as they happen.
+
+        Text from every round is streamed, so narration before a tool call shows up
+        too. The final event is always kind="done".
+        """
+        conversation_id = self._begin_conversation()
+        try:
+            async for event in self._stream(prompt):
+                yield event
+        finally:
+            await end_conversation(conversation_id)
+
+    async def _stream(self, prompt: str) -> AsyncIterator[BrainEvent]:
+        messages = [{"role": "user", "content": prompt}]
+        compactor = self._new_compactor()
+
+        for round_num in range(MAX_TOOL_ROUNDS):
+            logger.debug(f"Round {round_num + 1} (streaming)")
+            with tracer.span("llm.round", round=round_num + 1, model=self.model, stream=True) as span:
+                async with self.gateway.stream(**self._request(messages)) as stream:
+                    async for text in stream.text_stream:
+                        yield BrainEvent("text", text=text)
+                    response = await stream.get_final_message()
+                self._log_usage(round_num, response, span)
+
+            logger.debug(f"stop_reason={response.stop_reason} blocks={[b.type for b in response.content]}")
+
+            tool_blocks = [b for b in response.content if b.type == "tool_use"]
+            if not tool_blocks:
+                yield BrainEvent("done")
+                return
 
-            # Execute each tool and collect results
-            tool_results = []
             for block in tool_blocks:
-                logger.info(f"Tool call: {block.name}({block.input})")
-                if on_tool_call:
-                    await on_tool_call(block.name, block.input)
+                yield BrainEvent("tool_call", name=block.name, args=block.input)
 
-                result = await run_tool(block.name, block.input)
-                tool_results.append({
-                    "type": "tool_result",
-                    "tool_use_id": block.id,
-                    "content": result,
-                })
+            messages.append({"role": "assistant", "content": response.content})
+            messages.append(await self._run_tool_blocks(tool_blocks, compactor))
+            compactor.compact(messages)
 
-            messages.append({"role": "user", "content": tool_results})
+        yield BrainEvent("text", text="\n\n(max tool rounds reached)")
+        yield BrainEvent("done")
 
-        return "(max tool rounds reached)"
+
+def _with_cache_breakpoints(messages: list) -> list:
+    """Copy of the transcript with cache breakpoints on the last two user turns.
+
+    The newest user turn caches the whole prefix for the next round; the one
+    before it keeps a hit within reach when a turn adds many content blocks.
+    The stored transcript is never mutated.
+    """
+    marked = list(messages)
+    user_turns = [i for i, m in enumerate(marked) if m["role"] == "user"][-2:]
+    for i in user_turns:
+        content = marked[i]["content"]
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        content = [*content[:-1], {**content[-1], "cache_control": CACHE_CONTROL}]
+        marked[i] = {**marked[i], "content": content}
+    return marked
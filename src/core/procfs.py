@@ -0,0 +1,65 @@
+"""Process-tree helpers over Linux /proc. Elsewhere they find nothing."""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+PROC = Path("/proc")
+
+
+@dataclass(frozen=True, slots=True)
+class ProcInfo:
+    pid: int
+    ppid: int
+    pgrp: int
+    name: str
+
+
+def processes() -> dict[int, ProcInfo]:
+    found = {}
+    for stat in PROC.glob("[0-9]*/stat"):
+        try:
+            raw = stat.read_text()
+            head, tail = raw.rsplit(")", 1)
+            _, ppid, pgrp = tail.split()[:3]
+            pid = int(stat.parent.name)
+            found[pid] = ProcInfo(pid, int(ppid), int(pgrp), head.split("(", 1)[1])
+        except (OSError, IndexError, ValueError):
+            continue  # exited while we were looking
+    return found
+
+
+def descendants(root: int) -> list[ProcInfo]:
+    """root (if still alive) and every process below it."""
+    table = processes()
+    children: dict[int, list[int]] = {}
+    for info in table.values():
+        children.setdefault(info.ppid, []).append(info.pid)
+    found, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        if pid in table:
+            found.append(table[pid])
+            stack.extend(children.get(pid, ()))
+    return found
+
+
+def rss_bytes(pid: int) -> int:
+    """Resident set size of one process, or 0 if it's gone."""
+    try:
+        for line in (PROC / str(pid) / "status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def age_seconds(pid: int) -> float | None:
+    """How long ago the process started (10ms resolution), or None if unknown."""
+    try:
+        started = int((PROC / str(pid) / "stat").read_text().rsplit(")", 1)[1].split()[19])
+        uptime = float((PROC / "uptime").read_text().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    return max(uptime - started / os.sysconf("SC_CLK_TCK"), 0.0)
@@ -0,0 +1,73 @@
+import importlib
+import os
+import sys
+import time
+from types import ModuleType
+
+from loguru import logger
+
+from src.core.procfs import age_seconds
+
+# Milestones the report waits for before it is logged.
+MILESTONES = ("discord_ready", "llm_ready", "tools_ready")
+
+
+class StartupTimer:
+    """Time from process start to each startup milestone, plus what the slow imports cost.
+
+    Milestones are recorded once, the first time they're reached. When all of
+    MILESTONES are in (or done() is called), one summary line is logged.
+    """
+
+    def __init__(self) -> None:
+        # Counts interpreter startup too where /proc says when the process began
+        self._started = time.perf_counter() - (age_seconds(os.getpid()) or 0.0)
+        self._marks: dict[str, float] = {}
+        self._imports: dict[str, float] = {}
+        self._reported = False
+
+    def import_module(self, name: str) -> ModuleType:
+        """Import name, recording how long it took if it wasn't loaded yet."""
+        if name in sys.modules:
+            return sys.modules[name]
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        self._imports[name] = time.perf_counter() - started
+        return module
+
+    def mark(self, milestone: str) -> None:
+        if milestone in self._marks:
+            return
+        self._marks[milestone] = time.perf_counter() - self._started
+        logger.debug(f"Startup: {milestone} at {self._marks[milestone] * 1000:.0f}ms")
+        if all(m in self._marks for m in MILESTONES):
+            self.done()
+
+    def done(self) -> None:
+        """Log the report now, even if some milestones were never reached."""
+        if self._reported:
+            return
+        self._reported = True
+        marks = ", ".join(f"{name} {secs * 1000:.0f}ms" for name, secs in sorted(self._marks.items(), key=lambda m: m[1]))
+        imports = ", ".join(f"{name} {secs * 1000:.0f}ms" for name, secs in self._imports.items())
+        logger.info(f"Startup: {marks or 'no milestones'}; imports: {imports or 'none timed'}")
+
+    def report(self) -> dict:
+        return {
+            "milestones_ms": {name: round(secs * 1000, 1) for name, secs in self._marks.items()},
+            "imports_ms": {name: round(secs * 1000, 1) for name, secs in self._imports.items()},
+        }
+
+    def metrics(self) -> list[str]:
+        return [
+            "# HELP clawdius_startup_seconds Seconds from process start to each startup milestone.",
+            "# TYPE clawdius_startup_seconds gauge",
+            *(f'clawdius_startup_seconds{{milestone="{name}"}} {secs:.3f}' for name, secs in self._marks.items()),
+            "# HELP clawdius_startup_import_seconds Time spent importing each timed module.",
+            "# TYPE clawdius_startup_import_seconds gauge",
+            *(f'clawdius_startup_import_seconds{{module="{name}"}} {secs:.3f}' for name, secs in self._imports.items()),
+        ]
+
+
+# Shared singleton instance
+startup = StartupTimer()
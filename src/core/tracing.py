@@ -0,0 +1,270 @@
+import asyncio
+import json
+import time
+import uuid
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from aiohttp import web
+from loguru import logger
+
+from src.core.config import settings
+
+# Upper bounds (seconds) of the latency histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Span attribute that becomes the second histogram label, per span name.
+LABEL_ATTRS = {"tool": "tool", "llm.round": "round", "browser.navigate": "tool", "http.fetch": "tier", "cpu": "fn"}
+TOKEN_ATTRS = ("input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens")
+FLUSH_INTERVAL = 1.0
+# Trace lines kept while nothing flushes them (e.g. TRACE_FILE set outside the bot).
+MAX_BUFFERED = 10_000
+
+# Id of the Discord request everything in this task descends from.
+current_request: ContextVar[str | None] = ContextVar("current_request", default=None)
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+# Set in tool workers: finished spans are handed back to the bot instead of exported.
+_collected: ContextVar[list[dict] | None] = ContextVar("collected_spans", default=None)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    span_id: str
+    parent_id: str | None
+    request_id: str | None
+    start: float
+    attrs: dict = field(default_factory=dict)
+    status: str = "ok"
+    duration_ms: float = 0.0
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def record(self) -> dict:
+        return {
+            "request_id": self.request_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attrs": self.attrs,
+        }
+
+
+class Histogram:
+    """Cumulative-bucket histogram rendered in the Prometheus text format."""
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS) -> None:
+        self._buckets = buckets
+        self._series: dict[tuple[tuple[str, str], ...], list] = {}
+
+    def observe(self, labels: tuple[tuple[str, str], ...], value: float) -> None:
+        series = self._series.setdefault(labels, [[0] * len(self._buckets), 0.0, 0])
+        index = bisect_left(self._buckets, value)
+        if index < len(self._buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self, name: str) -> list[str]:
+        lines = []
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            running = 0
+            for bound, n in zip(self._buckets, counts):
+                running += n
+                lines.append(f'{name}_bucket{{{base},le="{bound}"}} {running}')
+            lines.append(f'{name}_bucket{{{base},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{base}}} {total:.6f}")
+            lines.append(f"{name}_count{{{base}}} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Tracer:
+    """Spans for requests, LLM rounds, tool calls and navigations.
+
+    Finished spans feed a latency histogram (served at /metrics when
+    METRICS_PORT is set) and, when TRACE_FILE is set, are appended to it as
+    JSON lines. Nesting follows the task's context, so spans started inside a
+    request carry its id.
+    """
+
+    def __init__(self) -> None:
+        self._histogram = Histogram()
+        self._tokens = dict.fromkeys(TOKEN_ATTRS, 0)
+        self._collectors: list[Callable[[], list[str]]] = []
+        self._buffer: list[str] = []
+        self.dropped = 0
+        self._flusher: asyncio.Task | None = None
+        self._runner: web.AppRunner | None = None
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            request_id=current_request.get(),
+            start=time.time(),
+            attrs=attrs,
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            if span.status == "error":
+                span.attrs.setdefault("error", f"{type(e).__name__}: {e}"[:300])
+            raise
+        finally:
+            _current_span.reset(token)
+            span.duration_ms = 1000 * (time.perf_counter() - span._started)
+            self._finish(span)
+
+    @contextmanager
+    def request(self, request_id: str, **attrs) -> Iterator[Span]:
+        """Root span for one user request; everything started inside carries its id."""
+        token = current_request.set(request_id)
+        try:
+            with self.span("request", **attrs) as span:
+                yield span
+        finally:
+            current_request.reset(token)
+
+    def context(self) -> dict:
+        """Ids needed to continue the current trace in another process."""
+        span = _current_span.get()
+        return {"request_id": current_request.get(), "parent_id": span.span_id if span else None}
+
+    @contextmanager
+    def remote(self, request_id: str | None, parent_id: str | None) -> Iterator[list[dict]]:
+        """Continue a trace started in another process.
+
+        Spans finished inside are collected into the yielded list, for the
+        caller to send back and ingest(), rather than exported here.
+        """
+        parent = None
+        if parent_id:
+            parent = Span(name="remote", span_id=parent_id, parent_id=None, request_id=request_id, start=time.time())
+        collected: list[dict] = []
+        tokens = (current_request.set(request_id), _current_span.set(parent), _collected.set(collected))
+        try:
+            yield collected
+        finally:
+            _collected.reset(tokens[2])
+            _current_span.reset(tokens[1])
+            current_request.reset(tokens[0])
+
+    def ingest(self, records: list[dict]) -> None:
+        """Export span records collected by remote()."""
+        for record in records:
+            self._export(record)
+
+    def _finish(self, span: Span) -> None:
+        collected = _collected.get()
+        if collected is not None:
+            collected.append(span.record())
+        else:
+            self._export(span.record())
+
+    def _export(self, record: dict) -> None:
+        attrs = record["attrs"]
+        labels = [("span", record["name"])]
+        label_attr = LABEL_ATTRS.get(record["name"])
+        if label_attr:
+            labels.append((label_attr, str(attrs.get(label_attr, ""))))
+        labels.append(("status", record["status"]))
+        self._histogram.observe(tuple(labels), record["duration_ms"] / 1000)
+        for key in TOKEN_ATTRS:
+            self._tokens[key] += attrs.get(key) or 0
+
+        if settings.TRACE_FILE:
+            self._buffer.append(json.dumps(record, default=str))
+            excess = len(self._buffer) - MAX_BUFFERED
+            if excess > 0:
+                del self._buffer[:excess]
+                self.dropped += excess
+
+    # --- export ---
+
+    def add_collector(self, collect: Callable[[], list[str]]) -> None:
+        """Add metric lines kept elsewhere (gauges, counters) to /metrics."""
+        self._collectors.append(collect)
+
+    def render_metrics(self) -> str:
+        lines = [
+            "# HELP clawdius_span_seconds Duration of traced operations.",
+            "# TYPE clawdius_span_seconds histogram",
+            *self._histogram.render("clawdius_span_seconds"),
+            "# HELP clawdius_llm_tokens_total Tokens reported by the Messages API.",
+            "# TYPE clawdius_llm_tokens_total counter",
+            *(f'clawdius_llm_tokens_total{{type="{key.removesuffix("_tokens")}"}} {n}' for key, n in self._tokens.items()),
+        ]
+        for collect in self._collectors:
+            lines += collect()
+        return "\n".join(lines) + "\n"
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.render_metrics(), content_type="text/plain", charset="utf-8")
+
+    def _write(self, lines: list[str]) -> None:
+        path = Path(settings.TRACE_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        lines, self._buffer = self._buffer, []
+        try:
+            await asyncio.to_thread(self._write, lines)
+        except OSError as e:
+            logger.warning(f"Trace export failed: {e}")
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush()
+
+    async def start(self) -> None:
+        """Start the trace flusher and the metrics endpoint, as configured."""
+        if settings.TRACE_FILE and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+            logger.info(f"Writing traces to {settings.TRACE_FILE}")
+        if settings.METRICS_PORT and self._runner is None:
+            app = web.Application()
+            app.router.add_get("/metrics", self._metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, settings.METRICS_HOST, settings.METRICS_PORT).start()
+            logger.info(f"Metrics at http://{settings.METRICS_HOST}:{settings.METRICS_PORT}/metrics")
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+# Shared singleton instance
+tracer = Tracer()
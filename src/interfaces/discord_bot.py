@@ -1,11 +1,26 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from collections.abc import Awaitable
+from typing import TYPE_CHECKING
+
 import discord
 from loguru import logger
 
 from src.core.config import settings
-from src.core.llm import Brain
+from src.core.executor import loop_monitor, shutdown_executor
+from src.core.startup import startup
+from src.core.tracing import new_request_id, tracer
+from src.interfaces.live_message import DISCORD_MAX_LEN, LiveMessage
+from src.interfaces.scheduler import Job, QueueFull, RequestScheduler
+from src.tools.workers import tool_workers
+
+if TYPE_CHECKING:
+    from src.core.llm import Brain
 
 PREFIX = "!c"
-DISCORD_MAX_LEN = 2000
 
 
 class ClawdiusBot(discord.Client):
@@ -16,10 +31,81 @@ class ClawdiusBot(discord.Client):
         if settings.DISCORD_PROXY:
             kwargs["proxy"] = settings.DISCORD_PROXY
         super().__init__(intents=intents, **kwargs)
-        self.brain = Brain()
+        self._brain: asyncio.Task[Brain] | None = None
+        self._tools_warm: asyncio.Task | None = None
+        self.scheduler = RequestScheduler(
+            workers=settings.SCHEDULER_WORKERS,
+            max_queue=settings.SCHEDULER_MAX_QUEUE,
+            max_per_user=settings.SCHEDULER_MAX_PER_USER,
+        )
+
+    async def setup_hook(self) -> None:
+        self._brain = asyncio.create_task(self._load_brain())
+        self.scheduler.start()
+        loop_monitor.start()
+        tracer.add_collector(startup.metrics)
+        tracer.add_collector(loop_monitor.metrics)
+        tracer.add_collector(self.scheduler.metrics)
+        await tracer.start()
+        await tool_workers.start()
 
     async def on_ready(self) -> None:
         logger.info(f"Clawdius is listening as {self.user}")
+        startup.mark("discord_ready")
+        if self._tools_warm is None:  # on_ready fires again after reconnects
+            self._tools_warm = asyncio.create_task(self._warm_tools())
+
+    async def _load_brain(self) -> Brain:
+        """Import the LLM stack off the event loop, then open the API connection.
+
+        Started before login, so connecting to Discord doesn't wait on anthropic
+        and the tool registry. anthropic is imported on its own first, so the
+        startup report shows its share.
+        """
+        await asyncio.to_thread(startup.import_module, "anthropic")
+        llm = await asyncio.to_thread(startup.import_module, "src.core.llm")
+        brain = llm.Brain()
+        await brain.gateway.warm()
+        startup.mark("llm_ready")
+        return brain
+
+    async def _get_brain(self) -> Brain:
+        failed = self._brain is not None and self._brain.done() and (self._brain.cancelled() or self._brain.exception())
+        if self._brain is None or failed:
+            self._brain = asyncio.create_task(self._load_brain())
+        # Shielded: a cancelled request must not cancel the load for everyone else
+        return await asyncio.shield(self._brain)
+
+    async def _warm_tools(self) -> None:
+        """Launch Chromium and warm its page pool, or wait for the tool workers to do so."""
+        if self._brain is not None:
+            # The LLM stack imports the tools as well; importing from two threads at once would blur the report
+            await asyncio.wait([self._brain])
+        if tool_workers.enabled:
+            await tool_workers.wait_ready()
+        else:
+            browser = await asyncio.to_thread(startup.import_module, "src.tools.browser")
+            try:
+                await browser.browser_manager.start()
+            except Exception as e:
+                # Tools still work: the HTTP tier needs no browser, and Chromium is retried on first use
+                logger.error(f"Browser pre-warm failed: {e}")
+        startup.mark("tools_ready")
+
+    async def close(self) -> None:
+        for task in (self._brain, self._tools_warm):
+            if task is not None:
+                task.cancel()
+        await self.scheduler.stop()
+        await tool_workers.stop()
+        # Only loaded once the LLM stack or the pre-warm has imported it
+        browser = sys.modules.get("src.tools.browser")
+        if browser is not None:
+            await browser.browser_manager.close()
+        loop_monitor.stop()
+        shutdown_executor()
+        await tracer.stop()
+        await super().close()
 
     async def on_message(self, message: discord.Message) -> None:
         if message.author == self.user:
@@ -39,8 +125,45 @@ class ClawdiusBot(discord.Client):
             await message.reply("Usage: `!c <your prompt>`")
             return
 
-        logger.info(f"Request from {message.author}: {prompt[:80]}")
-
+        request_id = new_request_id()
+        submitted_at = time.monotonic()
+        logger.info(f"Request {request_id} from {message.author}: {prompt[:80]}")
+
+        respond = self._respond_streaming if settings.STREAM_RESPONSES else self._respond
+        notice: discord.Message | None = None
+
+        async def on_position(position: int) -> None:
+            nonlocal notice
+            if position == 0:
+                if notice is not None:
+                    await notice.delete()
+                    notice = None
+            elif notice is None:
+                notice = await message.reply(f"_Queued — position {position}_")
+            else:
+                await notice.edit(content=f"_Queued — position {position}_")
+
+        try:
+            await self.scheduler.submit(Job(
+                job_id=message.id,
+                user_id=message.author.id,
+                run=lambda: self._traced(request_id, submitted_at, message, respond(message, prompt)),
+                on_position=on_position,
+            ))
+        except QueueFull as e:
+            await message.reply(f"I'm too busy to take that right now: {e}. Try again shortly.")
+
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent) -> None:
+        self.scheduler.cancel(payload.message_id)
+
+    @staticmethod
+    async def _traced(request_id: str, submitted_at: float, message: discord.Message, work: Awaitable[None]) -> None:
+        """Run a request under its root span, so everything it triggers carries request_id."""
+        queued_ms = round(1000 * (time.monotonic() - submitted_at), 1)
+        with tracer.request(request_id, user=str(message.author.id), queued_ms=queued_ms):
+            await work
+
+    async def _respond(self, message: discord.Message, prompt: str) -> None:
         tool_log = []
 
         async def on_tool_call(name: str, args: dict) -> None:
@@ -48,7 +171,8 @@ class ClawdiusBot(discord.Client):
 
         async with message.channel.typing():
             try:
-                response = await self.brain.think(prompt, on_tool_call=on_tool_call)
+                brain = await self._get_brain()
+                response = await brain.think(prompt, on_tool_call=on_tool_call)
             except Exception as e:
                 logger.error(f"Brain error: {e}")
                 await message.reply(f"Something went wrong: `{e}`")
@@ -60,3 +184,39 @@ class ClawdiusBot(discord.Client):
 
         for i in range(0, len(response), DISCORD_MAX_LEN):
             await message.reply(response[i : i + DISCORD_MAX_LEN])
+
+    async def _respond_streaming(self, message: discord.Message, prompt: str) -> None:
+        live = LiveMessage(message)
+        try:
+            await live.start()
+        except discord.HTTPException as e:
+            logger.warning(f"Could not start a live reply, answering in one message: {e}")
+            await self._respond(message, prompt)
+            return
+        tool_log = []
+        new_paragraph = False
+        try:
+            brain = await self._get_brain()
+            async for event in brain.stream(prompt):
+                if event.kind == "text":
+                    if new_paragraph:
+                        live.append("\n\n")
+                        live.set_status("")
+                        new_paragraph = False
+                    live.append(event.text)
+                elif event.kind == "tool_call":
+                    tool_log.append(event.name)
+                    live.set_status(f"Running `{event.name}`…")
+                    new_paragraph = True
+        except asyncio.CancelledError:
+            await live.finish("_Request cancelled._")
+            raise
+        except Exception as e:
+            logger.error(f"Brain error: {e}")
+            await live.finish(f"Something went wrong: `{e}`")
+            return
+
+        footer = ""
+        if tool_log:
+            footer = "_Tools used: " + ", ".join(f"`{t}`" for t in tool_log) + "_"
+        await live.finish(footer)
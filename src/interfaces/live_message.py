@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import discord
+from loguru import logger
+
+DISCORD_MAX_LEN = 2000
+# Discord allows roughly 5 message edits per 5 seconds per channel.
+EDIT_INTERVAL = 1.2
+PLACEHOLDER = "_Thinking…_"
+
+
+class LiveMessage:
+    """A reply that is edited in place as streamed text arrives.
+
+    Edits are throttled to EDIT_INTERVAL. When the text outgrows DISCORD_MAX_LEN
+    the current message is frozen and the overflow continues in a new one.
+    """
+
+    def __init__(self, origin: discord.Message) -> None:
+        self._origin = origin
+        self._messages: list[discord.Message] = []
+        self._rendered: list[str] = []
+        self._text = ""
+        self._status = ""
+        self._dirty = False
+        self._last_edit = 0.0
+        self._lock = asyncio.Lock()
+        self._ticker: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._messages.append(await self._origin.reply(PLACEHOLDER))
+        self._rendered.append(PLACEHOLDER)
+        self._last_edit = time.monotonic()
+        self._ticker = asyncio.create_task(self._tick())
+
+    def append(self, text: str) -> None:
+        self._text += text
+        self._dirty = True
+
+    def set_status(self, status: str) -> None:
+        """Transient status line shown under the text until the next update."""
+        self._status = status
+        self._dirty = True
+
+    async def finish(self, footer: str = "") -> None:
+        if self._ticker:
+            self._ticker.cancel()
+            # An edit the ticker had in flight must not land after the final one
+            await asyncio.wait([self._ticker])
+        self._status = ""
+        if footer:
+            self._text = f"{self._text}\n\n{footer}" if self._text else footer
+        if not self._text.strip():
+            self._text = "(no response)"
+        await self._render()
+
+    async def _tick(self) -> None:
+        while True:
+            delay = EDIT_INTERVAL - (time.monotonic() - self._last_edit)
+            await asyncio.sleep(max(delay, 0.05))
+            if self._dirty:
+                try:
+                    await self._render()
+                except discord.HTTPException as e:
+                    logger.warning(f"Live edit failed: {e}")
+
+    def _pages(self) -> list[str]:
+        text = self._text.strip() or PLACEHOLDER
+        pages = [text[i : i + DISCORD_MAX_LEN] for i in range(0, len(text), DISCORD_MAX_LEN)]
+        if self._status:
+            status = f"\n\n_{self._status}_"
+            if len(pages[-1]) + len(status) <= DISCORD_MAX_LEN:
+                pages[-1] += status
+        return pages
+
+    async def _render(self) -> None:
+        async with self._lock:
+            self._dirty = False
+            self._last_edit = time.monotonic()
+            for i, page in enumerate(self._pages()):
+                if i < len(self._messages):
+                    if self._rendered[i] != page:
+                        await self._messages[i].edit(content=page)
+                        self._rendered[i] = page
+                else:
+                    self._messages.append(await self._origin.channel.send(page))
+                    self._rendered.append(page)
@@ -0,0 +1,224 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+
+class QueueFull(Exception):
+    """Raised by submit() when a request can't be queued."""
+
+
+@dataclass(slots=True, eq=False)
+class Job:
+    job_id: int
+    user_id: int
+    run: Callable[[], Awaitable[None]]
+    # Called with the job's queue position on every change, and with 0 once it
+    # leaves the queue (started, about to start, or cancelled).
+    on_position: Callable[[int], Awaitable[None]] | None = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    position: int = -1
+    task: asyncio.Task | None = None
+
+
+@dataclass(slots=True)
+class SchedulerStats:
+    submitted: int = 0
+    started: int = 0
+    rejected: int = 0
+    cancelled: int = 0
+    completed: int = 0
+    failed: int = 0
+    total_wait_s: float = 0.0
+    max_wait_s: float = 0.0
+
+
+class RequestScheduler:
+    """Bounded worker pool between the Discord handler and the Brain.
+
+    Each user has their own FIFO; workers take from users in round-robin order,
+    so one user's backlog can't starve everyone else. Submissions beyond
+    `max_queue` overall or `max_per_user` per user are rejected immediately.
+    """
+
+    def __init__(self, *, workers: int, max_queue: int, max_per_user: int) -> None:
+        self._worker_count = max(1, workers)
+        self._max_queue = max_queue
+        self._max_per_user = max_per_user
+        self._queues: OrderedDict[int, deque[Job]] = OrderedDict()
+        self._running: dict[int, Job] = {}
+        self._jobs: dict[int, Job] = {}
+        self._ready = asyncio.Condition()
+        self._workers: list[asyncio.Task] = []
+        self._stats = SchedulerStats()
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self._worker_count)]
+        logger.info(f"Scheduler started with {self._worker_count} workers")
+
+    async def stop(self) -> None:
+        for job in list(self._running.values()):
+            if job.task:
+                job.task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    async def submit(self, job: Job) -> int:
+        """Queue a job; returns its position (1 = next up). Raises QueueFull."""
+        async with self._ready:
+            user_queue = self._queues.get(job.user_id)
+            if self.queued >= self._max_queue:
+                self._stats.rejected += 1
+                raise QueueFull(f"queue is full ({self._max_queue} waiting)")
+            if user_queue is not None and len(user_queue) >= self._max_per_user:
+                self._stats.rejected += 1
+                raise QueueFull(f"you already have {len(user_queue)} requests waiting")
+            self._queues.setdefault(job.user_id, deque()).append(job)
+            self._jobs[job.job_id] = job
+            self._stats.submitted += 1
+            self._ready.notify()
+        await self._publish_positions()
+        return max(job.position, 0)
+
+    def cancel(self, job_id: int) -> bool:
+        """Drop a queued job or cancel a running one. False if the id is unknown."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        if job.task is not None:
+            job.task.cancel()
+        else:
+            user_queue = self._queues.get(job.user_id)
+            if user_queue is not None and job in user_queue:
+                user_queue.remove(job)
+                if not user_queue:
+                    del self._queues[job.user_id]
+            self._jobs.pop(job_id, None)
+            asyncio.create_task(self._notify(job, 0))
+            asyncio.create_task(self._publish_positions())
+        self._stats.cancelled += 1
+        logger.info(f"Cancelled request {job_id}")
+        return True
+
+    def _dispatch_order(self) -> list[Job]:
+        """Queued jobs in the order round-robin will start them."""
+        order = []
+        queues = [list(q) for q in self._queues.values()]
+        for depth in range(max((len(q) for q in queues), default=0)):
+            order.extend(q[depth] for q in queues if len(q) > depth)
+        return order
+
+    async def _publish_positions(self) -> None:
+        # Jobs that an idle worker is about to pick up aren't announced as queued.
+        free = self._worker_count - len(self._running)
+        for position, job in enumerate(self._dispatch_order(), start=1):
+            if position <= free:
+                if job.position > 0:
+                    # It was announced as waiting; take the notice down
+                    job.position = 0
+                    await self._notify(job, 0)
+                continue
+            if job.position != position:
+                job.position = position
+                await self._notify(job, position)
+
+    async def _notify(self, job: Job, position: int) -> None:
+        if job.on_position is None:
+            return
+        try:
+            await job.on_position(position)
+        except Exception as e:
+            logger.warning(f"Queue position update failed for {job.job_id}: {e}")
+
+    def _next_job(self) -> Job:
+        user_id, user_queue = self._queues.popitem(last=False)
+        job = user_queue.popleft()
+        if user_queue:
+            self._queues[user_id] = user_queue  # back of the rotation
+        return job
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            async with self._ready:
+                await self._ready.wait_for(lambda: bool(self._queues))
+                job = self._next_job()
+
+            waited = time.monotonic() - job.enqueued_at
+            self._stats.started += 1
+            self._stats.total_wait_s += waited
+            self._stats.max_wait_s = max(self._stats.max_wait_s, waited)
+            self._running[job.job_id] = job
+            await self._notify(job, 0)
+            await self._publish_positions()
+            if job.job_id not in self._jobs:
+                # Cancelled while it was being handed to this worker
+                self._running.pop(job.job_id, None)
+                continue
+
+            job.task = asyncio.create_task(job.run())
+            try:
+                await asyncio.wait([job.task])
+                if not job.task.cancelled():
+                    if job.task.exception() is not None:
+                        self._stats.failed += 1
+                        logger.error(f"Request {job.job_id} failed: {job.task.exception()}")
+                    else:
+                        self._stats.completed += 1
+            finally:
+                self._running.pop(job.job_id, None)
+                self._jobs.pop(job.job_id, None)
+
+    def stats(self) -> dict:
+        s = self._stats
+        return {
+            "workers": self._worker_count,
+            "running": len(self._running),
+            "queued": self.queued,
+            "queued_by_user": {user: len(q) for user, q in self._queues.items()},
+            "submitted": s.submitted,
+            "started": s.started,
+            "rejected": s.rejected,
+            "cancelled": s.cancelled,
+            "completed": s.completed,
+            "failed": s.failed,
+            "avg_wait_ms": round(1000 * s.total_wait_s / s.started, 1) if s.started else 0.0,
+            "max_wait_ms": round(1000 * s.max_wait_s, 1),
+        }
+
+    def metrics(self) -> list[str]:
+        s = self._stats
+        now = time.monotonic()
+        return [
+            "# HELP clawdius_scheduler_running Requests being handled right now.",
+            "# TYPE clawdius_scheduler_running gauge",
+            f"clawdius_scheduler_running {len(self._running)}",
+            "# HELP clawdius_scheduler_queued Requests waiting for a worker, per user.",
+            "# TYPE clawdius_scheduler_queued gauge",
+            *(f'clawdius_scheduler_queued{{user="{user}"}} {len(q)}' for user, q in self._queues.items()),
+            "# HELP clawdius_scheduler_oldest_wait_seconds How long each user's oldest queued request has waited.",
+            "# TYPE clawdius_scheduler_oldest_wait_seconds gauge",
+            *(f'clawdius_scheduler_oldest_wait_seconds{{user="{user}"}} {now - q[0].enqueued_at:.3f}' for user, q in self._queues.items()),
+            "# HELP clawdius_scheduler_wait_seconds_total Queue wait summed over started requests.",
+            "# TYPE clawdius_scheduler_wait_seconds_total counter",
+            f"clawdius_scheduler_wait_seconds_total {s.total_wait_s:.3f}",
+            "# HELP clawdius_scheduler_wait_max_seconds Longest queue wait of any started request.",
+            "# TYPE clawdius_scheduler_wait_max_seconds gauge",
+            f"clawdius_scheduler_wait_max_seconds {s.max_wait_s:.3f}",
+            "# HELP clawdius_scheduler_requests_total Requests by outcome.",
+            "# TYPE clawdius_scheduler_requests_total counter",
+            *(
+                f'clawdius_scheduler_requests_total{{outcome="{outcome}"}} {getattr(s, outcome)}'
+                for outcome in ("submitted", "started", "rejected", "cancelled", "completed", "failed")
+            ),
+        ]
@@ -1,9 +1,19 @@
 from __future__ import annotations
 
+import asyncio
+import inspect
 import os
+import signal
 import subprocess
+import tempfile
 from dataclasses import dataclass
-from typing import Mapping, Sequence
+from typing import Awaitable, Callable, Mapping, Sequence
+
+# Node >= 22.1 caches compiled CLI code here, which takes most of the parse and
+# compile work out of each cold start. Older Node versions ignore the variable.
+DEFAULT_COMPILE_CACHE = os.path.join(tempfile.gettempdir(), "openclaw-node-compile-cache")
+# asyncio's default 64 KiB line limit is too small for agent output.
+STREAM_LIMIT = 1024 * 1024
 
 
 @dataclass(frozen=True, slots=True)
@@ -13,15 +23,8 @@ class OpenClawResult:
     returncode: int
 
 
-class OpenClawCLI:
-    """Thin wrapper around the `openclaw` Node.js CLI.
-
-    Args:
-        executable: CLI binary name/path (default: "openclaw").
-        cwd: Working directory for subprocess calls (default: current process cwd).
-        env: Extra environment variables merged over current process env.
-        timeout_s: Subprocess timeout in seconds.
-    """
+class _OpenClawBase:
+    """Argument building and environment shared by the sync and async wrappers."""
 
     def __init__(
         self,
@@ -36,33 +39,52 @@ class OpenClawCLI:
         self._env = dict(env) if env is not None else {}
         self._timeout_s = timeout_s
 
+    def _send_argv(self, to: str, text: str) -> list[str]:
+        return [
+            self._executable,
+            "message",
+            "send",
+            "--to",
+            to,
+            "--message",
+            text,
+        ]
+
+    def _agent_argv(self, task: str) -> list[str]:
+        return [self._executable, "agent", "--message", task]
+
+    def _merged_env(self) -> dict[str, str]:
+        merged_env = os.environ.copy()
+        merged_env.update(self._env)
+        return merged_env
+
+
+class OpenClawCLI(_OpenClawBase):
+    """Thin wrapper around the `openclaw` Node.js CLI.
+
+    Args:
+        executable: CLI binary name/path (default: "openclaw").
+        cwd: Working directory for subprocess calls (default: current process cwd).
+        env: Extra environment variables merged over current process env.
+        timeout_s: Subprocess timeout in seconds.
+    """
+
     def send_message(self, to: str, text: str) -> OpenClawResult:
         """Send a message via OpenClaw.
 
         Executes: `openclaw message send --to <to> --message <text>`
         """
-        return self._run(
-            [
-                self._executable,
-                "message",
-                "send",
-                "--to",
-                to,
-                "--message",
-                text,
-            ]
-        )
+        return self._run(self._send_argv(to, text))
 
     def run_agent(self, task: str) -> OpenClawResult:
         """Run the OpenClaw agent with a single task prompt.
 
         Executes: `openclaw agent --message <task>`
         """
-        return self._run([self._executable, "agent", "--message", task])
+        return self._run(self._agent_argv(task))
 
     def _run(self, argv: Sequence[str]) -> OpenClawResult:
-        merged_env = os.environ.copy()
-        merged_env.update(self._env)
+        merged_env = self._merged_env()
 
         proc = subprocess.run(
             list(argv),
@@ -79,9 +101,143 @@ class OpenClawCLI:
             stderr=proc.stderr or "",
             returncode=proc.returncode,
         )
-        if proc.returncode != 0:
-            raise RuntimeError(
-                f"openclaw command failed (exit={proc.returncode}): {' '.join(argv)}\n"
-                f"stderr:\n{result.stderr}"
+        _check(argv, result)
+        return result
+
+
+def _check(argv: Sequence[str], result: OpenClawResult) -> None:
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"openclaw command failed (exit={result.returncode}): {' '.join(argv)}\n"
+            f"stderr:\n{result.stderr}"
+        )
+
+
+class AsyncOpenClawCLI(_OpenClawBase):
+    """asyncio counterpart of OpenClawCLI, safe to call from the bot's event loop.
+
+    At most `max_concurrency` CLI processes run at once; further calls wait.
+    Each process gets its own process group, so a timeout or cancellation
+    kills the CLI together with anything it spawned.
+
+    Args:
+        executable: CLI binary name/path (default: "openclaw").
+        cwd: Working directory for subprocess calls (default: current process cwd).
+        env: Extra environment variables merged over current process env.
+        timeout_s: Subprocess timeout in seconds.
+        max_concurrency: Maximum number of CLI processes running at once.
+        compile_cache: NODE_COMPILE_CACHE directory used to speed up Node cold
+            starts (None to leave it unset). An existing NODE_COMPILE_CACHE wins.
+    """
+
+    def __init__(
+        self,
+        *,
+        executable: str = "openclaw",
+        cwd: str | None = None,
+        env: Mapping[str, str] | None = None,
+        timeout_s: float = 120.0,
+        max_concurrency: int = 2,
+        compile_cache: str | None = DEFAULT_COMPILE_CACHE,
+    ) -> None:
+        super().__init__(executable=executable, cwd=cwd, env=env, timeout_s=timeout_s)
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._compile_cache = compile_cache
+
+    async def send_message(self, to: str, text: str) -> OpenClawResult:
+        """Send a message via OpenClaw.
+
+        Executes: `openclaw message send --to <to> --message <text>`
+        """
+        return await self._run(self._send_argv(to, text))
+
+    async def run_agent(
+        self,
+        task: str,
+        on_output: Callable[[str], Awaitable[None] | None] | None = None,
+    ) -> OpenClawResult:
+        """Run the OpenClaw agent with a single task prompt.
+
+        Executes: `openclaw agent --message <task>`
+
+        Args:
+            on_output: Optional callback (sync or async) invoked with each stdout
+                line as the agent produces it.
+        """
+        return await self._run(self._agent_argv(task), on_output)
+
+    def _merged_env(self) -> dict[str, str]:
+        merged_env = super()._merged_env()
+        if self._compile_cache and "NODE_COMPILE_CACHE" not in merged_env:
+            os.makedirs(self._compile_cache, exist_ok=True)
+            merged_env["NODE_COMPILE_CACHE"] = self._compile_cache
+        return merged_env
+
+    async def _run(
+        self,
+        argv: Sequence[str],
+        on_output: Callable[[str], Awaitable[None] | None] | None = None,
+    ) -> OpenClawResult:
+        async with self._semaphore:
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
+                cwd=self._cwd,
+                env=self._merged_env(),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+                limit=STREAM_LIMIT,
             )
+            stdout_lines: list[str] = []
+
+            async def read_line() -> bytes:
+                """One stdout line; past STREAM_LIMIT it is read in chunks instead of failing."""
+                parts = []
+                while True:
+                    try:
+                        parts.append(await proc.stdout.readuntil(b"\n"))
+                    except asyncio.IncompleteReadError as e:
+                        parts.append(e.partial)  # last line without a newline, or EOF
+                    except asyncio.LimitOverrunError as e:
+                        parts.append(await proc.stdout.read(e.consumed))
+                        continue
+                    return b"".join(parts)
+
+            async def read_stdout() -> None:
+                while line := await read_line():
+                    text = line.decode(errors="replace")
+                    stdout_lines.append(text)
+                    if on_output is not None:
+                        pending = on_output(text.rstrip("\n"))
+                        if inspect.isawaitable(pending):
+                            await pending
+
+            try:
+                _, stderr = await asyncio.wait_for(
+                    asyncio.gather(read_stdout(), proc.stderr.read()),
+                    timeout=self._timeout_s,
+                )
+                await proc.wait()
+            except asyncio.TimeoutError:
+                await _kill_group(proc)
+                raise subprocess.TimeoutExpired(list(argv), self._timeout_s, output="".join(stdout_lines))
+            except BaseException:
+                await _kill_group(proc)
+                raise
+
+        result = OpenClawResult(
+            stdout="".join(stdout_lines),
+            stderr=stderr.decode(errors="replace"),
+            returncode=proc.returncode,
+        )
+        _check(argv, result)
         return result
+
+
+async def _kill_group(proc: asyncio.subprocess.Process) -> None:
+    # Even if the CLI has exited: its children may still be running and holding stdout.
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    await proc.wait()
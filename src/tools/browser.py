@@ -1,13 +1,35 @@
+from __future__ import annotations
+
+import asyncio
 import base64
+import time
+from collections.abc import AsyncIterator, Awaitable
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-import html2text
-from anthropic import AsyncAnthropic
 from loguru import logger
-from playwright.async_api import Browser, Playwright, async_playwright
 
 from src.core.config import settings
+from src.core.executor import run_cpu
+from src.core.gateway import llm_gateway
+from src.core.tracing import tracer
+from src.tools import http_client, http_fetch, search_backends
+from src.tools.browser_governor import BrowserGovernor
+from src.tools.extract import extract_main_content, split_pages
+from src.tools.page_cache import CacheEntry, PageCache, normalize_url
+from src.tools.page_pool import PagePool
+from src.tools.prefetch import Prefetcher
+from src.tools.resource_filter import POLICIES, BlockPolicy, LoadStats, RequestFilter
+from src.tools.screenshot import VisualCache, capture_type, capture_viewport, prepare_screenshot
+from src.tools.search_backends import StrategyStats
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page, Playwright, Response
 
 PAGE_TIMEOUT = 30_000  # 30s
+# How long a retired browser gets to finish its in-flight pages before it is closed anyway.
+DRAIN_TIMEOUT = 120.0
 
 
 class BrowserManager:
@@ -16,20 +38,168 @@ class BrowserManager:
     def __init__(self) -> None:
         self._playwright: Playwright | None = None
         self._browser: Browser | None = None
+        self._pool: PagePool | None = None
+        self._launch_lock = asyncio.Lock()
+        self._load_stats: dict[str, LoadStats] = {}
+        self._cache = PageCache(
+            max_entries=settings.PAGE_CACHE_ENTRIES,
+            ttl_s=settings.PAGE_CACHE_TTL,
+            disk_dir=Path(settings.WORKSPACE_DIR) / ".cache" / "pages" if settings.PAGE_CACHE_DISK else None,
+        )
+        self._tiers = http_fetch.DomainTiers()
+        self._prefetch = Prefetcher(
+            self._cache,
+            self._prefetch_page,
+            top_k=settings.PREFETCH_TOP_K,
+            concurrency=settings.PREFETCH_CONCURRENCY,
+            byte_budget=settings.PREFETCH_BUDGET_BYTES,
+        )
+        self._search_stats: dict[str, StrategyStats] = {}
+        self._visual = VisualCache(max_entries=settings.VISUAL_CACHE_ENTRIES, ttl_s=settings.PAGE_CACHE_TTL)
+        self._governor = BrowserGovernor(settings.BROWSER_RECYCLE_PAGES, settings.BROWSER_RECYCLE_RSS_MB)
+        self._recycler: asyncio.Task | None = None
+
+    async def _launch(self) -> Browser:
+        # Imported on first launch; most processes that load this module never start Chromium
+        from playwright.async_api import async_playwright
 
-    async def _ensure_browser(self) -> Browser:
-        if self._browser and self._browser.is_connected():
-            return self._browser
         if self._playwright is None:
             self._playwright = await async_playwright().start()
-        self._browser = await self._playwright.chromium.launch(
+        browser = await self._playwright.chromium.launch(
             headless=True,
             args=["--no-sandbox", "--disable-dev-shm-usage"],
         )
         logger.info("[browser] Launched headless Chromium")
+        return browser
+
+    async def _ensure_browser(self) -> Browser:
+        if self._browser and self._browser.is_connected():
+            return self._browser
+        self._browser = await self._launch()
         return self._browser
 
+    async def _ensure_pool(self) -> PagePool:
+        async with self._launch_lock:
+            if self._pool and self._browser and self._browser.is_connected():
+                return self._pool
+            browser = await self._ensure_browser()
+            self._pool = PagePool(browser, settings.BROWSER_POOL_SIZE)
+            return self._pool
+
+    async def start(self) -> None:
+        """Launch Chromium and pre-warm the page pool (called when the bot starts)."""
+        pool = await self._ensure_pool()
+        await pool.warm()
+
+    @asynccontextmanager
+    async def _page(self, tool: str, viewport: dict | None = None) -> AsyncIterator[Page]:
+        """Borrow a pooled page with the tool's request-blocking policy applied."""
+        pool = await self._ensure_pool()
+        async with pool.page(viewport) as page:
+            request_filter = RequestFilter(POLICIES.get(tool, BlockPolicy()))
+            await request_filter.attach(page)
+            try:
+                yield page
+            finally:
+                await request_filter.detach()
+                load = request_filter.stats
+                if load.requests_blocked:
+                    logger.debug(
+                        f"[browser] {tool}: blocked {load.requests_blocked}/"
+                        f"{load.requests_blocked + load.requests_allowed} requests "
+                        f"(~{load.est_bytes_saved // 1024} KiB saved)"
+                    )
+                self._load_stats.setdefault(tool, LoadStats()).add(load)
+                self._governor.page_served()
+                if self._recycler is None or self._recycler.done():
+                    self._recycler = asyncio.create_task(self._recycle_if_due())
+
+    async def _recycle_if_due(self) -> None:
+        reason = await self._governor.due()
+        if reason:
+            await self._recycle(reason)
+
+    async def _recycle(self, reason: str) -> None:
+        """Swap in a fresh Chromium, then retire the old one once its pages are back.
+
+        New pages come from the new browser as soon as it is warm; calls already
+        holding a page on the old one finish there, so nothing in flight fails.
+        """
+        old_browser, old_pool = self._browser, self._pool
+        if old_browser is None or old_pool is None:
+            return
+        stats = self._governor.stats()
+        logger.info(
+            f"[browser] Recycling Chromium ({reason}): {stats['pages']} pages, "
+            f"{stats['rss_bytes'] // 2**20} MiB RSS"
+        )
+        browser = None
+        try:
+            browser = await self._launch()
+            pool = PagePool(browser, settings.BROWSER_POOL_SIZE)
+            await pool.warm()
+        except Exception as e:
+            logger.error(f"[browser] Recycle failed, keeping the current browser: {e}")
+            self._governor.recycle_failed()
+            if browser is not None:
+                await browser.close()
+            return
+        async with self._launch_lock:
+            self._browser, self._pool = browser, pool
+        self._governor.recycled(reason)
+
+        try:
+            if not await old_pool.drain(DRAIN_TIMEOUT):
+                logger.warning(f"[browser] Retired browser still had pages in use after {DRAIN_TIMEOUT:.0f}s; closing it")
+        finally:
+            await old_pool.close()
+            try:
+                await old_browser.close()
+            except Exception as e:
+                logger.debug(f"[browser] Closing retired browser failed: {e}")
+
+    def pool_stats(self) -> dict:
+        return self._pool.stats() if self._pool else {}
+
+    def load_stats(self) -> dict[str, LoadStats]:
+        """Cumulative per-tool request-blocking savings."""
+        return dict(self._load_stats)
+
+    def cache_stats(self) -> dict:
+        return self._cache.stats()
+
+    def tier_stats(self) -> dict:
+        """How many reads the HTTP tier served versus the browser."""
+        return self._tiers.stats()
+
+    def search_stats(self) -> dict[str, dict]:
+        """Per-strategy (html, browser) search outcomes and latency."""
+        return {name: stats.as_dict() for name, stats in self._search_stats.items()}
+
+    def prefetch_stats(self) -> dict:
+        return self._prefetch.stats()
+
+    def end_conversation(self, conversation_id: str) -> None:
+        """Cancel prefetches started on behalf of a finished conversation."""
+        self._prefetch.cancel(conversation_id)
+
+    def visual_stats(self) -> dict:
+        """Screenshot sizes and how many vision calls the analysis cache saved."""
+        return self._visual.stats()
+
+    def governor_stats(self) -> dict:
+        """Chromium memory readings and recycles; empty until a browser has been launched."""
+        return self._governor.stats() if self._playwright else {}
+
     async def close(self) -> None:
+        self._prefetch.cancel_all()
+        if self._recycler is not None:
+            self._recycler.cancel()
+            self._recycler = None
+        await http_client.close_session()
+        if self._pool:
+            await self._pool.close()
+            self._pool = None
         if self._browser:
             await self._browser.close()
             self._browser = None
@@ -38,146 +208,222 @@ class BrowserManager:
             self._playwright = None
 
     async def web_search(self, query: str) -> str:
-        """Navigate to DuckDuckGo, search, and scrape top results."""
+        """Search DuckDuckGo and return the top results.
+
+        With SEARCH_NO_JS the plain HTML endpoint is tried first; the browser
+        is the fallback and the default.
+        """
         logger.info(f"[tool] web_search: {query}")
-        try:
-            browser = await self._ensure_browser()
-            page = await browser.new_page()
+        results = None
+        if settings.SEARCH_NO_JS:
+            results = await self._timed_search("html", self._search_html(query))
+        if not results:
             try:
-                await page.goto(
-                    "https://duckduckgo.com/",
-                    timeout=PAGE_TIMEOUT,
-                    wait_until="domcontentloaded",
-                )
-
-                # Type query and search
-                search_box = page.locator('input[name="q"]')
-                await search_box.fill(query)
-                await search_box.press("Enter")
-
-                # Wait for results to appear
-                await page.wait_for_selector(
-                    "[data-result], .result, article[data-testid='result']",
-                    timeout=PAGE_TIMEOUT,
-                )
-                # Give results a moment to fully render
-                await page.wait_for_timeout(2000)
-
-                # Scrape results from the DOM
-                results = await page.evaluate("""() => {
-                    const items = [];
-                    // Try multiple selectors for DuckDuckGo result elements
-                    const selectors = [
-                        'article[data-testid="result"]',
-                        'div.result',
-                        'div[data-result]',
-                        'li[data-layout="organic"]',
-                    ];
-                    let elements = [];
-                    for (const sel of selectors) {
-                        elements = document.querySelectorAll(sel);
-                        if (elements.length > 0) break;
-                    }
-                    for (const el of Array.from(elements).slice(0, 5)) {
-                        const a = el.querySelector('a[href]');
-                        const title = (
-                            el.querySelector('h2') ||
-                            el.querySelector('a[data-testid="result-title-a"]') ||
-                            el.querySelector('.result__a') ||
-                            a
-                        );
-                        const snippet = (
-                            el.querySelector('[data-result="snippet"]') ||
-                            el.querySelector('span[data-testid="result-snippet"]') ||
-                            el.querySelector('.result__snippet') ||
-                            el.querySelector('p')
-                        );
-                        if (a) {
-                            items.push({
-                                title: title ? title.innerText.trim() : '',
-                                href: a.href || '',
-                                snippet: snippet ? snippet.innerText.trim() : '',
-                            });
-                        }
-                    }
-                    return items;
-                }""")
-
-                if not results:
-                    return "No search results found."
-
-                lines = []
-                for r in results:
-                    title = r.get("title", "")
-                    snippet = r.get("snippet", "")
-                    href = r.get("href", "")
-                    lines.append(f"**{title}**\n{snippet}\n{href}")
-                return "\n\n".join(lines)
+                results = await self._timed_search("browser", self._search_browser(query))
+            except Exception as e:
+                logger.error(f"[tool] web_search failed: {e}")
+                return f"Search failed: {e}"
 
-            finally:
-                await page.close()
+        if not results:
+            return "No search results found."
 
-        except Exception as e:
-            logger.error(f"[tool] web_search failed: {e}")
-            return f"Search failed: {e}"
+        # The model usually reads one of these next; start loading them now
+        self._prefetch.schedule([r.get("href", "") for r in results])
+
+        lines = []
+        for r in results:
+            title = r.get("title", "")
+            snippet = r.get("snippet", "")
+            href = r.get("href", "")
+            lines.append(f"**{title}**\n{snippet}\n{href}")
+        return "\n\n".join(lines)
 
-    async def read_webpage(self, url: str) -> str:
-        """Load a URL and return its content as Markdown."""
-        logger.info(f"[tool] read_webpage: {url}")
+    async def _timed_search(self, strategy: str, search: Awaitable[list[dict]]) -> list[dict]:
+        """Await one search strategy, recording its latency and outcome.
+
+        Browser failures propagate to the caller; the HTML strategy just falls through.
+        """
+        started = time.monotonic()
+        stats = self._search_stats.setdefault(strategy, StrategyStats())
         try:
-            browser = await self._ensure_browser()
-            page = await browser.new_page()
-            try:
-                await page.goto(
-                    url,
-                    timeout=PAGE_TIMEOUT,
-                    wait_until="domcontentloaded",
-                )
-                html = await page.content()
-            finally:
-                await page.close()
+            results = await search
+        except Exception as e:
+            stats.record(time.monotonic() - started, "failed")
+            if strategy == "browser":
+                raise
+            logger.debug(f"[browser] {strategy} search failed: {e}")
+            return []
+        stats.record(time.monotonic() - started, "served" if results else "empty")
+        return results
 
-            converter = html2text.HTML2Text()
-            converter.ignore_links = False
-            converter.ignore_images = True
-            converter.body_width = 0
-            markdown = converter.handle(html)
+    async def _goto(self, page: Page, url: str, tool: str) -> Response | None:
+        """Navigate with the shared timeout, traced as a browser.navigate span."""
+        with tracer.span("browser.navigate", tool=tool, url=url) as span:
+            response = await page.goto(url, timeout=PAGE_TIMEOUT, wait_until="domcontentloaded")
+            if response is not None:
+                span.set(status_code=response.status)
+            return response
 
-            # Trim to ~4000 tokens (roughly 16000 chars)
-            if len(markdown) > 16_000:
-                markdown = markdown[:16_000] + "\n\n...(truncated)"
+    async def _search_html(self, query: str) -> list[dict]:
+        with tracer.span("http.fetch", tier="search"):
+            html = await search_backends.fetch_html_results(query)
+        return await run_cpu(search_backends.parse_html_results, html)
 
-            return markdown
+    async def _search_browser(self, query: str) -> list[dict]:
+        async with self._page("web_search") as page:
+            await self._goto(page, "https://duckduckgo.com/", "web_search")
 
+            # Type query and search
+            search_box = page.locator('input[name="q"]')
+            await search_box.fill(query)
+            await search_box.press("Enter")
+
+            # Wait for the first result, then only until the result list stops growing
+            selectors = search_backends.RESULT_SELECTORS
+            await page.wait_for_selector(", ".join(selectors), timeout=PAGE_TIMEOUT)
+            await page.evaluate(
+                search_backends.SETTLE_JS,
+                [selectors, search_backends.SETTLE_DEBOUNCE_MS, search_backends.SETTLE_CAP_MS],
+            )
+            return await page.evaluate(search_backends.SCRAPE_JS, [selectors, search_backends.MAX_RESULTS])
+
+    async def read_webpage(self, url: str, page: int = 1) -> str:
+        """Load a URL and return one page of its main content as Markdown."""
+        logger.info(f"[tool] read_webpage: {url} (page {page})")
+        try:
+            if await self._prefetch.claim(url):
+                logger.debug(f"[browser] read_webpage: {url} was prefetched")
+            markdown = await self._cache.get_or_fetch(
+                url,
+                lambda: self._fetch_markdown(url),
+                revalidate=self._revalidate,
+            )
         except Exception as e:
             logger.error(f"[tool] read_webpage failed: {e}")
             return f"Failed to load page: {e}"
 
-    async def analyze_page_visual(self, url: str, query: str) -> str:
+        # Later pages come out of the cached extraction, so reading on costs no fetch
+        pages = split_pages(markdown, settings.READ_PAGE_CHARS)
+        if len(pages) == 1 and page == 1:
+            return pages[0]
+        if not 1 <= page <= len(pages):
+            return f"{url} has {len(pages)} page(s) of content; page {page} does not exist."
+        footer = f"\n\n[page {page} of {len(pages)}"
+        footer += f"; call read_webpage with page={page + 1} to continue]" if page < len(pages) else "; end of document]"
+        return pages[page - 1] + footer
+
+    async def _fetch_http(self, url: str, max_bytes: int = http_fetch.MAX_HTML_BYTES) -> tuple[CacheEntry, int] | None:
+        """HTTP tier: the page as a cache entry (plus bytes downloaded), or None if it needs a browser."""
+        fetched = await self._http_page(url, max_bytes)
+        entry = await self._http_entry(url, fetched) if fetched else None
+        return (entry, len(fetched.html)) if entry else None
+
+    async def _http_page(self, url: str, max_bytes: int = http_fetch.MAX_HTML_BYTES) -> http_fetch.HttpPage | None:
+        with tracer.span("http.fetch", tier="http", url=url) as span:
+            fetched = await http_fetch.fetch_html(url, max_bytes)
+            span.set(bytes=len(fetched.html) if fetched else 0)
+        return fetched
+
+    async def _http_entry(self, url: str, fetched: http_fetch.HttpPage) -> CacheEntry | None:
+        """The fetched HTML as a cache entry, or None if it's too thin to read without JavaScript."""
+        if not await run_cpu(http_fetch.has_enough_text, fetched.html):
+            return None
+        return CacheEntry(
+            url=url,
+            value=await run_cpu(_to_markdown, fetched.html),
+            fetched_at=time.time(),
+            etag=fetched.etag,
+            last_modified=fetched.last_modified,
+        )
+
+    async def _prefetch_page(self, url: str, max_bytes: int) -> tuple[CacheEntry, int] | None:
+        """Prefetches stay on the HTTP tier so they never hold a browser page."""
+        if not settings.HTTP_FAST_PATH or not self._tiers.prefer_http(url):
+            return None
+        return await self._fetch_http(url, max_bytes)
+
+    async def _fetch_markdown(self, url: str) -> CacheEntry:
+        """Tiered fetch: plain HTTP first, Chromium for JS-rendered pages."""
+        tried_http = settings.HTTP_FAST_PATH and self._tiers.prefer_http(url)
+        thin_html = False
+        if tried_http:
+            try:
+                fetched = await self._http_page(url)
+                entry = await self._http_entry(url, fetched) if fetched else None
+            except Exception as e:
+                logger.debug(f"[browser] HTTP tier failed for {url}: {e}")
+                fetched = entry = None
+            if entry:
+                self._tiers.record(url, "http")
+                return entry
+            # Only a 200 HTML page without its content says the site renders client-side;
+            # errors, non-HTML and oversized responses say nothing about the domain.
+            thin_html = fetched is not None
+
+        async with self._page("read_webpage") as page:
+            response = await self._goto(page, url, "read_webpage")
+            html = await page.content()
+        headers = response.headers if response else {}
+        rendered = thin_html and response is not None and response.ok
+        self._tiers.record(url, "browser", fallback=tried_http, js_rendered=rendered)
+
+        return CacheEntry(
+            url=url,
+            value=await run_cpu(_to_markdown, html),
+            fetched_at=time.time(),
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+        )
+
+    async def _revalidate(self, entry: CacheEntry) -> CacheEntry | None:
+        """Conditional GET: entry if the server says it's current, the new page if it sent one."""
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        session = http_client.get_session()
+        async with session.get(entry.url, headers=headers, proxy=http_client.proxy()) as resp:
+            if resp.status == 304:
+                return entry
+            fetched = await http_fetch.read_html(resp)
+        # A changed page too thin to read over HTTP goes back through the tiers
+        return await self._http_entry(entry.url, fetched) if fetched else None
+
+    async def analyze_page_visual(self, url: str, query: str, selector: str | None = None) -> str:
         """Take a screenshot and send it to the LLM for visual analysis."""
         logger.info(f"[tool] analyze_page_visual: {url} | query: {query[:80]}")
         try:
-            browser = await self._ensure_browser()
-            page = await browser.new_page(
-                viewport={"width": 1280, "height": 900},
+            raw_type = capture_type(settings.SCREENSHOT_FORMAT)
+            options = {"type": raw_type}
+            if raw_type == "jpeg":
+                options["quality"] = settings.SCREENSHOT_QUALITY
+            viewport = capture_viewport(1280, 900, settings.SCREENSHOT_MAX_WIDTH)
+            async with self._page("analyze_page_visual", viewport=viewport) as page:
+                await self._goto(page, url, "analyze_page_visual")
+                if selector:
+                    screenshot = await page.locator(selector).first.screenshot(timeout=PAGE_TIMEOUT, **options)
+                else:
+                    screenshot = await page.screenshot(full_page=False, **options)
+
+            image = await run_cpu(
+                prepare_screenshot,
+                screenshot,
+                raw_type,
+                settings.SCREENSHOT_MAX_WIDTH,
+                settings.SCREENSHOT_FORMAT,
+                settings.SCREENSHOT_QUALITY,
             )
-            try:
-                await page.goto(
-                    url,
-                    timeout=PAGE_TIMEOUT,
-                    wait_until="domcontentloaded",
-                )
-                screenshot = await page.screenshot(full_page=False)
-            finally:
-                await page.close()
+            key = (normalize_url(url), selector or "", query.strip())
+            cached = self._visual.lookup(key, image, len(screenshot))
+            if cached is not None:
+                logger.info(f"[tool] analyze_page_visual: page unchanged, reusing analysis for {url}")
+                return cached
 
-            img_b64 = base64.standard_b64encode(screenshot).decode()
+            img_b64 = await run_cpu(_b64encode, image.data)
+            subject = f"this screenshot of {url}" if not selector else f"this screenshot of `{selector}` on {url}"
 
-            client = AsyncAnthropic(
-                base_url=settings.LLM_BASE_URL,
-                api_key=settings.LLM_API_KEY,
-            )
-            response = await client.messages.create(
+            response = await llm_gateway.create(
                 model=settings.LLM_MODEL,
                 max_tokens=4096,
                 messages=[{
@@ -187,23 +433,43 @@ class BrowserManager:
                             "type": "image",
                             "source": {
                                 "type": "base64",
-                                "media_type": "image/png",
+                                "media_type": image.media_type,
                                 "data": img_b64,
                             },
                         },
                         {
                             "type": "text",
-                            "text": f"Analyze this screenshot of {url}. {query}",
+                            "text": f"Analyze {subject}. {query}",
                         },
                     ],
                 }],
             )
-            return response.content[0].text if response.content else "(no analysis)"
+            if not response.content:
+                return "(no analysis)"
+            analysis = response.content[0].text
+            self._visual.store(key, image, analysis)
+            return analysis
 
         except Exception as e:
             logger.error(f"[tool] analyze_page_visual failed: {e}")
             return f"Visual analysis failed: {e}"
 
 
+# CPU-bound helpers for run_cpu; module-level so a process pool can pickle them
+def _b64encode(data: bytes) -> str:
+    return base64.standard_b64encode(data).decode()
+
+
+def _to_markdown(html: str) -> str:
+    import html2text
+
+    html = extract_main_content(html)
+    converter = html2text.HTML2Text()
+    converter.ignore_links = False
+    converter.ignore_images = True
+    converter.body_width = 0
+    return converter.handle(html)
+
+
 # Shared singleton instance
 browser_manager = BrowserManager()
@@ -0,0 +1,121 @@
+import asyncio
+import os
+import time
+
+from src.core.procfs import descendants, rss_bytes
+
+# Process names (as /proc truncates them) of Chromium's browser, renderer and helper processes.
+CHROMIUM_NAMES = ("chrom", "headless_shell")
+RSS_CHECK_INTERVAL = 15.0
+# After a failed recycle, keep the current browser this long before trying again.
+RETRY_DELAY = 60.0
+
+
+def chromium_rss_bytes() -> int:
+    """Summed RSS of the Chromium processes under this one.
+
+    Pages shared between Chromium processes are counted in each of them, so
+    this overstates real usage; it's the number that creeps up as Chromium
+    leaks, and the one BROWSER_RECYCLE_RSS_MB is compared against.
+    """
+    return sum(
+        rss_bytes(info.pid)
+        for info in descendants(os.getpid())
+        if any(name in info.name for name in CHROMIUM_NAMES)
+    )
+
+
+class BrowserGovernor:
+    """Decides when the shared Chromium should be swapped for a fresh one.
+
+    A browser is retired after max_pages borrowed pages, or once its process
+    tree's RSS passes max_rss_mb. RSS is sampled off the event loop, at most
+    every RSS_CHECK_INTERVAL, as pages are served. 0 disables either limit.
+    """
+
+    def __init__(self, max_pages: int, max_rss_mb: int) -> None:
+        self._max_pages = max_pages
+        self._max_rss = max_rss_mb * 1024 * 1024
+        self.generation = 0
+        self._pages = 0
+        self._pages_total = 0
+        self._rss = 0
+        self._peak_rss = 0
+        self._sampled_at = 0.0
+        self._retry_at = 0.0
+        self._recycles: dict[str, int] = {}
+        self._failures = 0
+
+    def page_served(self) -> None:
+        self._pages += 1
+        self._pages_total += 1
+
+    async def due(self) -> str | None:
+        """Why the current browser should be recycled now ("pages" or "rss"), or None."""
+        now = time.monotonic()
+        if now - self._sampled_at >= RSS_CHECK_INTERVAL:
+            await self.sample()
+        if now < self._retry_at:
+            return None
+        if self._max_pages and self._pages >= self._max_pages:
+            return "pages"
+        if self._max_rss and self._rss >= self._max_rss:
+            return "rss"
+        return None
+
+    async def sample(self) -> int:
+        self._sampled_at = time.monotonic()
+        self._rss = await asyncio.to_thread(chromium_rss_bytes)
+        self._peak_rss = max(self._peak_rss, self._rss)
+        return self._rss
+
+    def recycled(self, reason: str) -> None:
+        self._recycles[reason] = self._recycles.get(reason, 0) + 1
+        self.generation += 1
+        self._pages = 0
+        self._sampled_at = 0.0
+
+    def recycle_failed(self) -> None:
+        self._failures += 1
+        self._retry_at = time.monotonic() + RETRY_DELAY
+
+    def stats(self) -> dict:
+        return {
+            "generation": self.generation,
+            "pages": self._pages,
+            "pages_total": self._pages_total,
+            "rss_bytes": self._rss,
+            "peak_rss_bytes": self._peak_rss,
+            "recycles": dict(self._recycles),
+            "recycle_failures": self._failures,
+        }
+
+
+def render_metrics(stats_by_worker: dict[str, dict]) -> list[str]:
+    """Prometheus lines for governor stats, labelled by the process that owns the browser."""
+    gauges = [
+        ("clawdius_browser_rss_bytes", "rss_bytes", "Summed RSS of the Chromium process tree at the last sample."),
+        ("clawdius_browser_rss_peak_bytes", "peak_rss_bytes", "Highest Chromium RSS sampled."),
+        ("clawdius_browser_pages", "pages", "Pages served by the current browser."),
+        ("clawdius_browser_generation", "generation", "How many times the browser has been replaced."),
+    ]
+    lines = []
+    for name, key, help_text in gauges:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{worker="{worker}"}} {stats[key]}' for worker, stats in stats_by_worker.items() if stats]
+    lines += [
+        "# HELP clawdius_browser_recycles_total Browsers retired by the memory governor.",
+        "# TYPE clawdius_browser_recycles_total counter",
+    ]
+    for worker, stats in stats_by_worker.items():
+        for reason, count in (stats or {}).get("recycles", {}).items():
+            lines.append(f'clawdius_browser_recycles_total{{worker="{worker}",reason="{reason}"}} {count}')
+    lines += [
+        "# HELP clawdius_browser_recycle_failures_total Recycles abandoned because the new browser failed to start.",
+        "# TYPE clawdius_browser_recycle_failures_total counter",
+    ]
+    lines += [
+        f'clawdius_browser_recycle_failures_total{{worker="{worker}"}} {stats["recycle_failures"]}'
+        for worker, stats in stats_by_worker.items() if stats
+    ]
+    return lines
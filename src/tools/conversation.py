@@ -0,0 +1,5 @@
+from contextvars import ContextVar
+
+# Id of the conversation (one Brain.think/stream call) the current tool call
+# belongs to. Set by the Brain; tools use it to scope per-conversation state.
+current_conversation: ContextVar[str | None] = ContextVar("current_conversation", default=None)
@@ -0,0 +1,139 @@
+import re
+
+from bs4 import BeautifulSoup, Tag
+
+# Never part of the readable content.
+_STRIP_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "button", "nav", "footer", "aside"]
+_STRIP_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog", "alertdialog"}
+_UNLIKELY = re.compile(
+    r"cookie|consent|gdpr|banner|sidebar|footer|masthead|menu|navbar|breadcrumb|social|share|"
+    r"comment|promo|advert|sponsor|newsletter|subscribe|popup|modal|related|recommend|skip-link",
+    re.IGNORECASE,
+)
+_LIKELY = re.compile(r"article|content|main|post|entry|story|body|text|prose|markdown", re.IGNORECASE)
+# Block elements whose text counts towards their ancestors' score.
+_SCORED_TAGS = ["p", "pre", "td", "blockquote", "li", "h2", "h3"]
+MIN_CONTENT_CHARS = 250
+# A sibling is pulled in alongside the winner if it scores at least this fraction of it.
+SIBLING_RATIO = 0.2
+TOP_CANDIDATES = 5
+
+
+def _text_len(node: Tag) -> int:
+    return len(" ".join(node.get_text(" ").split()))
+
+
+def _link_density(node: Tag) -> float:
+    total = _text_len(node)
+    if not total:
+        return 1.0
+    linked = sum(_text_len(a) for a in node.find_all("a"))
+    return linked / total
+
+
+def _strip_boilerplate(soup: BeautifulSoup) -> None:
+    for tag in soup(_STRIP_TAGS):
+        tag.decompose()
+    # extract() rather than decompose(): tags already detached with an ancestor stay safe to inspect
+    for tag in soup.find_all(True):
+        if tag.name in ("html", "body", "main", "article"):
+            continue
+        if tag.get("role") in _STRIP_ROLES or tag.get("aria-hidden") == "true":
+            tag.extract()
+            continue
+        if tag.name == "header" and not tag.find_parent("article"):
+            tag.extract()
+            continue
+        hint = " ".join([*tag.get("class", []), tag.get("id") or ""])
+        if hint and _UNLIKELY.search(hint) and not _LIKELY.search(hint) and not tag.find(["main", "article"]):
+            tag.extract()
+
+
+def _best_candidate(root: Tag) -> Tag | None:
+    """Readability-style scoring: text blocks vote for their parent and grandparent."""
+    scores: dict[int, float] = {}
+    nodes: dict[int, Tag] = {}
+    for block in root.find_all(_SCORED_TAGS):
+        length = _text_len(block)
+        if length < 25:
+            continue
+        score = 1 + block.get_text().count(",") + min(length / 100, 3)
+        for weight, ancestor in ((1.0, block.parent), (0.5, block.parent and block.parent.parent)):
+            if isinstance(ancestor, Tag) and ancestor.name not in ("html", "[document]"):
+                key = id(ancestor)
+                nodes[key] = ancestor
+                scores[key] = scores.get(key, 0.0) + score * weight
+    if not scores:
+        return None
+    for key, node in nodes.items():
+        hint = " ".join([*node.get("class", []), node.get("id") or ""])
+        if node.name in ("article", "main") or (hint and _LIKELY.search(hint)):
+            scores[key] *= 1.25
+    # Link density is a full subtree walk, so only the front-runners pay for it
+    top = sorted(scores, key=scores.get, reverse=True)[:TOP_CANDIDATES]
+    best_key = max(top, key=lambda key: scores[key] * (1 - _link_density(nodes[key])))
+    best = nodes[best_key]
+
+    # Keep content split across sibling containers (e.g. several <section>s)
+    parent = best.parent
+    if not isinstance(parent, Tag) or parent.name in ("body", "html", "[document]"):
+        return best
+    threshold = max(10.0, scores[best_key] * SIBLING_RATIO)
+    siblings = [
+        child for child in parent.find_all(True, recursive=False)
+        if child is best or scores.get(id(child), 0.0) >= threshold
+    ]
+    if len(siblings) == 1:
+        return best
+    wrapper = BeautifulSoup("<div></div>", "html.parser").div
+    for child in siblings:
+        wrapper.append(child.extract())
+    return wrapper
+
+
+def extract_main_content(html: str) -> str:
+    """Return the HTML of the page's main content, without navigation, footers and banners.
+
+    Falls back to the whole cleaned-up body when no block stands out.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+    _strip_boilerplate(soup)
+    body = soup.body or soup
+
+    main = None
+    # A single <article> wins over <main>; several articles are a listing, so use <main>
+    for landmarks in (body.find_all("article"), body.find_all("main") or body.find_all(attrs={"role": "main"})):
+        if len(landmarks) == 1 and _text_len(landmarks[0]) >= MIN_CONTENT_CHARS:
+            main = landmarks[0]
+            break
+    if main is None:
+        candidate = _best_candidate(body)
+        if candidate is not None and _text_len(candidate) >= MIN_CONTENT_CHARS:
+            main = candidate
+    content = str(main if main is not None else body)
+
+    heading = main.find("h1") if main is not None else None
+    if title and heading is None:
+        content = f"<h1>{title}</h1>\n{content}"
+    return content
+
+
+def split_pages(text: str, size: int) -> list[str]:
+    """Split text into chunks of at most `size` chars, preferring paragraph then line breaks."""
+    if size < 1:
+        raise ValueError(f"Page size must be at least 1, got {size}")
+    pages, start = [], 0
+    while len(text) - start > size:
+        end = start + size
+        # Never cut at start itself: the page would be empty and the loop stuck
+        floor = start + max(size // 2, 1)
+        cut = text.rfind("\n\n", floor, end)
+        if cut == -1:
+            cut = text.rfind("\n", floor, end)
+        if cut == -1:
+            cut = end
+        pages.append(text[start:cut].strip("\n"))
+        start = cut
+    pages.append(text[start:].strip("\n"))
+    return pages
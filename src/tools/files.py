@@ -0,0 +1,240 @@
+import asyncio
+import mimetypes
+import mmap
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+
+import aiofiles
+from loguru import logger
+
+from src.core.config import settings
+from src.tools.search_index import workspace_index
+
+SNIFF_BYTES = 8192
+# Files above this are served through mmap instead of being read into memory.
+MMAP_THRESHOLD = 4 * 1024 * 1024
+# Counting lines means a full scan; skip it for files larger than this.
+LINE_COUNT_LIMIT = 256 * 1024 * 1024
+COUNT_CHUNK = 1024 * 1024
+# Line counts of recently read files, so paging through one doesn't rescan it.
+LINE_COUNT_CACHE_SIZE = 128
+
+_TEXT_CONTROL = {7, 8, 9, 10, 12, 13, 27}
+
+# path -> (mtime_ns, size, line count)
+_line_counts: OrderedDict[Path, tuple[int, int, int | None]] = OrderedDict()
+
+
+def _safe_path(relative: str) -> Path:
+    """Resolve a relative path inside the workspace, rejecting escapes."""
+    workspace = Path(settings.WORKSPACE_DIR).resolve()
+    target = (workspace / relative).resolve()
+    if not str(target).startswith(str(workspace)):
+        raise ValueError(f"Path escapes sandbox: {relative}")
+    return target
+
+
+def _is_binary(sample: bytes) -> bool:
+    if b"\x00" in sample:
+        return True
+    try:
+        sample.decode("utf-8")
+        return False
+    except UnicodeDecodeError as e:
+        if e.start >= len(sample) - 3:
+            return False  # a multi-byte character cut off by the sample boundary
+    # Not UTF-8: still text (latin-1 and friends) unless full of control bytes
+    control = sum(1 for b in sample if b < 32 and b not in _TEXT_CONTROL)
+    return control > len(sample) // 10
+
+
+def _count_lines(target: Path, size: int) -> int | None:
+    if size > LINE_COUNT_LIMIT:
+        return None
+    lines, last = 0, b""
+    with open(target, "rb") as f:
+        while chunk := f.read(COUNT_CHUNK):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    return lines + (1 if size and last != b"\n" else 0)
+
+
+def _cached_line_count(target: Path, stat: os.stat_result) -> int | None:
+    """_count_lines, reused while the file's mtime and size are unchanged."""
+    cached = _line_counts.get(target)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        _line_counts.move_to_end(target)
+        return cached[2]
+    lines = _count_lines(target, stat.st_size)
+    _line_counts[target] = (stat.st_mtime_ns, stat.st_size, lines)
+    if len(_line_counts) > LINE_COUNT_CACHE_SIZE:
+        _line_counts.popitem(last=False)
+    return lines
+
+
+def _line_span(data, start_line: int, end_line: int) -> tuple[int, int]:
+    """Byte offsets of lines start_line..end_line (1-based, inclusive) in data."""
+    start = 0
+    for _ in range(start_line - 1):
+        start = data.find(b"\n", start) + 1
+        if start == 0:
+            return len(data), len(data)
+    end = start
+    for _ in range(end_line - start_line + 1):
+        newline = data.find(b"\n", end)
+        if newline == -1:
+            return start, len(data)
+        end = newline + 1
+    return start, end
+
+
+def _read_range(
+    target: Path,
+    size: int,
+    start_line: int | None,
+    end_line: int | None,
+    offset: int | None,
+    length: int | None,
+) -> tuple[bytes, str]:
+    """Read the requested slice without loading the whole file. Returns (data, description)."""
+    cap = settings.READ_FILE_CAP
+    if start_line is not None or end_line is not None:
+        start_line = max(start_line or 1, 1)
+        end_line = start_line + 10_000_000 if end_line is None else max(end_line, start_line)
+        with open(target, "rb") as f:
+            if size > MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    lo, hi = _line_span(mm, start_line, end_line)
+                    data = mm[lo : min(hi, lo + cap)]
+            else:
+                raw = f.read()
+                lo, hi = _line_span(raw, start_line, end_line)
+                data = raw[lo : min(hi, lo + cap)]
+        shown_end = start_line + data.count(b"\n") - (1 if data.endswith(b"\n") else 0)
+        return data, f"lines {start_line}-{max(shown_end, start_line)}"
+
+    offset = max(offset or 0, 0)
+    length = min(length or cap, cap)
+    with open(target, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    return data, f"bytes {offset}-{offset + len(data)}"
+
+
+async def read_file(
+    path: str,
+    start_line: int | None = None,
+    end_line: int | None = None,
+    offset: int | None = None,
+    length: int | None = None,
+) -> str:
+    logger.info(f"[tool] read_file: {path}")
+    target = _safe_path(path)
+    if not target.exists():
+        return f"File not found: {path}"
+    if target.is_dir():
+        return f"{path} is a directory."
+
+    stat = target.stat()
+    size = stat.st_size
+    async with aiofiles.open(target, "rb") as f:
+        sample = await f.read(SNIFF_BYTES)
+    if _is_binary(sample):
+        kind = mimetypes.guess_type(target.name)[0] or "unknown type"
+        return (
+            f"{path} is a binary file ({size} bytes, {kind}); not shown. "
+            "Use execute_shell with `file`, `strings` or `xxd | head` to inspect it."
+        )
+
+    ranged = any(v is not None for v in (start_line, end_line, offset, length))
+    if not ranged and size <= settings.READ_FILE_CAP:
+        async with aiofiles.open(target, "r", errors="replace") as f:
+            return await f.read()
+
+    lines = await asyncio.to_thread(_cached_line_count, target, stat)
+    if start_line is not None and lines is not None and start_line > max(lines, 1):
+        return f"start_line {start_line} is beyond end of file ({lines} lines)"
+    data, shown = await asyncio.to_thread(_read_range, target, size, start_line, end_line, offset, length)
+    if start_line is not None and lines is None and not data and start_line > 1:
+        return f"start_line {start_line} is beyond end of file"
+    header = f"[{path}: {size} bytes, {lines if lines is not None else 'many'} lines; showing {shown}"
+    if len(data) >= settings.READ_FILE_CAP:
+        header += f", capped at {settings.READ_FILE_CAP} bytes"
+    if not ranged:
+        header += "; pass start_line/end_line or offset/length to read further"
+    return f"{header}]\n{data.decode(errors='replace')}"
+
+
+def _patch_lines(target: Path, content: str, start_line: int, end_line: int) -> int:
+    """Replace lines start_line..end_line with content by streaming to a temp file.
+
+    end_line == start_line - 1 inserts before start_line without replacing anything.
+    Returns how many lines were replaced.
+    """
+    new = content.encode()
+    if new and not new.endswith(b"\n"):
+        new += b"\n"
+    replaced = 0
+    # A unique temp file per call, so concurrent patches of one file can't clobber each other's
+    dst = tempfile.NamedTemporaryFile(dir=target.parent, prefix=f".{target.name}.", suffix=".patch-tmp", delete=False)
+    try:
+        with open(target, "rb") as src, dst:
+            line_no = 0
+            for line in src:
+                line_no += 1
+                if line_no == start_line:
+                    dst.write(new)
+                if start_line <= line_no <= end_line:
+                    replaced += 1
+                    continue
+                dst.write(line)
+            if line_no < start_line:
+                if line_no and not line.endswith(b"\n"):
+                    dst.write(b"\n")
+                dst.write(new)
+        os.chmod(dst.name, target.stat().st_mode & 0o7777)
+        os.replace(dst.name, target)
+    except BaseException:
+        os.unlink(dst.name)
+        raise
+    return replaced
+
+
+async def write_file(
+    path: str,
+    content: str,
+    mode: str = "overwrite",
+    start_line: int | None = None,
+    end_line: int | None = None,
+) -> str:
+    logger.info(f"[tool] write_file: {path} ({mode})")
+    target = _safe_path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    if mode == "overwrite":
+        async with aiofiles.open(target, "w") as f:
+            await f.write(content)
+        await workspace_index.update_file(target)
+        return f"Written {len(content)} bytes to {path}"
+
+    if mode == "append":
+        async with aiofiles.open(target, "a") as f:
+            await f.write(content)
+        await workspace_index.update_file(target)
+        return f"Appended {len(content)} bytes to {path} (now {target.stat().st_size} bytes)"
+
+    if mode == "patch":
+        if start_line is None or start_line < 1:
+            return "patch mode needs start_line (1-based)."
+        if not target.exists():
+            return f"File not found: {path}"
+        end_line = start_line if end_line is None else end_line
+        if end_line < start_line - 1:
+            return "end_line must be >= start_line - 1."
+        replaced = await asyncio.to_thread(_patch_lines, target, content, start_line, end_line)
+        await workspace_index.update_file(target)
+        return f"Replaced {replaced} lines at line {start_line} of {path} with {len(content.splitlines())} lines"
+
+    return f"Unknown write mode: {mode}"
@@ -0,0 +1,35 @@
+import aiohttp
+
+from src.core.config import settings
+
+HTTP_TIMEOUT = 20
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/121.0 Safari/537.36"
+)
+
+_session: aiohttp.ClientSession | None = None
+
+
+def proxy() -> str | None:
+    return settings.OUTBOUND_PROXY or None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Shared keep-alive HTTP session for tools that don't need a browser."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+            headers={"User-Agent": USER_AGENT},
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+            trust_env=True,
+        )
+    return _session
+
+
+async def close_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
@@ -0,0 +1,114 @@
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import aiohttp
+from bs4 import BeautifulSoup
+from loguru import logger
+
+from src.tools import http_client
+
+MAX_HTML_BYTES = 5_000_000
+MIN_TEXT_CHARS = 600
+# How long a domain that needed the browser skips the HTTP attempt.
+BROWSER_TIER_TTL = 3600
+MAX_TRACKED_DOMAINS = 2048
+
+_JS_REQUIRED_MARKERS = (
+    "enable javascript",
+    "javascript is required",
+    "javascript is disabled",
+    "requires javascript",
+    "please turn on javascript",
+    "checking your browser",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class HttpPage:
+    url: str
+    html: str
+    etag: str | None
+    last_modified: str | None
+
+
+async def fetch_html(url: str, max_bytes: int = MAX_HTML_BYTES) -> HttpPage | None:
+    """Plain GET over the shared session. None if the response isn't usable HTML or exceeds max_bytes."""
+    session = http_client.get_session()
+    async with session.get(url, proxy=http_client.proxy(), allow_redirects=True) as resp:
+        return await read_html(resp, max_bytes)
+
+
+async def read_html(resp: aiohttp.ClientResponse, max_bytes: int = MAX_HTML_BYTES) -> HttpPage | None:
+    """The page in a 200 HTML response, or None if it isn't one or exceeds max_bytes."""
+    content_type = resp.headers.get("Content-Type", "")
+    if resp.status != 200 or "html" not in content_type:
+        return None
+    if (resp.content_length or 0) > max_bytes:
+        return None
+    chunks, size = [], 0
+    async for chunk in resp.content.iter_chunked(64 * 1024):
+        size += len(chunk)
+        if size > max_bytes:
+            return None
+        chunks.append(chunk)
+    html = b"".join(chunks).decode(resp.charset or "utf-8", errors="replace")
+    return HttpPage(
+        url=str(resp.url),
+        html=html,
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified"),
+    )
+
+
+def has_enough_text(html: str) -> bool:
+    """Heuristic: does the server-rendered HTML already carry the readable content?"""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript", "template", "svg"]):
+        tag.decompose()
+    text = " ".join(soup.get_text(" ").split())
+    if len(text) < MIN_TEXT_CHARS:
+        return False
+    # Short pages that mostly talk about JavaScript are a shell or a bot wall.
+    lowered = text[:2000].lower()
+    return not (len(text) < 3 * MIN_TEXT_CHARS and any(m in lowered for m in _JS_REQUIRED_MARKERS))
+
+
+class DomainTiers:
+    """Remembers, per domain, whether the HTTP tier worked last time."""
+
+    def __init__(self) -> None:
+        self._browser_until: dict[str, float] = {}
+        self.served = {"http": 0, "browser": 0}
+        self.fallbacks = 0
+
+    @staticmethod
+    def _domain(url: str) -> str:
+        return (urlsplit(url).hostname or "").lower()
+
+    def prefer_http(self, url: str) -> bool:
+        until = self._browser_until.get(self._domain(url))
+        return until is None or until < time.monotonic()
+
+    def record(self, url: str, tier: str, *, fallback: bool = False, js_rendered: bool = False) -> None:
+        """Count a page served by tier.
+
+        fallback: the HTTP tier was tried first and didn't serve it.
+        js_rendered: HTTP got a 200 HTML page without enough text and the
+        browser then loaded it; only this sends the domain to the browser tier.
+        """
+        domain = self._domain(url)
+        self.served[tier] += 1
+        if fallback:
+            self.fallbacks += 1
+        if tier == "http":
+            self._browser_until.pop(domain, None)
+            return
+        if js_rendered:
+            if len(self._browser_until) >= MAX_TRACKED_DOMAINS:
+                self._browser_until.pop(next(iter(self._browser_until)))
+            self._browser_until[domain] = time.monotonic() + BROWSER_TIER_TTL
+            logger.debug(f"[browser] {domain} needs the browser tier for the next {BROWSER_TIER_TTL}s")
+
+    def stats(self) -> dict:
+        return {**self.served, "fallbacks": self.fallbacks, "browser_domains": len(self._browser_until)}
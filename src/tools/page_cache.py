@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import aiofiles
+from loguru import logger
+
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    url: str
+    value: str
+    fetched_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def revalidatable(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    revalidated: int = 0
+    evictions: int = 0
+    disk_evictions: int = 0
+
+
+def normalize_url(url: str) -> str:
+    """Canonical cache key: lowercase host, no fragment, default port or tracking params."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class PageCache:
+    """Bounded TTL/LRU cache for fetched pages with single-flight loading.
+
+    Entries live in memory (LRU, `max_entries`) and optionally on disk, where
+    the oldest writes go first once there are more than `disk_max_entries`. A
+    stale entry that carries an ETag or Last-Modified is revalidated before
+    being refetched. Concurrent requests for the same key share one fetch.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        ttl_s: float,
+        disk_dir: Path | None = None,
+        disk_max_entries: int = 1000,
+    ) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl_s = ttl_s
+        self._disk_dir = disk_dir
+        self._disk_max_entries = disk_max_entries
+        self._memory: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._stats = CacheStats()
+        # Disk entries (file name -> bytes), oldest write first; scanned on first use
+        self._disk_index: OrderedDict[str, int] | None = None
+        self._disk_bytes = 0
+
+    async def get_or_fetch(
+        self,
+        url: str,
+        fetch: Callable[[], Awaitable[CacheEntry]],
+        revalidate: Callable[[CacheEntry], Awaitable[CacheEntry | None]] | None = None,
+    ) -> str:
+        """Return the cached value for url, loading it with `fetch` when needed.
+
+        revalidate: optional async callback for a stale entry. It returns the
+        entry if it is still current (e.g. a conditional GET answered 304), a
+        replacement if the server sent a new copy, or None to fetch again.
+        """
+        key = normalize_url(url)
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+        elif self._disk_dir is not None:
+            entry = await self._disk_load(key)
+            if entry is not None:
+                self._stats.disk_hits += 1
+                self._remember(key, entry)
+
+        if entry is not None and self._fresh(entry):
+            self._stats.hits += 1
+            return entry.value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats.coalesced += 1
+        else:
+            # The load runs as its own task so a cancelled caller doesn't abort
+            # the fetch for everyone else waiting on it.
+            task = asyncio.create_task(self._load(key, entry, fetch, revalidate))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def fresh(self, url: str) -> bool:
+        """True if a fresh copy of url is in memory."""
+        entry = self._memory.get(normalize_url(url))
+        return entry is not None and self._fresh(entry)
+
+    async def put(self, url: str, entry: CacheEntry) -> None:
+        """Store an entry fetched outside get_or_fetch (e.g. by a prefetch)."""
+        await self._store(normalize_url(url), entry)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller went away
+
+    async def _load(self, key, entry, fetch, revalidate) -> str:
+        if entry is not None and entry.revalidatable and revalidate is not None:
+            try:
+                current = await revalidate(entry)
+            except Exception as e:
+                logger.debug(f"[cache] revalidation failed for {key}: {e}")
+                current = None
+            if current is entry:
+                self._stats.revalidated += 1
+                entry.fetched_at = time.time()
+                await self._store(key, entry)
+                return entry.value
+            if current is not None:
+                self._stats.misses += 1
+                await self._store(key, current)
+                return current.value
+
+        self._stats.misses += 1
+        entry = await fetch()
+        await self._store(key, entry)
+        return entry.value
+
+    def _fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.fetched_at < self._ttl_s
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+            self._stats.evictions += 1
+
+    async def _store(self, key: str, entry: CacheEntry) -> None:
+        self._remember(key, entry)
+        if self._disk_dir is not None:
+            try:
+                await self._disk_save(key, entry)
+            except OSError as e:
+                logger.warning(f"[cache] disk write failed: {e}")
+
+    def _disk_path(self, key: str) -> Path:
+        return self._disk_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    async def _disk_load(self, key: str) -> CacheEntry | None:
+        path = self._disk_path(key)
+        if not path.exists():
+            return None
+        try:
+            async with aiofiles.open(path, "r") as f:
+                return CacheEntry(**json.loads(await f.read()))
+        except (OSError, ValueError, TypeError) as e:
+            logger.debug(f"[cache] dropping unreadable entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            if self._disk_index is not None:
+                self._disk_bytes -= self._disk_index.pop(path.name, 0)
+            return None
+
+    async def _disk_save(self, key: str, entry: CacheEntry) -> None:
+        self._disk_dir.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(asdict(entry)).encode()
+        path = self._disk_path(key)
+        async with aiofiles.open(path, "wb") as f:
+            await f.write(data)
+        index = await self._disk_entries()
+        self._disk_bytes += len(data) - index.pop(path.name, 0)
+        index[path.name] = len(data)
+        while len(index) > self._disk_max_entries:
+            name, size = index.popitem(last=False)
+            (self._disk_dir / name).unlink(missing_ok=True)
+            self._disk_bytes -= size
+            self._stats.disk_evictions += 1
+
+    async def _disk_entries(self) -> OrderedDict[str, int]:
+        """The disk index, built from one directory scan the first time it's needed."""
+        if self._disk_index is None:
+            index = await asyncio.to_thread(self._scan_disk)
+            if self._disk_index is None:  # another save may have scanned meanwhile
+                self._disk_index = index
+                self._disk_bytes = sum(index.values())
+        return self._disk_index
+
+    def _scan_disk(self) -> OrderedDict[str, int]:
+        found = []
+        for path in self._disk_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            found.append((stat.st_mtime, path.name, stat.st_size))
+        found.sort()
+        return OrderedDict((name, size) for _, name, size in found)
+
+    def stats(self) -> dict:
+        stats = {**asdict(self._stats), "entries": len(self._memory), "inflight": len(self._inflight)}
+        if self._disk_index is not None:
+            stats.update(disk_entries=len(self._disk_index), disk_bytes=self._disk_bytes)
+        return stats
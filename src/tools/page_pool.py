@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page
+
+DEFAULT_VIEWPORT = {"width": 1280, "height": 720}
+
+
+@dataclass(slots=True)
+class _Slot:
+    context: BrowserContext
+    page: Page
+    viewport: dict
+
+
+@dataclass(slots=True)
+class PoolStats:
+    acquisitions: int = 0
+    waits: int = 0
+    total_wait_s: float = 0.0
+    max_wait_s: float = 0.0
+    in_use: int = 0
+    peak_in_use: int = 0
+    busy_s: float = 0.0
+    resets_failed: int = 0
+
+
+class PagePool:
+    """A fixed-size pool of isolated browser contexts, one warm page each.
+
+    Admission is bounded by a semaphore, so at most `size` pages are ever open.
+    On release a page's whole context is thrown away and a fresh one built in
+    the background, so nothing a site left behind (cookies, local and session
+    storage, IndexedDB, Cache Storage, service workers, HTTP cache) reaches the
+    next borrower, and context creation stays off the request path. The slot's
+    permit is held until its replacement is idle.
+    """
+
+    def __init__(self, browser: Browser, size: int) -> None:
+        self._browser = browser
+        self.size = max(1, size)
+        self._semaphore = asyncio.Semaphore(self.size)
+        self._idle: list[_Slot] = []
+        self._started = time.monotonic()
+        self._stats = PoolStats()
+        # Borrowers holding or waiting for a page; drain() waits for this to reach zero.
+        self._borrowers = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._replacing: set[asyncio.Task] = set()
+
+    async def warm(self) -> None:
+        """Pre-create every slot so the first requests don't pay for it."""
+        missing = self.size - len(self._idle) - self._stats.in_use - len(self._replacing)
+        slots = await asyncio.gather(*(self._new_slot() for _ in range(missing)))
+        self._idle.extend(slots)
+        logger.info(f"[browser] Page pool warmed ({len(self._idle)}/{self.size} pages)")
+
+    async def _new_slot(self) -> _Slot:
+        context = await self._browser.new_context(viewport=DEFAULT_VIEWPORT)
+        page = await context.new_page()
+        return _Slot(context, page, DEFAULT_VIEWPORT)
+
+    @asynccontextmanager
+    async def page(self, viewport: dict | None = None) -> AsyncIterator[Page]:
+        """Borrow a page for the duration of the block."""
+        self._borrowers += 1
+        self._drained.clear()
+        try:
+            async with self._borrow(viewport) as page:
+                yield page
+        finally:
+            self._borrowers -= 1
+            if not self._borrowers:
+                self._drained.set()
+
+    @asynccontextmanager
+    async def _borrow(self, viewport: dict | None) -> AsyncIterator[Page]:
+        wait_start = time.monotonic()
+        if self._semaphore.locked():
+            self._stats.waits += 1
+        await self._semaphore.acquire()
+        waited = time.monotonic() - wait_start
+        self._stats.acquisitions += 1
+        self._stats.total_wait_s += waited
+        self._stats.max_wait_s = max(self._stats.max_wait_s, waited)
+        self._stats.in_use += 1
+        self._stats.peak_in_use = max(self._stats.peak_in_use, self._stats.in_use)
+
+        slot = None
+        busy_start = time.monotonic()
+        try:
+            slot = self._idle.pop() if self._idle else await self._new_slot()
+            wanted = viewport or DEFAULT_VIEWPORT
+            if slot.viewport != wanted:
+                await slot.page.set_viewport_size(wanted)
+                slot.viewport = wanted
+            yield slot.page
+        finally:
+            self._stats.busy_s += time.monotonic() - busy_start
+            self._stats.in_use -= 1
+            if slot is None:
+                self._semaphore.release()
+            else:
+                task = asyncio.create_task(self._replace(slot))
+                self._replacing.add(task)
+                task.add_done_callback(self._replacing.discard)
+
+    async def _replace(self, slot: _Slot) -> None:
+        """Close a returned slot's context and put a fresh one in the pool, then free its permit."""
+        try:
+            try:
+                await slot.context.close()
+            except Exception:
+                pass  # a crashed page's context may already be gone
+            self._idle.append(await self._new_slot())
+        except Exception as e:
+            # The slot is rebuilt on next use instead.
+            self._stats.resets_failed += 1
+            logger.warning(f"[browser] Could not replace pooled page: {e}")
+        finally:
+            self._semaphore.release()
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait until every borrowed page is back; False if timeout ran out first."""
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def close(self) -> None:
+        for task in list(self._replacing):
+            task.cancel()
+        await asyncio.gather(*self._replacing, return_exceptions=True)
+        idle, self._idle = self._idle, []
+        for slot in idle:
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        s = self._stats
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "in_use": s.in_use,
+            "peak_in_use": s.peak_in_use,
+            "acquisitions": s.acquisitions,
+            "waits": s.waits,
+            "avg_wait_ms": round(1000 * s.total_wait_s / s.acquisitions, 1) if s.acquisitions else 0.0,
+            "max_wait_ms": round(1000 * s.max_wait_s, 1),
+            "utilisation": round(s.busy_s / (self.size * elapsed), 3),
+            "resets_failed": s.resets_failed,
+        }
@@ -0,0 +1,149 @@
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+from src.tools.conversation import current_conversation
+from src.tools.page_cache import CacheEntry, PageCache, normalize_url
+
+# Prefetched keys remembered for claim() accounting.
+MAX_REMEMBERED = 256
+
+# fetch(url, max_bytes) -> (entry, bytes downloaded), or None if the page can't be prefetched cheaply
+PrefetchFn = Callable[[str, int], Awaitable[tuple[CacheEntry, int] | None]]
+
+
+@dataclass(slots=True)
+class PrefetchStats:
+    scheduled: int = 0
+    completed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    used: int = 0
+    bytes: int = 0
+
+
+class Prefetcher:
+    """Warms the page cache with search results the model is likely to read next.
+
+    Runs at most `concurrency` fetches at a time. Each page may download up to
+    byte_budget / top_k bytes, and a conversation's prefetches stop once
+    byte_budget is used up. Outstanding fetches are cancelled when their
+    conversation ends.
+    """
+
+    def __init__(self, cache: PageCache, fetch: PrefetchFn, *, top_k: int, concurrency: int, byte_budget: int) -> None:
+        self._cache = cache
+        self._fetch = fetch
+        self._top_k = top_k
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._byte_budget = byte_budget
+        self._per_page = byte_budget // max(top_k, 1)
+        self._spent: dict[str, int] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._fetching: set[str] = set()
+        self._by_conversation: dict[str, set[str]] = {}
+        self._done: OrderedDict[str, None] = OrderedDict()
+        self._stats = PrefetchStats()
+
+    def schedule(self, urls: list[str]) -> None:
+        """Start background fetches for the first top_k usable URLs."""
+        conversation = current_conversation.get()
+        if self._top_k <= 0 or not conversation:
+            return  # outside a conversation nothing would ever cancel them
+        started = 0
+        for url in urls:
+            if started >= self._top_k:
+                break
+            if urlsplit(url).scheme not in ("http", "https"):
+                continue
+            key = normalize_url(url)
+            started += 1
+            if key in self._tasks or self._cache.fresh(url):
+                continue
+            self._stats.scheduled += 1
+            task = asyncio.create_task(self._run(conversation, url, key))
+            self._tasks[key] = task
+            self._by_conversation.setdefault(conversation, set()).add(key)
+            task.add_done_callback(lambda _, c=conversation, k=key: self._forget(c, k))
+
+    def _forget(self, conversation: str, key: str) -> None:
+        self._tasks.pop(key, None)
+        self._fetching.discard(key)
+        keys = self._by_conversation.get(conversation)
+        if keys is not None:
+            keys.discard(key)
+
+    async def _run(self, conversation: str, url: str, key: str) -> None:
+        try:
+            async with self._semaphore:
+                # Reserve the page's allowance up front so concurrent fetches can't overrun the budget
+                allowance = min(self._byte_budget - self._spent.get(conversation, 0), self._per_page)
+                if allowance <= 0:
+                    self._stats.skipped += 1
+                    return
+                self._spent[conversation] = self._spent.get(conversation, 0) + allowance
+                self._fetching.add(key)
+                size = allowance
+                try:
+                    result = await self._fetch(url, allowance)
+                    size = result[1] if result else 0
+                finally:
+                    # Give back what wasn't used; a cancelled or failed fetch is charged in full
+                    if conversation in self._spent:
+                        self._spent[conversation] -= allowance - size
+        except asyncio.CancelledError:
+            self._stats.cancelled += 1
+            raise
+        except Exception as e:
+            logger.debug(f"[browser] prefetch of {url} failed: {e}")
+            self._stats.failed += 1
+            return
+        if result is None:
+            self._stats.skipped += 1
+            return
+        entry, size = result
+        self._stats.bytes += size
+        await self._cache.put(url, entry)
+        self._stats.completed += 1
+        self._done[key] = None
+        while len(self._done) > MAX_REMEMBERED:
+            self._done.popitem(last=False)
+        logger.debug(f"[browser] prefetched {url} ({size} bytes)")
+
+    async def claim(self, url: str) -> bool:
+        """Wait for an in-flight prefetch of url; True if the cache now holds a prefetched copy.
+
+        A prefetch still queued behind the semaphore is cancelled instead, so the
+        caller fetches the page itself rather than waiting its turn.
+        """
+        key = normalize_url(url)
+        task = self._tasks.get(key)
+        if task is not None and key not in self._fetching:
+            task.cancel()
+        elif task is not None:
+            await asyncio.wait({task})
+        if key in self._done:
+            del self._done[key]
+            self._stats.used += 1
+            return True
+        return False
+
+    def cancel(self, conversation: str) -> None:
+        """Drop a finished conversation's outstanding prefetches and budget."""
+        for key in self._by_conversation.pop(conversation, set()):
+            task = self._tasks.get(key)
+            if task is not None:
+                task.cancel()
+        self._spent.pop(conversation, None)
+
+    def cancel_all(self) -> None:
+        for conversation in list(self._by_conversation):
+            self.cancel(conversation)
+
+    def stats(self) -> dict:
+        return {**asdict(self._stats), "inflight": len(self._tasks)}
@@ -1,20 +1,26 @@
 import asyncio
-from pathlib import Path
 
-import aiofiles
 from loguru import logger
 
 from src.core.config import settings
+from src.core.tracing import tracer
+from src.tools import browser_governor
 from src.tools.browser import browser_manager
+from src.tools.files import read_file, write_file
+from src.tools.search_index import workspace_index
+from src.tools.shell import execute_shell, shell_sessions
+from src.tools.workers import tool_workers
 
-TOOL_TIMEOUT = 30
+# Tools that touch shared workspace state. They never overlap with another call
+# from the same batch: everything before them finishes first, and they run alone.
+EXCLUSIVE_TOOLS = {"write_file", "execute_shell"}
 
 # --- Anthropic tool schemas ---
 
 TOOLS = [
     {
         "name": "web_search",
-        "description": "Search the web using DuckDuckGo via a real browser. Returns titles, snippets, and URLs of the top results.",
+        "description": "Search the web using DuckDuckGo. Returns titles, snippets, and URLs of the top results.",
         "input_schema": {
             "type": "object",
             "properties": {
@@ -25,11 +31,12 @@ TOOLS = [
     },
     {
         "name": "read_webpage",
-        "description": "Visit a URL with a real browser and return the page content as Markdown. Use this for reading articles, docs, or any text-heavy page.",
+        "description": "Visit a URL and return its main content as Markdown, without navigation, footers or banners. Long documents are split into pages; the result says how many there are. Use this for reading articles, docs, or any text-heavy page.",
         "input_schema": {
             "type": "object",
             "properties": {
                 "url": {"type": "string", "description": "The URL to visit."},
+                "page": {"type": "integer", "description": "Which page of a long document to return (1-based, default 1). Later pages are served from cache."},
             },
             "required": ["url"],
         },
@@ -42,36 +49,58 @@ TOOLS = [
             "properties": {
                 "url": {"type": "string", "description": "The URL to screenshot."},
                 "query": {"type": "string", "description": "What to look for or analyze in the screenshot."},
+                "selector": {"type": "string", "description": "Optional CSS selector; only that element is captured (e.g. a chart or table)."},
             },
             "required": ["url", "query"],
         },
     },
     {
         "name": "read_file",
-        "description": "Read the contents of a file from the workspace sandbox.",
+        "description": "Read a text file from the workspace sandbox. Large files are capped; pass a line range or byte range to read a specific part. Binary files are described, not shown.",
         "input_schema": {
             "type": "object",
             "properties": {
                 "path": {"type": "string", "description": "Relative path inside the workspace."},
+                "start_line": {"type": "integer", "description": "First line to read (1-based)."},
+                "end_line": {"type": "integer", "description": "Last line to read (inclusive)."},
+                "offset": {"type": "integer", "description": "Byte offset to start reading at (ignored if a line range is given)."},
+                "length": {"type": "integer", "description": "Number of bytes to read from offset."},
             },
             "required": ["path"],
         },
     },
     {
         "name": "write_file",
-        "description": "Write content to a file in the workspace sandbox. Creates parent directories if needed.",
+        "description": "Write content to a file in the workspace sandbox. Creates parent directories if needed. Use mode=append to add to the end, or mode=patch to replace lines start_line..end_line without resending the whole file.",
         "input_schema": {
             "type": "object",
             "properties": {
                 "path": {"type": "string", "description": "Relative path inside the workspace."},
                 "content": {"type": "string", "description": "The content to write."},
+                "mode": {"type": "string", "enum": ["overwrite", "append", "patch"], "description": "How to write (default overwrite)."},
+                "start_line": {"type": "integer", "description": "patch: first line to replace (1-based)."},
+                "end_line": {"type": "integer", "description": "patch: last line to replace (inclusive); start_line - 1 inserts without replacing."},
             },
             "required": ["path", "content"],
         },
     },
+    {
+        "name": "search_workspace",
+        "description": "Search file contents in the workspace sandbox using a prebuilt index (much faster than grep/find via execute_shell). Returns ranked path:line matches. With only a glob, lists matching files.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Text to find, or a regex if regex=true."},
+                "regex": {"type": "boolean", "description": "Treat query as a regular expression."},
+                "glob": {"type": "string", "description": "Only search paths matching this glob, e.g. '*.py' or 'src/*'."},
+                "case_sensitive": {"type": "boolean", "description": "Match case exactly (default false)."},
+                "max_results": {"type": "integer", "description": "Maximum matching lines to return."},
+            },
+        },
+    },
     {
         "name": "execute_shell",
-        "description": "Run a shell command inside the workspace sandbox. Returns stdout and stderr.",
+        "description": "Run a shell command inside the workspace sandbox. Returns stdout and stderr; very long output is trimmed to its beginning and end. When shell sessions are enabled, the working directory and exported variables carry over between calls in the same conversation.",
         "input_schema": {
             "type": "object",
             "properties": {
@@ -83,58 +112,6 @@ TOOLS = [
 ]
 
 
-def _safe_path(relative: str) -> Path:
-    """Resolve a relative path inside the workspace, rejecting escapes."""
-    workspace = Path(settings.WORKSPACE_DIR).resolve()
-    target = (workspace / relative).resolve()
-    if not str(target).startswith(str(workspace)):
-        raise ValueError(f"Path escapes sandbox: {relative}")
-    return target
-
-
-async def read_file(path: str) -> str:
-    logger.info(f"[tool] read_file: {path}")
-    target = _safe_path(path)
-    if not target.exists():
-        return f"File not found: {path}"
-    async with aiofiles.open(target, "r") as f:
-        return await f.read()
-
-
-async def write_file(path: str, content: str) -> str:
-    logger.info(f"[tool] write_file: {path}")
-    target = _safe_path(path)
-    target.parent.mkdir(parents=True, exist_ok=True)
-    async with aiofiles.open(target, "w") as f:
-        await f.write(content)
-    return f"Written {len(content)} bytes to {path}"
-
-
-async def execute_shell(command: str) -> str:
-    logger.info(f"[tool] execute_shell: {command}")
-    workspace = Path(settings.WORKSPACE_DIR).resolve()
-    workspace.mkdir(parents=True, exist_ok=True)
-    try:
-        proc = await asyncio.create_subprocess_shell(
-            command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=str(workspace),
-        )
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=TOOL_TIMEOUT)
-        parts = []
-        if stdout:
-            parts.append(f"stdout:\n{stdout.decode(errors='replace')}")
-        if stderr:
-            parts.append(f"stderr:\n{stderr.decode(errors='replace')}")
-        if not parts:
-            parts.append(f"(exit code {proc.returncode})")
-        return "\n".join(parts)
-    except asyncio.TimeoutError:
-        proc.kill()
-        return "Command timed out after 30s."
-
-
 # Dispatch map
 DISPATCH = {
     "web_search": lambda **kw: browser_manager.web_search(**kw),
@@ -143,15 +120,71 @@ DISPATCH = {
     "read_file": read_file,
     "write_file": write_file,
     "execute_shell": execute_shell,
+    "search_workspace": workspace_index.search,
 }
 
 
+async def end_conversation(conversation_id: str) -> None:
+    """Release tool state scoped to a finished conversation."""
+    if tool_workers.enabled:
+        await tool_workers.end_conversation(conversation_id)
+        return
+    browser_manager.end_conversation(conversation_id)
+    await shell_sessions.close(conversation_id)
+
+
+def _browser_metrics() -> list[str]:
+    if tool_workers.enabled:
+        return browser_governor.render_metrics(tool_workers.browser_stats())
+    return browser_governor.render_metrics({"main": browser_manager.governor_stats()})
+
+
+tracer.add_collector(_browser_metrics)
+
+
 async def run_tool(name: str, args: dict) -> str:
+    """Run one tool call, in a tool worker process when TOOL_WORKERS is set."""
     fn = DISPATCH.get(name)
     if not fn:
         return f"Unknown tool: {name}"
-    try:
-        return await fn(**args)
-    except Exception as e:
-        logger.error(f"[tool] {name} failed: {e}")
-        return f"Tool error: {e}"
+    with tracer.span("tool", tool=name) as span:
+        try:
+            result = await (tool_workers.call(name, args) if tool_workers.enabled else fn(**args))
+        except Exception as e:
+            logger.error(f"[tool] {name} failed: {e}")
+            span.status = "error"
+            span.set(error=str(e)[:300])
+            return f"Tool error: {e}"
+        span.set(result_chars=len(result))
+        return result
+
+
+async def run_tools(calls: list[tuple[str, dict]], on_tool_call=None) -> list[str]:
+    """Run the tool calls from one LLM turn, returning results in call order.
+
+    Consecutive non-exclusive calls run concurrently, at most TOOL_CONCURRENCY at
+    a time. An exclusive call acts as a barrier and runs on its own.
+    on_tool_call: optional async callback(tool_name, tool_args), fired as each call starts.
+    """
+    results = [""] * len(calls)
+    semaphore = asyncio.Semaphore(max(1, settings.TOOL_CONCURRENCY))
+
+    async def _run(index: int, name: str, args: dict) -> None:
+        async with semaphore:
+            logger.info(f"Tool call: {name}({args})")
+            if on_tool_call:
+                await on_tool_call(name, args)
+            results[index] = await run_tool(name, args)
+
+    pending = []
+    for index, (name, args) in enumerate(calls):
+        if name in EXCLUSIVE_TOOLS:
+            if pending:
+                await asyncio.gather(*pending)
+                pending = []
+            await _run(index, name, args)
+        else:
+            pending.append(_run(index, name, args))
+    if pending:
+        await asyncio.gather(*pending)
+    return results
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page, Request, Route
+
+# Typical transfer sizes per resource type (HTTP Archive medians, rounded).
+# Blocked requests are never fetched, so savings can only be estimated.
+_TYPICAL_BYTES = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 30_000,
+    "stylesheet": 20_000,
+    "script": 25_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+_DEFAULT_BYTES = 10_000
+
+TRACKER_DOMAINS = frozenset({
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googletagmanager.com",
+    "google-analytics.com",
+    "googleadservices.com",
+    "adservice.google.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "segment.io",
+    "segment.com",
+    "mixpanel.com",
+    "amplitude.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "taboola.com",
+    "outbrain.com",
+    "criteo.com",
+    "adnxs.com",
+    "newrelic.com",
+    "nr-data.net",
+    "optimizely.com",
+    "clarity.ms",
+})
+
+
+@dataclass(frozen=True, slots=True)
+class BlockPolicy:
+    """Which requests to abort for a given tool."""
+
+    resource_types: frozenset[str] = frozenset()
+    domains: frozenset[str] = frozenset()
+
+    @property
+    def empty(self) -> bool:
+        return not self.resource_types and not self.domains
+
+    def blocks(self, request: Request) -> bool:
+        if request.resource_type in self.resource_types:
+            return True
+        if not self.domains:
+            return False
+        host = urlsplit(request.url).hostname or ""
+        return any(host == d or host.endswith("." + d) for d in self.domains)
+
+
+POLICIES = {
+    # Text extraction only needs the DOM.
+    "read_webpage": BlockPolicy(
+        frozenset({"image", "media", "font", "stylesheet"}),
+        TRACKER_DOMAINS,
+    ),
+    # The results page needs its scripts and CSS to render, but not pictures.
+    "web_search": BlockPolicy(frozenset({"image", "media", "font"}), TRACKER_DOMAINS),
+    # Screenshots must look like the real page.
+    "analyze_page_visual": BlockPolicy(),
+}
+
+
+@dataclass(slots=True)
+class LoadStats:
+    requests_allowed: int = 0
+    requests_blocked: int = 0
+    est_bytes_saved: int = 0
+    blocked_by_type: dict[str, int] = field(default_factory=dict)
+
+    def add(self, other: "LoadStats") -> None:
+        self.requests_allowed += other.requests_allowed
+        self.requests_blocked += other.requests_blocked
+        self.est_bytes_saved += other.est_bytes_saved
+        for kind, n in other.blocked_by_type.items():
+            self.blocked_by_type[kind] = self.blocked_by_type.get(kind, 0) + n
+
+
+class RequestFilter:
+    """Routes one page load through a BlockPolicy and counts what it saved.
+
+    Routing disables Chromium's HTTP cache for the page, so an empty policy
+    installs nothing.
+    """
+
+    def __init__(self, policy: BlockPolicy) -> None:
+        self.policy = policy
+        self.stats = LoadStats()
+        self._page: Page | None = None
+        self._main_frame = None
+
+    async def attach(self, page: Page) -> None:
+        if self.policy.empty:
+            return
+        self._page = page
+        self._main_frame = page.main_frame
+        await page.route("**/*", self._handle)
+
+    async def detach(self) -> None:
+        if self._page is not None:
+            await self._page.unroute("**/*", self._handle)
+            self._page = None
+
+    async def _handle(self, route: Route) -> None:
+        request = route.request
+        is_main_document = request.is_navigation_request() and request.frame == self._main_frame
+        if not is_main_document and self.policy.blocks(request):
+            kind = request.resource_type
+            self.stats.requests_blocked += 1
+            self.stats.est_bytes_saved += _TYPICAL_BYTES.get(kind, _DEFAULT_BYTES)
+            self.stats.blocked_by_type[kind] = self.stats.blocked_by_type.get(kind, 0) + 1
+            await route.abort("blockedbyclient")
+        else:
+            self.stats.requests_allowed += 1
+            await route.continue_()
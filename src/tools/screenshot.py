@@ -0,0 +1,143 @@
+import hashlib
+import io
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from loguru import logger
+
+try:
+    from PIL import Image
+except ImportError:  # a platform without a Pillow wheel: capture at the target width, exact-hash dedupe
+    Image = None
+
+# dHash grid side; 16 gives a 256-bit hash, fine enough to notice a changed chart or heading.
+HASH_SIZE = 16
+# Differing hash bits tolerated before a capture counts as a different page.
+HASH_DISTANCE = 3
+
+# Whether the no-Pillow fallback has been logged yet.
+_warned = False
+
+
+@dataclass(frozen=True, slots=True)
+class VisionImage:
+    data: bytes
+    media_type: str
+    fingerprint: str
+
+
+@dataclass(slots=True)
+class VisualStats:
+    captures: int = 0
+    reused: int = 0
+    raw_bytes: int = 0
+    sent_bytes: int = 0
+
+
+def capture_type(fmt: str) -> str:
+    """What to ask Chromium for: lossless PNG when Pillow re-encodes, else a format it can emit."""
+    if Image is not None or fmt == "png":
+        return "png"
+    return "jpeg"
+
+
+def capture_viewport(width: int, height: int, max_width: int) -> dict:
+    """The viewport to capture at.
+
+    With Pillow the capture is downscaled afterwards. Without it the page is
+    laid out at max_width instead (same aspect ratio), so Chromium's own
+    output is already small enough to send.
+    """
+    global _warned
+    if Image is not None or width <= max_width:
+        return {"width": width, "height": height}
+    if not _warned:
+        _warned = True
+        logger.warning(
+            f"[tool] Pillow is not installed; screenshots are captured at a {max_width}px viewport "
+            f"instead of being downscaled, and only byte-identical captures reuse an analysis"
+        )
+    return {"width": max_width, "height": round(height * max_width / width)}
+
+
+def _dhash(img) -> str:
+    small = img.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BOX)
+    px = small.tobytes()
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = bits << 1 | (px[offset + col] > px[offset + col + 1])
+    return f"d:{bits:0{HASH_SIZE * HASH_SIZE // 4}x}"
+
+
+def prepare_screenshot(raw: bytes, raw_type: str, max_width: int, fmt: str, quality: int) -> VisionImage:
+    """Downscale and re-encode a screenshot for vision input, and fingerprint it.
+
+    Runs in run_cpu. Without Pillow the capture (already taken at the width
+    capture_viewport chose) is passed through and the fingerprint is an exact
+    content hash.
+    """
+    if Image is None:
+        return VisionImage(raw, f"image/{raw_type}", f"s:{hashlib.sha256(raw).hexdigest()}")
+
+    with Image.open(io.BytesIO(raw)) as img:
+        img = img.convert("RGB")
+        fingerprint = _dhash(img)
+        if img.width > max_width:
+            img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+        out = io.BytesIO()
+        if fmt == "png":
+            img.save(out, "PNG", optimize=True)
+        elif fmt == "webp":
+            img.save(out, "WEBP", quality=quality, method=4)
+        else:
+            fmt = "jpeg"
+            img.save(out, "JPEG", quality=quality, optimize=True)
+    return VisionImage(out.getvalue(), f"image/{fmt}", fingerprint)
+
+
+def _distance(a: str, b: str) -> int:
+    if a[:2] != b[:2] or not a.startswith("d:"):
+        return 0 if a == b else HASH_SIZE * HASH_SIZE
+    return (int(a[2:], 16) ^ int(b[2:], 16)).bit_count()
+
+
+@dataclass(slots=True)
+class _Analysis:
+    fingerprint: str
+    text: str
+    created_at: float
+
+
+class VisualCache:
+    """Previous analyses keyed on (url, clip, query), reused while the page looks the same."""
+
+    def __init__(self, *, max_entries: int, ttl_s: float) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl_s = ttl_s
+        self._entries: OrderedDict[tuple[str, str, str], _Analysis] = OrderedDict()
+        self._stats = VisualStats()
+
+    def lookup(self, key: tuple[str, str, str], image: VisionImage, raw_size: int) -> str | None:
+        self._stats.captures += 1
+        self._stats.raw_bytes += raw_size
+        entry = self._entries.get(key)
+        if entry is None or time.time() - entry.created_at > self._ttl_s:
+            return None
+        if _distance(entry.fingerprint, image.fingerprint) > HASH_DISTANCE:
+            return None
+        self._entries.move_to_end(key)
+        self._stats.reused += 1
+        return entry.text
+
+    def store(self, key: tuple[str, str, str], image: VisionImage, text: str) -> None:
+        self._stats.sent_bytes += len(image.data)
+        self._entries[key] = _Analysis(image.fingerprint, text, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {**asdict(self._stats), "entries": len(self._entries), "pillow": Image is not None}
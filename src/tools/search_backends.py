@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+from src.core.config import settings
+from src.tools import http_client
+
+MAX_RESULTS = 5
+# Result count must hold still this long before the page counts as rendered.
+SETTLE_DEBOUNCE_MS = 250
+# Upper bound on waiting for the count to settle once the first result shows up.
+SETTLE_CAP_MS = 2000
+
+# DuckDuckGo's markup has changed over time; the first selector that matches wins.
+RESULT_SELECTORS = [
+    'article[data-testid="result"]',
+    "div.result",
+    "div[data-result]",
+    'li[data-layout="organic"]',
+]
+
+# Resolves with the result count once it has stopped changing for `debounce` ms,
+# or after `cap` ms regardless.
+SETTLE_JS = """([selectors, debounce, cap]) => new Promise(resolve => {
+    const count = () => {
+        for (const sel of selectors) {
+            const n = document.querySelectorAll(sel).length;
+            if (n) return n;
+        }
+        return 0;
+    };
+    let last = count();
+    let timer = null;
+    const done = () => {
+        observer.disconnect();
+        clearTimeout(timer);
+        clearTimeout(hard);
+        resolve(count());
+    };
+    const observer = new MutationObserver(() => {
+        const n = count();
+        if (n !== last) {
+            last = n;
+            clearTimeout(timer);
+            timer = setTimeout(done, debounce);
+        }
+    });
+    observer.observe(document.body, {childList: true, subtree: true});
+    timer = setTimeout(done, debounce);
+    const hard = setTimeout(done, cap);
+})"""
+
+SCRAPE_JS = """([selectors, limit]) => {
+    let elements = [];
+    for (const sel of selectors) {
+        elements = document.querySelectorAll(sel);
+        if (elements.length > 0) break;
+    }
+    const items = [];
+    for (const el of Array.from(elements).slice(0, limit)) {
+        const a = el.querySelector('a[href]');
+        const title = (
+            el.querySelector('h2') ||
+            el.querySelector('a[data-testid="result-title-a"]') ||
+            el.querySelector('.result__a') ||
+            a
+        );
+        const snippet = (
+            el.querySelector('[data-result="snippet"]') ||
+            el.querySelector('span[data-testid="result-snippet"]') ||
+            el.querySelector('.result__snippet') ||
+            el.querySelector('p')
+        );
+        if (a) {
+            items.push({
+                title: title ? title.innerText.trim() : '',
+                href: a.href || '',
+                snippet: snippet ? snippet.innerText.trim() : '',
+            });
+        }
+    }
+    return items;
+}"""
+
+
+@dataclass(slots=True)
+class StrategyStats:
+    served: int = 0
+    empty: int = 0
+    failed: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+
+    def record(self, elapsed: float, outcome: str) -> None:
+        if outcome == "served":
+            self.served += 1
+        elif outcome == "empty":
+            self.empty += 1
+        else:
+            self.failed += 1
+        self.total_s += elapsed
+        self.max_s = max(self.max_s, elapsed)
+
+    def as_dict(self) -> dict:
+        attempts = self.served + self.empty + self.failed
+        return {
+            "served": self.served,
+            "empty": self.empty,
+            "failed": self.failed,
+            "avg_ms": round(1000 * self.total_s / attempts, 1) if attempts else 0.0,
+            "max_ms": round(1000 * self.max_s, 1),
+        }
+
+
+def _unwrap_redirect(href: str) -> str:
+    """DuckDuckGo's HTML endpoint links through /l/?uddg=<target>."""
+    href = urljoin(settings.SEARCH_HTML_URL, href)
+    parts = urlsplit(href)
+    if parts.path == "/l/":
+        target = parse_qs(parts.query).get("uddg")
+        if target:
+            return target[0]
+    return href
+
+
+def parse_html_results(html: str, limit: int = MAX_RESULTS) -> list[dict]:
+    """Organic results from html.duckduckgo.com, in the same shape SCRAPE_JS returns."""
+    soup = BeautifulSoup(html, "html.parser")
+    items = []
+    for el in soup.select("div.result"):
+        if len(items) >= limit:
+            break
+        if "result--ad" in el.get("class", []):
+            continue
+        link = el.select_one("a.result__a")
+        if link is None or not link.get("href"):
+            continue
+        snippet = el.select_one(".result__snippet")
+        items.append({
+            "title": link.get_text(" ", strip=True),
+            "href": _unwrap_redirect(link["href"]),
+            "snippet": snippet.get_text(" ", strip=True) if snippet else "",
+        })
+    return items
+
+
+async def fetch_html_results(query: str) -> str:
+    """POST the query to DuckDuckGo's no-JS endpoint and return the result page HTML."""
+    session = http_client.get_session()
+    async with session.post(settings.SEARCH_HTML_URL, data={"q": query}, proxy=http_client.proxy()) as resp:
+        # Rate-limited or challenged requests come back as 202 with an anomaly page
+        if resp.status != 200:
+            raise RuntimeError(f"HTML search endpoint returned {resp.status}")
+        return await resp.text()
@@ -0,0 +1,251 @@
+import asyncio
+import fnmatch
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+
+from src.core.config import settings
+
+SKIP_DIRS = {".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", ".cache", ".mypy_cache"}
+MAX_INDEX_FILE_BYTES = 1_000_000
+# A full mtime walk runs at most this often; write_file updates are applied immediately.
+REFRESH_INTERVAL = 2.0
+MAX_LINES_PER_FILE = 5
+MAX_LINE_CHARS = 200
+SNIFF_BYTES = 4096
+
+# One regex escape with its operand, e.g. \x41, \u00e9, \N{DASH}, \12 or \.
+_ESCAPE = re.compile(r"\\(?:x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|N\{[^}]*\}|\d+|.|$)", re.DOTALL)
+
+
+@dataclass(slots=True)
+class _FileEntry:
+    mtime: float
+    size: int
+    trigrams: frozenset[str]
+
+
+def _trigrams(text: str) -> frozenset[str]:
+    return frozenset(text[i : i + 3] for i in range(len(text) - 2))
+
+
+def _class_end(pattern: str, start: int) -> int:
+    """Index of the ] closing the character class opened at start (len(pattern) if none)."""
+    i = start + 1
+    if pattern.startswith("^", i):
+        i += 1
+    if pattern.startswith("]", i):
+        i += 1  # a ] first in the class is a member, not the end
+    while i < len(pattern):
+        if pattern[i] == "\\":
+            i += 2
+            continue
+        if pattern[i] == "]":
+            return i
+        i += 1
+    return len(pattern)
+
+
+def _required_literals(pattern: str) -> list[str]:
+    """Literal runs (3+ chars) that every match of the regex must contain.
+
+    Conservative: only text at group depth 0 is used, and any alternation (or
+    verbose mode, where whitespace isn't literal) disables filtering altogether.
+    """
+    try:
+        if "|" in pattern or re.compile(pattern).flags & re.VERBOSE:
+            return []
+    except re.error:
+        return []
+    runs, current, depth, i = [], "", 0, 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            escape = _ESCAPE.match(pattern, i).group()
+            if len(escape) == 2 and not escape[1].isalnum() and depth == 0:
+                current += escape[1]
+            else:
+                runs.append(current)
+                current = ""
+            i += len(escape)
+            continue
+        if c in "*?{":
+            current = current[:-1]  # the previous character is optional
+        if c in ".^$*+?{}[]()":
+            runs.append(current)
+            current = ""
+            if c == "(":
+                depth += 1
+            elif c == ")":
+                depth = max(depth - 1, 0)
+            elif c == "[":
+                i = _class_end(pattern, i)
+            elif c == "{":
+                close = pattern.find("}", i + 2)
+                i = close if close != -1 else len(pattern)
+            i += 1
+            continue
+        if depth == 0:
+            current += c
+        i += 1
+    runs.append(current)
+    return [r for r in runs if len(r) >= 3]
+
+
+class WorkspaceIndex:
+    """In-process trigram index over the workspace, kept current by mtime.
+
+    Trigrams narrow a query down to candidate files; only those are opened and
+    scanned. Text files up to MAX_INDEX_FILE_BYTES have their content indexed;
+    larger files can still be found by glob.
+    """
+
+    def __init__(self) -> None:
+        self._files: dict[str, _FileEntry] = {}
+        self._postings: dict[str, set[str]] = {}
+        self._last_refresh = 0.0
+        self._lock = asyncio.Lock()
+        self.reindexed = 0
+
+    @property
+    def root(self) -> Path:
+        return Path(settings.WORKSPACE_DIR).resolve()
+
+    def _unindex(self, rel: str) -> None:
+        entry = self._files.pop(rel, None)
+        if entry is None:
+            return
+        for gram in entry.trigrams:
+            paths = self._postings.get(gram)
+            if paths is not None:
+                paths.discard(rel)
+                if not paths:
+                    del self._postings[gram]
+
+    def _index(self, rel: str, stat: os.stat_result) -> None:
+        self._unindex(rel)
+        trigrams: frozenset[str] = frozenset()
+        if stat.st_size <= MAX_INDEX_FILE_BYTES:
+            try:
+                data = (self.root / rel).read_bytes()
+            except OSError:
+                return
+            if b"\x00" not in data[:SNIFF_BYTES]:
+                trigrams = _trigrams(data.decode(errors="replace").lower())
+        self._files[rel] = _FileEntry(stat.st_mtime, stat.st_size, trigrams)
+        for gram in trigrams:
+            self._postings.setdefault(gram, set()).add(rel)
+        self.reindexed += 1
+
+    def _walk(self) -> None:
+        root = self.root
+        if not root.exists():
+            return
+        seen = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for name in filenames:
+                full = os.path.join(dirpath, name)
+                rel = os.path.relpath(full, root)
+                try:
+                    stat = os.stat(full)
+                except OSError:
+                    continue
+                seen.add(rel)
+                entry = self._files.get(rel)
+                if entry is None or entry.mtime != stat.st_mtime or entry.size != stat.st_size:
+                    self._index(rel, stat)
+        for rel in set(self._files) - seen:
+            self._unindex(rel)
+        self._last_refresh = time.monotonic()
+
+    def _update_file(self, target: Path) -> None:
+        try:
+            rel = os.path.relpath(target.resolve(), self.root)
+            self._index(rel, target.stat())
+        except (OSError, ValueError) as e:
+            logger.debug(f"[tool] search index update failed for {target}: {e}")
+
+    async def update_file(self, target: Path) -> None:
+        """Reindex one file right away (called after write_file)."""
+        if not self._files:
+            return  # never built; the first search walks everything anyway
+        async with self._lock:
+            await asyncio.to_thread(self._update_file, target)
+
+    def _search(self, query: str, regex: bool, glob: str | None, case_sensitive: bool, max_results: int) -> str:
+        if time.monotonic() - self._last_refresh > REFRESH_INTERVAL:
+            self._walk()
+
+        paths = sorted(self._files)
+        if glob:
+            paths = [p for p in paths if fnmatch.fnmatch(p, glob) or fnmatch.fnmatch(os.path.basename(p), glob)]
+        if not query:
+            shown = paths[:max_results]
+            more = f" (showing {len(shown)})" if len(paths) > len(shown) else ""
+            return f"{len(paths)} files match{more}:\n" + "\n".join(shown) if paths else "No files match."
+
+        try:
+            matcher = re.compile(query if regex else re.escape(query), 0 if case_sensitive else re.IGNORECASE)
+        except re.error as e:
+            return f"Invalid regex: {e}"
+
+        literals = _required_literals(query) if regex else [query]
+        candidates = set(paths)
+        for literal in literals:
+            for gram in _trigrams(literal.lower()):
+                candidates &= self._postings.get(gram, set())
+        indexed = [p for p in candidates if self._files[p].trigrams]
+
+        hits: list[tuple[int, str, list[str]]] = []
+        for rel in indexed:
+            try:
+                text = (self.root / rel).read_text(errors="replace")
+            except OSError:
+                continue
+            lines, count = [], 0
+            for line_no, line in enumerate(text.splitlines(), start=1):
+                if matcher.search(line):
+                    count += 1
+                    if len(lines) < MAX_LINES_PER_FILE:
+                        lines.append(f"{rel}:{line_no}: {line.strip()[:MAX_LINE_CHARS]}")
+            if count:
+                hits.append((count, rel, lines))
+
+        if not hits:
+            return f"No matches for {query!r}."
+        # More matches first; a hit in the file name counts extra; then shorter paths
+        hits.sort(key=lambda h: (-(h[0] + (5 if matcher.search(os.path.basename(h[1])) else 0)), len(h[1]), h[1]))
+        total = sum(h[0] for h in hits)
+        out, shown = [], 0
+        for _, _, lines in hits:
+            if shown >= max_results:
+                break
+            take = lines[: max_results - shown]
+            out.extend(take)
+            shown += len(take)
+        return f"{total} matches in {len(hits)} files (showing {shown}):\n" + "\n".join(out)
+
+    async def search(
+        self,
+        query: str = "",
+        regex: bool = False,
+        glob: str | None = None,
+        case_sensitive: bool = False,
+        max_results: int = 50,
+    ) -> str:
+        logger.info(f"[tool] search_workspace: {query!r} glob={glob}")
+        max_results = max(1, min(max_results, settings.SEARCH_MAX_RESULTS))
+        async with self._lock:
+            return await asyncio.to_thread(self._search, query, regex, glob, case_sensitive, max_results)
+
+    def stats(self) -> dict:
+        return {"files": len(self._files), "trigrams": len(self._postings), "reindexed": self.reindexed}
+
+
+# Shared singleton instance
+workspace_index = WorkspaceIndex()
@@ -0,0 +1,295 @@
+import asyncio
+import os
+import signal
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from loguru import logger
+
+from src.core.config import settings
+from src.tools.conversation import current_conversation
+
+SHELL_TIMEOUT = 30
+READ_CHUNK = 64 * 1024
+# After a kill, how long to wait for the pipes to drain before giving up on them.
+DRAIN_TIMEOUT = 2
+
+
+class HeadTailBuffer:
+    """Keeps the first and last `cap // 2` bytes of a stream, counting the rest."""
+
+    def __init__(self, cap: int) -> None:
+        self._half = max(cap // 2, 1)
+        self._head = bytearray()
+        self._tail = bytearray()
+        self.total = 0
+
+    def feed(self, data: bytes) -> None:
+        self.total += len(data)
+        room = self._half - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if data:
+            self._tail += data
+            if len(self._tail) > self._half:
+                del self._tail[: len(self._tail) - self._half]
+
+    @property
+    def dropped(self) -> int:
+        return self.total - len(self._head) - len(self._tail)
+
+    def __bool__(self) -> bool:
+        return self.total > 0
+
+    def render(self) -> str:
+        head = self._head.decode(errors="replace")
+        if not self.dropped:
+            return head + self._tail.decode(errors="replace")
+        return (
+            f"{head}\n...[{self.dropped} bytes omitted]...\n"
+            f"{self._tail.decode(errors='replace')}"
+        )
+
+
+async def _pump(stream: asyncio.StreamReader, buffer: HeadTailBuffer) -> None:
+    while chunk := await stream.read(READ_CHUNK):
+        buffer.feed(chunk)
+
+
+def _kill_group(proc: asyncio.subprocess.Process) -> None:
+    """Kill the command's whole process group, not just the shell."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _workspace() -> Path:
+    workspace = Path(settings.WORKSPACE_DIR).resolve()
+    workspace.mkdir(parents=True, exist_ok=True)
+    return workspace
+
+
+def _format(stdout: HeadTailBuffer, stderr: HeadTailBuffer, returncode: int | None, timed_out: bool) -> str:
+    parts = []
+    if timed_out:
+        parts.append(f"Command timed out after {SHELL_TIMEOUT}s; output collected so far:")
+    if stdout:
+        parts.append(f"stdout:\n{stdout.render()}")
+    if stderr:
+        parts.append(f"stderr:\n{stderr.render()}")
+    if not stdout and not stderr and not timed_out:
+        parts.append(f"(exit code {returncode})")
+    dropped = stdout.dropped + stderr.dropped
+    if dropped:
+        parts.append(f"(output capped at {settings.SHELL_OUTPUT_CAP} bytes per stream; {dropped} bytes dropped)")
+    return "\n".join(parts)
+
+
+async def execute_shell(command: str) -> str:
+    logger.info(f"[tool] execute_shell: {command}")
+    conversation = current_conversation.get()
+    if settings.SHELL_SESSIONS and conversation:
+        result = await shell_sessions.run(conversation, command)
+        if result is not None:
+            return result
+    return await _run_once(command)
+
+
+async def _run_once(command: str) -> str:
+    """Run one command in a fresh shell."""
+    workspace = _workspace()
+    proc = await asyncio.create_subprocess_shell(
+        command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=str(workspace),
+        start_new_session=True,
+    )
+    stdout = HeadTailBuffer(settings.SHELL_OUTPUT_CAP)
+    stderr = HeadTailBuffer(settings.SHELL_OUTPUT_CAP)
+    pumps = asyncio.gather(_pump(proc.stdout, stdout), _pump(proc.stderr, stderr))
+    timed_out = finished = False
+    try:
+        await asyncio.wait_for(asyncio.shield(pumps), timeout=SHELL_TIMEOUT)
+        await proc.wait()
+        finished = True
+    except asyncio.TimeoutError:
+        timed_out = True
+    finally:
+        if not finished:
+            # Even if the shell itself has exited: a child it left in the
+            # background may still hold the pipes open.
+            _kill_group(proc)
+        try:
+            # Collect whatever was still buffered in the pipes after the kill
+            await asyncio.wait_for(pumps, timeout=DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass  # wait_for has already cancelled the pumps
+        if proc.returncode is None:
+            await proc.wait()
+
+    return _format(stdout, stderr, proc.returncode, timed_out)
+
+
+async def _read_until(stream: asyncio.StreamReader, marker: bytes, buffer: HeadTailBuffer) -> bytes:
+    """Feed stream into buffer up to marker; return the rest of the marker's line."""
+    pending = b""
+    keep = len(marker) - 1
+    while True:
+        chunk = await stream.read(READ_CHUNK)
+        if not chunk:
+            buffer.feed(pending)
+            raise EOFError("shell exited")
+        pending += chunk
+        index = pending.find(marker)
+        if index >= 0:
+            buffer.feed(pending[:index])
+            rest = pending[index + len(marker):]
+            while b"\n" not in rest and (more := await stream.read(READ_CHUNK)):
+                rest += more
+            return rest.split(b"\n", 1)[0]
+        # Hold back a marker-sized tail in case the marker straddles two chunks
+        buffer.feed(pending[: len(pending) - keep])
+        pending = pending[len(pending) - keep:]
+
+
+class ShellSession:
+    """A long-lived /bin/sh whose cwd and environment persist between commands.
+
+    Each command is wrapped so that, once it finishes, the shell prints a
+    per-session sentinel (plus the exit code) on stdout and stderr. Output is
+    read up to those sentinels. Commands get /dev/null as stdin so they cannot
+    swallow the framing.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.last_used = time.monotonic()
+        self._sentinel = f"__clawdius_{uuid.uuid4().hex}__"
+        self._proc: asyncio.subprocess.Process | None = None
+        self._lock = asyncio.Lock()
+        # Callers handed this session that haven't finished with it yet
+        self.pending = 0
+
+    @property
+    def busy(self) -> bool:
+        return self.pending > 0 or self._lock.locked()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.returncode is None
+
+    async def _start(self) -> None:
+        self._proc = await asyncio.create_subprocess_exec(
+            "/bin/sh",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=str(_workspace()),
+            start_new_session=True,
+        )
+        logger.info(f"[tool] Started shell session {self.key} (pid {self._proc.pid})")
+
+    async def run(self, command: str) -> str:
+        async with self._lock:
+            self.last_used = time.monotonic()
+            if not self.alive:
+                await self._start()
+            proc = self._proc
+            marker = f"\n{self._sentinel}".encode()
+            script = (
+                f"{{ {command}\n}} </dev/null\n"
+                f"__rc=$?; printf '\\n{self._sentinel} %s\\n' \"$__rc\"; printf '\\n{self._sentinel}\\n' >&2\n"
+            )
+            proc.stdin.write(script.encode())
+            await proc.stdin.drain()
+
+            stdout = HeadTailBuffer(settings.SHELL_OUTPUT_CAP)
+            stderr = HeadTailBuffer(settings.SHELL_OUTPUT_CAP)
+            reads = asyncio.gather(
+                _read_until(proc.stdout, marker, stdout),
+                _read_until(proc.stderr, marker, stderr),
+            )
+            try:
+                trailer, _ = await asyncio.wait_for(reads, timeout=SHELL_TIMEOUT)
+            except asyncio.TimeoutError:
+                await self.close()
+                return _format(stdout, stderr, None, True) + "\n(shell session was reset)"
+            except EOFError:
+                await self.close()
+                return _format(stdout, stderr, proc.returncode, False) + "\n(shell exited; session was reset)"
+            except BaseException:
+                await self.close()
+                raise
+            finally:
+                self.last_used = time.monotonic()
+
+            try:
+                returncode = int(trailer.strip())
+            except ValueError:
+                returncode = None
+            return _format(stdout, stderr, returncode, False)
+
+    async def close(self) -> None:
+        if self.alive:
+            _kill_group(self._proc)
+            await self._proc.wait()
+        self._proc = None
+
+
+class ShellSessionManager:
+    """Per-conversation shell sessions with a size cap and idle eviction."""
+
+    def __init__(self) -> None:
+        self._sessions: OrderedDict[str, ShellSession] = OrderedDict()
+        # Held from the cap check until the new session is in _sessions, so
+        # concurrent conversations can't all squeeze past SHELL_MAX_SESSIONS
+        self._lock = asyncio.Lock()
+
+    async def run(self, key: str, command: str) -> str | None:
+        """Run command in key's session; None if no session slot is free."""
+        async with self._lock:
+            await self._evict_idle()
+            session = self._sessions.get(key)
+            if session is None:
+                if len(self._sessions) >= settings.SHELL_MAX_SESSIONS and not await self._evict_lru():
+                    logger.warning(f"[tool] No free shell session for {key}; running one-shot")
+                    return None
+                session = self._sessions[key] = ShellSession(key)
+            self._sessions.move_to_end(key)
+            session.pending += 1  # not evictable until this command is done
+        try:
+            return await session.run(command)
+        finally:
+            session.pending -= 1
+
+    async def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - settings.SHELL_SESSION_IDLE
+        for key, session in list(self._sessions.items()):
+            if not session.busy and session.last_used < cutoff:
+                await self.close(key)
+
+    async def _evict_lru(self) -> bool:
+        for key, session in self._sessions.items():
+            if not session.busy:
+                await self.close(key)
+                return True
+        return False
+
+    async def close(self, key: str) -> None:
+        session = self._sessions.pop(key, None)
+        if session is not None:
+            await session.close()
+            logger.info(f"[tool] Closed shell session {key}")
+
+    async def close_all(self) -> None:
+        for key in list(self._sessions):
+            await self.close(key)
+
+
+# Shared singleton instance
+shell_sessions = ShellSessionManager()
@@ -0,0 +1,144 @@
+"""Tool worker process, spawned by ToolWorkerPool.
+
+    python -m src.tools.tool_worker <socket path> <worker index>
+
+Connects back to the bot over its Unix socket and runs the tool calls it is
+sent, each as its own task, cancelling one when the bot sends a cancel for it.
+LLM calls are forwarded to the bot. Exits when the bot closes the connection.
+"""
+
+import asyncio
+import os
+import sys
+
+from loguru import logger
+
+from src.core.executor import shutdown_executor
+from src.core.gateway import llm_gateway
+from src.core.tracing import tracer
+from src.tools.browser import browser_manager
+from src.tools.conversation import current_conversation
+from src.tools.registry import DISPATCH, end_conversation
+from src.tools.shell import shell_sessions
+from src.tools.workers import STREAM_LIMIT, ToolWorkerError, post_message, read_message, send_message
+
+
+class _Connection:
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self._writer = writer
+        self._lock = asyncio.Lock()
+        self._pending: dict[int, asyncio.Future] = {}
+        self._ids = 0
+
+    async def reply(self, message: dict) -> None:
+        async with self._lock:
+            await send_message(self._writer, message)
+
+    async def request(self, message: dict) -> dict:
+        """Ask the bot to do something for us and wait for its answer."""
+        self._ids += 1
+        request_id = self._ids
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self.reply({"id": request_id, **message})
+            return await future
+        except asyncio.CancelledError:
+            if not self._writer.is_closing():
+                post_message(self._writer, {"op": "cancel", "id": request_id})
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+
+    def answer(self, message: dict) -> None:
+        future = self._pending.pop(message["id"], None)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    async def create_message(self, kwargs: dict) -> dict:
+        """llm_gateway.create, run by the bot's gateway."""
+        reply = await self.request({"op": "llm", "kwargs": kwargs})
+        if "error" in reply:
+            raise ToolWorkerError(reply["error"])
+        return reply["result"]
+
+
+async def _call(message: dict) -> dict:
+    name = message["tool"]
+    fn = DISPATCH.get(name)
+    if fn is None:
+        return {"error": f"Unknown tool: {name}"}
+    current_conversation.set(message.get("conversation"))
+    with tracer.remote(message.get("request_id"), message.get("parent_id")) as spans:
+        try:
+            result = {"result": await fn(**message["args"])}
+        except Exception as e:
+            result = {"error": str(e)}
+    return {**result, "spans": spans}
+
+
+async def _handle(message: dict, connection: _Connection) -> None:
+    op = message.get("op")
+    if op == "call":
+        reply = await _call(message)
+    elif op == "end":
+        await end_conversation(message["conversation"])
+        reply = {"result": "ok"}
+    elif op == "ping":
+        reply = {"result": "pong", "browser": browser_manager.governor_stats()}
+    else:
+        reply = {"error": f"Unknown op: {op}"}
+    try:
+        await connection.reply({"id": message["id"], **reply})
+    except ConnectionError:
+        pass  # the bot went away; the read loop will notice
+
+
+async def _prewarm() -> None:
+    try:
+        await browser_manager.start()
+    except Exception as e:
+        logger.error(f"Browser pre-warm failed: {e}")
+
+
+async def serve(socket_path: str, index: int) -> None:
+    reader, writer = await asyncio.open_unix_connection(socket_path, limit=STREAM_LIMIT)
+    connection = _Connection(writer)
+    llm_gateway.delegate_to(connection.create_message)
+    await connection.reply({"worker": index, "pid": os.getpid()})
+    tasks: set[asyncio.Task] = {asyncio.create_task(_prewarm())}
+    calls: dict[int, asyncio.Task] = {}
+    try:
+        while message := await read_message(reader):
+            op = message.get("op")
+            if op is None:
+                connection.answer(message)
+            elif op == "cancel":
+                if (task := calls.pop(message["id"], None)) is not None:
+                    task.cancel()
+            else:
+                task = asyncio.create_task(_handle(message, connection))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                calls[message["id"]] = task
+                task.add_done_callback(lambda _, request_id=message["id"]: calls.pop(request_id, None))
+    except ConnectionError:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await shell_sessions.close_all()
+        await browser_manager.close()
+        shutdown_executor()
+
+
+def main() -> None:
+    socket_path, index = sys.argv[1], int(sys.argv[2])
+    logger.remove()
+    logger.add(sys.stderr, format=f"<green>{{time:HH:mm:ss.SSS}}</green> | {{level: <8}} | worker {index} | {{message}}")
+    asyncio.run(serve(socket_path, index))
+
+
+if __name__ == "__main__":
+    main()
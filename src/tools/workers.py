@@ -0,0 +1,375 @@
+import asyncio
+import json
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from loguru import logger
+
+from src.core.config import settings
+from src.core.procfs import descendants
+from src.core.tracing import tracer
+from src.tools.conversation import current_conversation
+
+PING_INTERVAL = 5.0
+# A worker whose event loop can't answer a ping within this long is treated as hung.
+PING_TIMEOUT = 10.0
+CONNECT_TIMEOUT = 60.0
+STOP_GRACE = 5.0
+RESTART_DELAY = 0.5
+MAX_RESTART_DELAY = 30.0
+# A worker that stays up this long resets its restart backoff.
+STABLE_AFTER = 60.0
+# Largest single IPC message (a tool result plus its spans).
+STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class ToolWorkerError(Exception):
+    """A tool call was lost because its worker crashed, hung or was unreachable."""
+
+
+async def send_message(writer: asyncio.StreamWriter, message: dict) -> None:
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+def post_message(writer: asyncio.StreamWriter, message: dict) -> None:
+    """Queue a message without waiting for it to drain; safe while being cancelled."""
+    writer.write(json.dumps(message).encode() + b"\n")
+
+
+async def read_message(reader: asyncio.StreamReader) -> dict | None:
+    line = await reader.readline()
+    return json.loads(line) if line else None
+
+
+@dataclass(slots=True, eq=False)
+class _Worker:
+    index: int
+    proc: asyncio.subprocess.Process | None = None
+    writer: asyncio.StreamWriter | None = None
+    connected: asyncio.Event = field(default_factory=asyncio.Event)
+    pending: dict[int, asyncio.Future] = field(default_factory=dict)
+    # LLM calls the worker asked us to make, by the worker's request id
+    serving: dict[int, asyncio.Task] = field(default_factory=dict)
+    inflight: int = 0
+    calls: int = 0
+    restarts: int = 0
+    started_at: float = 0.0
+    restart_delay: float = RESTART_DELAY
+    restarting: bool = False
+    # Browser governor stats, as of the last ping
+    browser: dict = field(default_factory=dict)
+
+    @property
+    def up(self) -> bool:
+        return self.connected.is_set() and not self.restarting
+
+    def fail_pending(self, reason: str) -> None:
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ToolWorkerError(reason))
+        self.pending.clear()
+        for task in self.serving.values():
+            task.cancel()
+        self.serving.clear()
+
+
+class ToolWorkerPool:
+    """Runs tool calls in child processes, so they can't stall the Discord loop.
+
+    Each worker is `python -m src.tools.tool_worker` with its own
+    BrowserManager, caches and shell sessions, talking newline-delimited JSON
+    over a Unix socket. A conversation is pinned to the least-loaded worker on
+    its first call and stays there, so shell sessions, page cache pages and
+    prefetches are where its later calls look for them. Workers send their LLM
+    calls back here, so they share this process's gateway and its limits.
+
+    Workers are pinged every PING_INTERVAL; one that exits or stops answering
+    is killed along with its process group (Chromium included), its in-flight
+    calls fail with ToolWorkerError and it is restarted with backoff.
+    """
+
+    def __init__(self, size: int, call_timeout: float) -> None:
+        self.size = size
+        self._call_timeout = call_timeout
+        self._workers = [_Worker(index) for index in range(size)]
+        self._pins: dict[str, _Worker] = {}
+        self._ids = 0
+        self._dir: Path | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._monitor: asyncio.Task | None = None
+        self._background: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    @property
+    def _socket_path(self) -> str:
+        return str(self._dir / "tools.sock")
+
+    async def start(self) -> None:
+        """Listen on the IPC socket and spawn the workers (no-op when TOOL_WORKERS=0)."""
+        if not self.enabled or self._server is not None:
+            return
+        self._dir = Path(tempfile.mkdtemp(prefix="clawdius-tools-"))
+        self._server = await asyncio.start_unix_server(self._on_connect, self._socket_path, limit=STREAM_LIMIT)
+        for worker in self._workers:
+            await self._spawn(worker)
+        self._monitor = asyncio.create_task(self._watch())
+        logger.info(f"[tool] Started {self.size} tool worker(s)")
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._monitor.cancel()
+        self._monitor = None
+        for task in list(self._background):
+            task.cancel()
+        for worker in self._workers:
+            worker.restarting = True
+            worker.fail_pending("tool workers are shutting down")
+            if worker.writer is not None:
+                worker.writer.close()  # the worker cleans up and exits when its connection closes
+        for worker in self._workers:
+            if worker.proc is None:
+                continue
+            try:
+                await asyncio.wait_for(worker.proc.wait(), STOP_GRACE)
+            except asyncio.TimeoutError:
+                _kill_tree(worker.proc)
+        self._server.close()
+        self._server = None
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    # --- process management ---
+
+    async def _spawn(self, worker: _Worker) -> None:
+        worker.connected.clear()
+        worker.writer = None
+        env = {**os.environ, "TOOL_WORKERS": "0", "METRICS_PORT": "0", "TRACE_FILE": ""}
+        worker.proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "src.tools.tool_worker", self._socket_path, str(worker.index),
+            stdin=asyncio.subprocess.DEVNULL,
+            env=env,
+            start_new_session=True,  # its own process group, so Chromium dies with it
+        )
+        worker.started_at = time.monotonic()
+        worker.restarting = False
+
+    async def _on_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        hello = await read_message(reader)
+        worker = self._workers[hello["worker"]] if hello and 0 <= hello.get("worker", -1) < self.size else None
+        if worker is None or worker.proc is None or hello.get("pid") != worker.proc.pid:
+            writer.close()  # a worker we already gave up on
+            return
+        worker.writer = writer
+        worker.connected.set()
+        logger.info(f"[tool] Worker {worker.index} ready (pid {worker.proc.pid})")
+        reason = "exited"
+        try:
+            while message := await read_message(reader):
+                if "op" in message:
+                    self._serve(worker, writer, message)
+                    continue
+                future = worker.pending.pop(message["id"], None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except (ConnectionError, ValueError) as e:
+            reason = f"dropped its connection ({e})"
+        finally:
+            writer.close()
+            if worker.writer is writer:  # not a worker we are already restarting
+                self._restart_soon(worker, reason)
+
+    def _serve(self, worker: _Worker, writer: asyncio.StreamWriter, message: dict) -> None:
+        """Handle a request from a worker: an LLM call, or cancelling one."""
+        if message["op"] == "cancel":
+            task = worker.serving.pop(message["id"], None)
+            if task is not None:
+                task.cancel()
+            return
+        task = asyncio.create_task(self._forward(writer, message))
+        worker.serving[message["id"]] = task
+        task.add_done_callback(lambda _, request_id=message["id"]: worker.serving.pop(request_id, None))
+
+    async def _forward(self, writer: asyncio.StreamWriter, message: dict) -> None:
+        if message["op"] == "llm":
+            # Imported here: the bot loads this module at startup, before anthropic is needed
+            from src.core.gateway import llm_gateway
+
+            try:
+                response = await llm_gateway.create(**message["kwargs"])
+                reply = {"result": response.model_dump(mode="json")}
+            except Exception as e:
+                reply = {"error": f"{type(e).__name__}: {e}"}
+        else:
+            reply = {"error": f"Unknown op: {message['op']}"}
+        try:
+            await send_message(writer, {"id": message["id"], **reply})
+        except ConnectionError:
+            pass  # the worker went away; _on_connect restarts it
+
+    def _restart_soon(self, worker: _Worker, reason: str) -> None:
+        if worker.restarting or self._server is None:
+            return
+        worker.restarting = True
+        task = asyncio.create_task(self._restart(worker, reason))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _restart(self, worker: _Worker, reason: str) -> None:
+        logger.warning(f"[tool] Worker {worker.index} {reason}; restarting")
+        worker.connected.clear()
+        worker.writer = None
+        worker.fail_pending(f"tool worker {worker.index} {reason}")
+        for conversation in [c for c, w in self._pins.items() if w is worker]:
+            del self._pins[conversation]
+        if worker.proc is not None:
+            _kill_tree(worker.proc)
+            await worker.proc.wait()
+
+        if time.monotonic() - worker.started_at > STABLE_AFTER:
+            worker.restart_delay = RESTART_DELAY
+        await asyncio.sleep(worker.restart_delay)
+        worker.restart_delay = min(worker.restart_delay * 2, MAX_RESTART_DELAY)
+        worker.restarts += 1
+        await self._spawn(worker)
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(PING_INTERVAL)
+            for worker in self._workers:
+                if worker.restarting:
+                    continue
+                if worker.proc.returncode is not None:
+                    self._restart_soon(worker, f"exited with status {worker.proc.returncode}")
+                elif not worker.connected.is_set():
+                    if time.monotonic() - worker.started_at > CONNECT_TIMEOUT:
+                        self._restart_soon(worker, "never connected")
+                else:
+                    task = asyncio.create_task(self._ping(worker))
+                    self._background.add(task)
+                    task.add_done_callback(self._background.discard)
+
+    async def _ping(self, worker: _Worker) -> None:
+        try:
+            reply = await self._request(worker, {"op": "ping"}, PING_TIMEOUT)
+            worker.browser = reply.get("browser", {})
+        except ToolWorkerError:
+            pass  # already being restarted
+        except asyncio.TimeoutError:
+            self._restart_soon(worker, f"missed a ping for {PING_TIMEOUT:.0f}s")
+
+    # --- calls ---
+
+    async def _request(self, worker: _Worker, message: dict, timeout: float) -> dict:
+        self._ids += 1
+        request_id = self._ids
+        future = asyncio.get_running_loop().create_future()
+        if worker.writer is None:
+            raise ToolWorkerError(f"tool worker {worker.index} is not connected")
+        worker.pending[request_id] = future
+        try:
+            await send_message(worker.writer, {"id": request_id, **message})
+            return await asyncio.wait_for(future, timeout)
+        except ConnectionError as e:
+            raise ToolWorkerError(f"tool worker {worker.index} unreachable: {e}") from e
+        except asyncio.CancelledError:
+            # The caller gave up (the Discord request was cancelled); stop the tool too
+            if worker.writer is not None and not worker.writer.is_closing():
+                post_message(worker.writer, {"op": "cancel", "id": request_id})
+            raise
+        finally:
+            worker.pending.pop(request_id, None)
+
+    def _route(self, conversation: str | None) -> _Worker:
+        worker = self._pins.get(conversation) if conversation else None
+        if worker is None:
+            pinned = {w.index: 0 for w in self._workers}
+            for w in self._pins.values():
+                pinned[w.index] += 1
+            candidates = [w for w in self._workers if w.up] or self._workers
+            worker = min(candidates, key=lambda w: (w.inflight, pinned[w.index]))
+            if conversation:
+                self._pins[conversation] = worker
+        return worker
+
+    async def call(self, name: str, args: dict) -> str:
+        """Run a registry tool in a worker and return its result."""
+        worker = self._route(current_conversation.get())
+        worker.inflight += 1
+        try:
+            await asyncio.wait_for(worker.connected.wait(), CONNECT_TIMEOUT)
+            reply = await self._request(
+                worker,
+                {"op": "call", "tool": name, "args": args, "conversation": current_conversation.get(), **tracer.context()},
+                self._call_timeout,
+            )
+        except asyncio.TimeoutError:
+            if not worker.connected.is_set():
+                raise ToolWorkerError(f"tool worker {worker.index} is not available") from None
+            # The worker may be wedged in native code; only a restart frees it.
+            self._restart_soon(worker, f"ran {name} past {self._call_timeout:.0f}s")
+            raise ToolWorkerError(f"{name} timed out after {self._call_timeout:.0f}s") from None
+        finally:
+            worker.inflight -= 1
+        worker.calls += 1
+        tracer.ingest(reply.get("spans", []))
+        if "error" in reply:
+            raise ToolWorkerError(reply["error"])
+        return reply["result"]
+
+    async def wait_ready(self) -> None:
+        """Wait until every worker has connected (they warm their browsers as they start)."""
+        await asyncio.gather(*(w.connected.wait() for w in self._workers))
+
+    async def end_conversation(self, conversation_id: str) -> None:
+        """Release the conversation's state in the worker it was pinned to."""
+        worker = self._pins.pop(conversation_id, None)
+        if worker is None or not worker.up:
+            return
+        try:
+            await self._request(worker, {"op": "end", "conversation": conversation_id}, PING_TIMEOUT)
+        except (ToolWorkerError, asyncio.TimeoutError) as e:
+            logger.warning(f"[tool] Worker {worker.index} did not end conversation {conversation_id}: {e}")
+
+    def browser_stats(self) -> dict[str, dict]:
+        """Each worker's browser governor stats, keyed by worker index."""
+        return {str(w.index): w.browser for w in self._workers}
+
+    def stats(self) -> dict:
+        return {
+            "workers": [
+                {
+                    "index": w.index,
+                    "pid": w.proc.pid if w.proc else None,
+                    "up": w.up,
+                    "inflight": w.inflight,
+                    "calls": w.calls,
+                    "restarts": w.restarts,
+                    "conversations": sum(1 for pinned in self._pins.values() if pinned is w),
+                }
+                for w in self._workers
+            ],
+        }
+
+
+def _kill_tree(proc: asyncio.subprocess.Process) -> None:
+    """SIGKILL a worker with Chromium, shell sessions and anything else it started."""
+    # Shell sessions start their own groups, so the worker's group alone isn't enough
+    for group in {info.pgrp for info in descendants(proc.pid)} | {proc.pid}:
+        try:
+            os.killpg(group, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+# Shared singleton instance
+tool_workers = ToolWorkerPool(settings.TOOL_WORKERS, settings.TOOL_WORKER_TIMEOUT)
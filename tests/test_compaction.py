@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+from src.core.compaction import EXPAND_TOOL, MIN_COMPACT_CHARS, TranscriptCompactor, estimate_tokens
+
+
+def _transcript(*results: str) -> list:
+    """A user prompt followed by one tool call and result per entry."""
+    messages = [{"role": "user", "content": "hi"}]
+    for n, content in enumerate(results):
+        call = SimpleNamespace(type="tool_use", id=f"t{n}", name="read_webpage", input={"url": f"https://a.test/{n}"})
+        messages.append({"role": "assistant", "content": [call]})
+        messages.append({"role": "user", "content": [{"type": "tool_result", "tool_use_id": f"t{n}", "content": content}]})
+    return messages
+
+
+def _result(messages: list, n: int) -> str:
+    return messages[2 + 2 * n]["content"][0]["content"]
+
+
+def test_under_budget_is_untouched():
+    messages = _transcript("x" * 4000, "y" * 4000)
+    TranscriptCompactor(budget_tokens=10_000, keep_recent=0).compact(messages)
+    assert _result(messages, 0) == "x" * 4000
+
+
+def test_compacts_oldest_first_and_keeps_recent():
+    messages = _transcript("a" * 8000, "b" * 8000, "c" * 8000, "d" * 8000)
+    compactor = TranscriptCompactor(budget_tokens=6500, keep_recent=1)
+    compactor.compact(messages)
+
+    assert _result(messages, 0).startswith("[Compacted read_webpage result (8000 chars)")
+    assert f'{EXPAND_TOOL} with tool_use_id="t0"' in _result(messages, 0)
+    assert _result(messages, 3) == "d" * 8000  # the newest is never compacted
+    # Stops once under the low-water mark instead of compacting everything
+    assert _result(messages, 2) == "c" * 8000
+    assert estimate_tokens(messages) <= 6500 * 0.7
+
+
+def test_short_results_are_left_alone():
+    short = "s" * (MIN_COMPACT_CHARS - 1)
+    messages = _transcript(short, "b" * 20_000, "c" * 100)
+    TranscriptCompactor(budget_tokens=1000, keep_recent=1).compact(messages)
+    assert _result(messages, 0) == short
+    assert _result(messages, 1).startswith("[Compacted")
+
+
+def test_expand_returns_original():
+    messages = _transcript("a" * 8000, "b" * 100)
+    compactor = TranscriptCompactor(budget_tokens=100, keep_recent=1)
+    compactor.compact(messages)
+    assert compactor.expand("t0") == "a" * 8000
+    assert compactor.expand("t9") == "No compacted result with tool_use_id=t9."
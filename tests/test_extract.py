@@ -0,0 +1,47 @@
+import pytest
+
+from src.tools.extract import split_pages
+
+
+def test_short_text_is_one_page():
+    assert split_pages("hello", 100) == ["hello"]
+    assert split_pages("", 100) == [""]
+
+
+def test_prefers_paragraph_breaks():
+    text = "a" * 60 + "\n\n" + "b" * 30 + "\n" + "c" * 30
+    assert split_pages(text, 100) == ["a" * 60, "b" * 30 + "\n" + "c" * 30]
+
+
+def test_falls_back_to_line_breaks():
+    text = "a" * 70 + "\n" + "b" * 70
+    assert split_pages(text, 100) == ["a" * 70, "b" * 70]
+
+
+def test_ignores_breaks_in_first_half_of_page():
+    # A break this early would leave a tiny page; cut hard at the size instead
+    text = "a" * 10 + "\n\n" + "b" * 200
+    pages = split_pages(text, 100)
+    assert pages[0] == "a" * 10 + "\n\n" + "b" * 88
+    assert "".join(pages) == text
+
+
+@pytest.mark.parametrize("size", [50, 97, 400])
+def test_pages_fit_and_keep_all_text(size):
+    text = "\n\n".join(f"Paragraph {n}. " + "word " * (n % 17) for n in range(80))
+    pages = split_pages(text, size)
+    assert all(len(page) <= size for page in pages)
+    assert "".join(pages).replace("\n", "") == text.replace("\n", "")
+
+
+@pytest.mark.parametrize("size", [0, -5])
+def test_rejects_non_positive_size(size):
+    with pytest.raises(ValueError):
+        split_pages("hello", size)
+
+
+def test_size_one_terminates():
+    text = "a\nb\n\nc"
+    pages = split_pages(text, 1)
+    assert all(len(page) <= 1 for page in pages)
+    assert "".join(pages) == "abc"
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from src.core.config import settings
+from src.tools import files
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "WORKSPACE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _patched(tmp_path, original: bytes, content: str, start: int, end: int) -> tuple[bytes, int]:
+    target = tmp_path / "f.txt"
+    target.write_bytes(original)
+    replaced = files._patch_lines(target, content, start, end)
+    return target.read_bytes(), replaced
+
+
+def test_patch_replaces_range(tmp_path):
+    assert _patched(tmp_path, b"a\nb\nc\nd\n", "X\nY", 2, 3) == (b"a\nX\nY\nd\n", 2)
+
+
+def test_patch_inserts_when_end_before_start(tmp_path):
+    assert _patched(tmp_path, b"a\nb\n", "X", 2, 1) == (b"a\nX\nb\n", 0)
+
+
+def test_patch_empty_content_deletes(tmp_path):
+    assert _patched(tmp_path, b"a\nb\nc\n", "", 2, 2) == (b"a\nc\n", 1)
+
+
+def test_patch_past_end_appends(tmp_path):
+    # The missing final newline is added before the new line
+    assert _patched(tmp_path, b"a\nb", "X", 5, 5) == (b"a\nb\nX\n", 0)
+
+
+def test_patch_leaves_no_temp_file(tmp_path):
+    _patched(tmp_path, b"a\n", "X", 1, 1)
+    assert [p.name for p in tmp_path.iterdir()] == ["f.txt"]
+
+
+def test_read_end_line_zero_is_not_end_of_file(workspace):
+    (workspace / "f.txt").write_text("a\nb\nc\n")
+    result = asyncio.run(files.read_file("f.txt", start_line=2, end_line=0))
+    assert result.endswith("showing lines 2-2]\nb\n")
+
+
+def test_read_to_end_of_file(workspace):
+    (workspace / "f.txt").write_text("a\nb\nc\n")
+    result = asyncio.run(files.read_file("f.txt", start_line=2))
+    assert result.endswith("showing lines 2-3]\nb\nc\n")
+
+
+def test_read_start_line_past_end(workspace):
+    (workspace / "f.txt").write_text("a\nb\nc\n")
+    result = asyncio.run(files.read_file("f.txt", start_line=4))
+    assert result == "start_line 4 is beyond end of file (3 lines)"
+
+
+def test_patch_keeps_file_mode(tmp_path):
+    target = tmp_path / "f.txt"
+    target.write_bytes(b"a\n")
+    target.chmod(0o755)
+    files._patch_lines(target, "X", 1, 1)
+    assert target.stat().st_mode & 0o777 == 0o755
+
+
+def test_paged_reads_count_lines_once(workspace, monkeypatch):
+    monkeypatch.setattr(settings, "READ_FILE_CAP", 16)
+    target = workspace / "f.txt"
+    target.write_text("line\n" * 100)
+    counted = []
+    count_lines = files._count_lines
+    monkeypatch.setattr(files, "_count_lines", lambda *a: counted.append(a) or count_lines(*a))
+
+    asyncio.run(files.read_file("f.txt", start_line=1, end_line=2))
+    asyncio.run(files.read_file("f.txt", start_line=3, end_line=4))
+    assert len(counted) == 1
+
+    target.write_text("line\n" * 120)
+    result = asyncio.run(files.read_file("f.txt", start_line=5, end_line=6))
+    assert len(counted) == 2
+    assert "120 lines" in result
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from src.tools.page_cache import CacheEntry, PageCache, normalize_url
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("HTTPS://Example.COM/a?b=2&a=1#frag", "https://example.com/a?a=1&b=2"),
+        ("http://example.com:80", "http://example.com/"),
+        ("https://example.com:8443/x", "https://example.com:8443/x"),
+        ("https://example.com/?utm_source=x&fbclid=y&q=1", "https://example.com/?q=1"),
+        ("  https://example.com/?empty=  ", "https://example.com/?empty="),
+    ],
+)
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def _entry(url: str, value: str, age: float = 0.0, etag: str | None = None) -> CacheEntry:
+    return CacheEntry(url=url, value=value, fetched_at=time.time() - age, etag=etag)
+
+
+def test_revalidate_keeps_current_entry():
+    async def main():
+        cache = PageCache(max_entries=10, ttl_s=60)
+        await cache.put("https://a.test/", _entry("https://a.test/", "old", age=120, etag='"1"'))
+
+        async def revalidate(entry):
+            return entry
+
+        value = await cache.get_or_fetch("https://a.test/", lambda: pytest.fail("fetched"), revalidate)
+        return value, cache.stats()
+
+    value, stats = asyncio.run(main())
+    assert value == "old"
+    assert stats["revalidated"] == 1
+
+
+def test_revalidate_uses_replacement_without_refetching():
+    async def main():
+        cache = PageCache(max_entries=10, ttl_s=60)
+        await cache.put("https://a.test/", _entry("https://a.test/", "old", age=120, etag='"1"'))
+
+        async def revalidate(entry):
+            return _entry(entry.url, "new", etag='"2"')
+
+        value = await cache.get_or_fetch("https://a.test/", lambda: pytest.fail("fetched"), revalidate)
+        return value, cache.fresh("https://a.test/")
+
+    assert asyncio.run(main()) == ("new", True)
+
+
+def test_disk_evicts_oldest_writes_past_limit(tmp_path):
+    # Left over from an earlier run: the oldest file on disk
+    stale = tmp_path / "stale.json"
+    stale.write_text("{}")
+    os.utime(stale, (0, 0))
+
+    async def main():
+        cache = PageCache(max_entries=10, ttl_s=60, disk_dir=tmp_path, disk_max_entries=2)
+        for n in range(3):
+            await cache.put(f"https://a.test/{n}", _entry(f"https://a.test/{n}", "x" * 100))
+        return cache.stats()
+
+    stats = asyncio.run(main())
+    assert not stale.exists()
+    assert stats["disk_entries"] == 2
+    assert stats["disk_evictions"] == 2
+    assert stats["disk_bytes"] == sum(p.stat().st_size for p in tmp_path.iterdir())
+    assert len(list(tmp_path.iterdir())) == 2
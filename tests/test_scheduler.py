@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from src.interfaces.scheduler import Job, QueueFull, RequestScheduler
+
+
+def _job(job_id: int, user_id: int, ran: list, gate: asyncio.Event | None = None, positions: list | None = None) -> Job:
+    async def run() -> None:
+        if gate is not None:
+            await gate.wait()
+        ran.append(job_id)
+
+    async def on_position(position: int) -> None:
+        positions.append(position)
+
+    return Job(job_id, user_id, run, on_position if positions is not None else None)
+
+
+async def _settle() -> None:
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+def test_round_robin_between_users():
+    async def main():
+        scheduler = RequestScheduler(workers=1, max_queue=10, max_per_user=5)
+        scheduler.start()
+        ran, gate = [], asyncio.Event()
+        await scheduler.submit(_job(0, 9, ran, gate))  # holds the only worker
+        await _settle()
+        for job_id, user_id in [(1, 1), (2, 1), (3, 1), (4, 2), (5, 2)]:
+            await scheduler.submit(_job(job_id, user_id, ran))
+        gate.set()
+        await _settle()
+        await scheduler.stop()
+        return ran
+
+    assert asyncio.run(main()) == [0, 1, 4, 2, 5, 3]
+
+
+def test_queue_full():
+    async def main():
+        scheduler = RequestScheduler(workers=1, max_queue=2, max_per_user=1)
+        scheduler.start()
+        ran, gate = [], asyncio.Event()
+        await scheduler.submit(_job(0, 9, ran, gate))
+        await _settle()
+        await scheduler.submit(_job(1, 1, ran))
+        with pytest.raises(QueueFull):
+            await scheduler.submit(_job(2, 1, ran))  # per-user limit
+        await scheduler.submit(_job(3, 2, ran))
+        with pytest.raises(QueueFull):
+            await scheduler.submit(_job(4, 3, ran))  # overall limit
+        stats = scheduler.stats()
+        await scheduler.stop()
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats["rejected"] == 2
+    assert stats["queued"] == 2
+
+
+def test_cancel_queued_and_running():
+    async def main():
+        scheduler = RequestScheduler(workers=1, max_queue=10, max_per_user=5)
+        scheduler.start()
+        ran, gate, positions = [], asyncio.Event(), []
+        await scheduler.submit(_job(0, 1, ran, gate))
+        await _settle()
+        assert await scheduler.submit(_job(1, 2, ran, positions=positions)) == 1
+        assert scheduler.cancel(1)
+        assert not scheduler.cancel(42)
+        assert scheduler.cancel(0)  # the running one
+        await _settle()
+        stats = scheduler.stats()
+        await scheduler.stop()
+        return ran, positions, stats
+
+    ran, positions, stats = asyncio.run(main())
+    assert ran == []
+    assert positions == [1, 0]
+    assert stats["cancelled"] == 2
+    assert stats["queued"] == 0
+
+
+def test_notice_cleared_when_job_is_next_for_a_free_worker():
+    async def main():
+        # Not started: the job stays queued while a worker slot is free
+        scheduler = RequestScheduler(workers=1, max_queue=10, max_per_user=5)
+        positions = []
+        job = _job(1, 1, [], positions=positions)
+        job.position = 3  # announced while other jobs were ahead of it
+        await scheduler.submit(job)
+        return positions
+
+    assert asyncio.run(main()) == [0]
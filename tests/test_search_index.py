@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from src.core.config import settings
+from src.tools.search_index import WorkspaceIndex, _required_literals
+
+
+@pytest.mark.parametrize(
+    ("pattern", "expected"),
+    [
+        ("def foo", ["def foo"]),
+        (r"def\s+foo_bar\(", ["def", "foo_bar("]),
+        ("colou?r", ["colo"]),
+        ("foo.*barbaz", ["foo", "barbaz"]),
+        (r"hello\.world", ["hello.world"]),
+        ("x[abc]yzw", ["yzw"]),
+        ("[^]abc]xyz", ["xyz"]),
+        ("[]abc]xyz", ["xyz"]),
+        (r"[a\]bcd]xyz", ["xyz"]),
+        ("ab{2}cde", ["cde"]),
+        ("(abc)def", ["def"]),
+        (r"ab\x41cdef", ["cdef"]),
+        (r"abc\N{EM DASH}xyz", ["abc", "xyz"]),
+        ("a|bcdef", []),
+        ("(?x) def foo", []),
+    ],
+)
+def test_required_literals(pattern, expected):
+    assert _required_literals(pattern) == expected
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "WORKSPACE_DIR", str(tmp_path))
+    return WorkspaceIndex()
+
+
+def _search(index: WorkspaceIndex, query: str, **kwargs) -> list[str]:
+    result = asyncio.run(index.search(query, **kwargs))
+    return [line.split(":", 1)[0] for line in result.splitlines()[1:]]
+
+
+def test_ranking(index, tmp_path):
+    (tmp_path / "few.txt").write_text("needle\n")
+    (tmp_path / "many.txt").write_text("needle\nneedle\nneedle\n")
+    (tmp_path / "needle.txt").write_text("one needle\n")  # the file name counts extra
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "few.txt").write_text("needle\n")
+    assert _search(index, "needle") == ["needle.txt", "many.txt", "many.txt", "many.txt", "few.txt", "sub/few.txt"]
+
+
+def test_regex_with_escape_operand(index, tmp_path):
+    (tmp_path / "a.txt").write_text("xyz abAcdef\n")
+    (tmp_path / "b.txt").write_text("ab41cdef\n")
+    assert _search(index, r"ab\x41cdef", regex=True) == ["a.txt"]
+
+
+def test_regex_with_bracket_in_class(index, tmp_path):
+    (tmp_path / "a.txt").write_text("qxyz\n")
+    (tmp_path / "b.txt").write_text("]xyz\n")
+    assert _search(index, "[^]abc]xyz", regex=True) == ["a.txt"]
+    assert _search(index, r"[a\]bcd]xyz", regex=True) == ["b.txt"]
+
+
+def test_glob_and_no_match(index, tmp_path):
+    (tmp_path / "a.py").write_text("needle\n")
+    (tmp_path / "b.txt").write_text("needle\n")
+    assert _search(index, "needle", glob="*.py") == ["a.py"]
+    assert asyncio.run(index.search("haystack")) == "No matches for 'haystack'."
+
+
+def test_update_file_reindexes(index, tmp_path):
+    target = tmp_path / "a.txt"
+    target.write_text("old words\n")
+    assert _search(index, "old words") == ["a.txt"]
+    target.write_text("new words\n")
+    asyncio.run(index.update_file(target))
+    assert _search(index, "new words") == ["a.txt"]
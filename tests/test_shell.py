@@ -0,0 +1,100 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from src.core.config import settings
+from src.tools import shell
+
+
+def _running(needle: str) -> bool:
+    for cmdline in Path("/proc").glob("[0-9]*/cmdline"):
+        try:
+            if needle in cmdline.read_bytes().replace(b"\0", b" ").decode(errors="replace"):
+                return True
+        except OSError:
+            continue
+    return False
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "WORKSPACE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_timeout_kills_backgrounded_child(workspace, monkeypatch):
+    monkeypatch.setattr(shell, "SHELL_TIMEOUT", 1)
+    # The shell exits at once, but the backgrounded sleep keeps stdout open
+    result = asyncio.run(shell._run_once("sleep 137.25 & echo started"))
+    assert "timed out" in result
+    assert "started" in result
+    assert not _running("sleep 137.25")
+
+
+def test_finished_command_returns_output(workspace):
+    result = asyncio.run(shell._run_once("echo hi; echo oops >&2; exit 3"))
+    assert "stdout:\nhi" in result
+    assert "stderr:\noops" in result
+
+
+def test_head_tail_buffer_keeps_both_ends():
+    buffer = shell.HeadTailBuffer(8)
+    assert not buffer
+    for chunk in (b"ab", b"cdefgh", b"ijkl"):
+        buffer.feed(chunk)
+    assert buffer.total == 12
+    assert buffer.dropped == 4
+    assert buffer.render() == "abcd\n...[4 bytes omitted]...\nijkl"
+
+
+def test_head_tail_buffer_under_cap():
+    buffer = shell.HeadTailBuffer(8)
+    buffer.feed(b"abcdef")
+    assert buffer.dropped == 0
+    assert buffer.render() == "abcdef"
+
+
+class _Chunks:
+    """A stream that hands out the given chunks one read at a time."""
+
+    def __init__(self, *chunks: bytes) -> None:
+        self._chunks = list(chunks)
+
+    async def read(self, n: int) -> bytes:
+        return self._chunks.pop(0) if self._chunks else b""
+
+
+@pytest.mark.parametrize("split", range(1, len("out\n__END__ 0\n")))
+def test_read_until_marker_split_across_chunks(split):
+    data = b"out\n__END__ 0\nnext"
+    buffer = shell.HeadTailBuffer(1024)
+    rest = asyncio.run(shell._read_until(_Chunks(data[:split], data[split:]), b"__END__", buffer))
+    assert rest == b" 0"
+    assert buffer.render() == "out\n"
+
+
+def test_read_until_eof_keeps_output():
+    buffer = shell.HeadTailBuffer(1024)
+    with pytest.raises(EOFError):
+        asyncio.run(shell._read_until(_Chunks(b"partial", b" __EN"), b"__END__", buffer))
+    assert buffer.render() == "partial __EN"
+
+
+def test_sessions_stay_under_cap_when_opened_concurrently(workspace, monkeypatch):
+    monkeypatch.setattr(settings, "SHELL_MAX_SESSIONS", 2)
+
+    async def main():
+        manager = shell.ShellSessionManager()
+        try:
+            # Idle sessions to evict: closing one yields to the other callers
+            await manager.run("old0", "true")
+            await manager.run("old1", "true")
+            results = await asyncio.gather(*(manager.run(f"c{n}", "echo ok") for n in range(4)))
+            return results, len(manager._sessions)
+        finally:
+            await manager.close_all()
+
+    results, open_sessions = asyncio.run(main())
+    assert open_sessions <= 2
+    assert all(r is None or "ok" in r for r in results)